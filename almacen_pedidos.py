@@ -0,0 +1,475 @@
+"""
+Almacenamiento de Pedidos - Fonda Doña Magui
+Dónde viven los carritos abiertos: en la memoria del worker o en un
+archivo SQLite local compartido por todos los workers del servidor.
+Los carritos abandonados expiran y los pedidos finalizados se apartan
+de los abiertos, para que ninguno de los dos crezca sin límite
+"""
+
+import heapq
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import islice
+
+from hilos import HiloDemonio
+from pedido import Pedido
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS pedidos (
+    id TEXT PRIMARY KEY,
+    datos TEXT NOT NULL,
+    actualizado REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pedidos_actualizado ON pedidos (actualizado);
+CREATE TABLE IF NOT EXISTS pedidos_finalizados (
+    id TEXT PRIMARY KEY,
+    datos TEXT NOT NULL,
+    actualizado REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pedidos_finalizados_actualizado ON pedidos_finalizados (actualizado);
+"""
+
+# Pedidos que se miden para estimar la memoria de todos
+MUESTRA_MEMORIA = 32
+# Vencimientos que revisa el barrido cada vez que toma el candado, para no
+# detener las peticiones mucho tiempo cuando vencen muchos a la vez
+LOTE_BARRIDO = 1000
+
+
+def finalizado(pedido):
+    return pedido.estado == 'finalizado'
+
+
+def tamano_aproximado(objeto):
+    """Bytes de un pedido contando sus objetos, diccionarios, listas y textos"""
+    tamano = sys.getsizeof(objeto)
+    if isinstance(objeto, dict):
+        tamano += sum(tamano_aproximado(k) + tamano_aproximado(v) for k, v in objeto.items())
+    elif isinstance(objeto, list):
+        tamano += sum(tamano_aproximado(v) for v in objeto)
+    elif hasattr(objeto, '__slots__'):
+        tamano += sum(tamano_aproximado(getattr(objeto, campo)) for campo in objeto.__slots__)
+    return tamano
+
+
+class AlmacenMemoria:
+    """
+    Pedidos en un diccionario del proceso. Rápido, pero cada worker tiene
+    los suyos y se pierden al reiniciar: sirve con un solo worker.
+
+    - `ttl_segundos` > 0: un carrito sin leerse ni modificarse ese tiempo
+      expira. Cada carrito tiene una sola entrada en un heap por fecha de
+      expiración; `barrer` solo saca las vencidas (si el carrito se usó
+      mientras tanto, la vuelve a meter con su fecha nueva).
+    - `maximo` > 0: al crear un carrito más, se desaloja el usado hace más
+      tiempo (LRU).
+    - Los pedidos finalizados pasan a `finalizados`, que guarda los
+      `maximo_finalizados` más recientes.
+
+    Guarda objetos `Pedido`. Cada pedido se modifica con el candado de su franja (`franjas` candados
+    repartidos por hash del id): dos usuarios distintos casi nunca se
+    esperan entre sí. `_lock` solo protege los diccionarios y el heap, y se
+    toma un momento al leer y al escribir.
+
+    Los pedidos que regresa son los mismos objetos guardados: para leerlos
+    sin que otro hilo los cambie en medio, usar `obtener(usuario_id, leer)`.
+    """
+
+    def __init__(self, ttl_segundos=0, maximo=0, maximo_finalizados=1000, franjas=64):
+        self.ttl_segundos = ttl_segundos
+        self.maximo = maximo
+        self.maximo_finalizados = maximo_finalizados
+        self.pedidos = OrderedDict()
+        self.finalizados = OrderedDict()
+        self._ultimo_uso = {}
+        self._vencimientos = []
+        self._en_vencimientos = set()
+        self._lock = threading.Lock()
+        self._franjas = [threading.Lock() for _ in range(max(1, franjas))]
+
+        self.expirados = 0
+        self.desalojos = 0
+        self.desalojos_finalizados = 0
+
+    def _usar(self, usuario_id):
+        """Marca el carrito como recién usado (para el TTL y el LRU)"""
+        self.pedidos.move_to_end(usuario_id)
+        ahora = time.monotonic()
+        self._ultimo_uso[usuario_id] = ahora
+        if self.ttl_segundos > 0 and usuario_id not in self._en_vencimientos:
+            self._en_vencimientos.add(usuario_id)
+            heapq.heappush(self._vencimientos, (ahora + self.ttl_segundos, usuario_id))
+
+    def _quitar(self, usuario_id):
+        self.pedidos.pop(usuario_id, None)
+        self._ultimo_uso.pop(usuario_id, None)
+
+    def _leer(self, usuario_id):
+        pedido = self.pedidos.get(usuario_id)
+        if pedido is not None:
+            self._usar(usuario_id)
+            return pedido
+        return self.finalizados.get(usuario_id)
+
+    def _escribir(self, pedido):
+        usuario_id = pedido.id
+        if finalizado(pedido):
+            self._quitar(usuario_id)
+            self.finalizados[usuario_id] = pedido
+            self.finalizados.move_to_end(usuario_id)
+            while len(self.finalizados) > self.maximo_finalizados:
+                self.finalizados.popitem(last=False)
+                self.desalojos_finalizados += 1
+            return
+
+        self.finalizados.pop(usuario_id, None)
+        self.pedidos[usuario_id] = pedido
+        self._usar(usuario_id)
+        while self.maximo > 0 and len(self.pedidos) > self.maximo:
+            desalojado, _ = self.pedidos.popitem(last=False)
+            self._ultimo_uso.pop(desalojado, None)
+            self.desalojos += 1
+
+    def _franja(self, usuario_id):
+        return self._franjas[hash(usuario_id) % len(self._franjas)]
+
+    def obtener(self, usuario_id, leer=None):
+        """
+        Pedido del usuario (abierto o finalizado), o None. Con `leer`, regresa
+        `leer(pedido)` (si existe) calculado con el pedido bloqueado.
+        """
+        with self._franja(usuario_id):
+            with self._lock:
+                pedido = self._leer(usuario_id)
+            return leer(pedido) if leer is not None and pedido is not None else pedido
+
+    def guardar(self, pedido):
+        """Crea o reemplaza el pedido con id `pedido.id`"""
+        with self._franja(pedido.id):
+            with self._lock:
+                self._escribir(pedido)
+
+    def modificar(self, usuario_id, cambiar):
+        """
+        Lee el pedido, llama `cambiar(pedido o None)` y guarda lo que regrese
+        (None: no guarda nada), sin que otro hilo modifique el mismo pedido
+        en medio. Regresa lo que regresó `cambiar`.
+        """
+        with self._franja(usuario_id):
+            with self._lock:
+                pedido = self._leer(usuario_id)
+            pedido = cambiar(pedido)
+            if pedido is not None:
+                with self._lock:
+                    self._escribir(pedido)
+            return pedido
+
+    def eliminar(self, usuario_id):
+        with self._franja(usuario_id):
+            with self._lock:
+                self._quitar(usuario_id)
+                self.finalizados.pop(usuario_id, None)
+
+    def barrer(self):
+        """Saca los carritos que ya expiraron; regresa cuántos"""
+        if self.ttl_segundos <= 0:
+            return 0
+        ahora = time.monotonic()
+        total = 0
+        pendientes = True
+        while pendientes:
+            with self._lock:
+                expirados = 0
+                for _ in range(LOTE_BARRIDO):
+                    if not self._vencimientos or self._vencimientos[0][0] > ahora:
+                        pendientes = False
+                        break
+                    _, usuario_id = heapq.heappop(self._vencimientos)
+                    self._en_vencimientos.discard(usuario_id)
+                    ultimo_uso = self._ultimo_uso.get(usuario_id)
+                    if ultimo_uso is None:
+                        # Ya se finalizó, desalojó o eliminó
+                        continue
+                    if ultimo_uso + self.ttl_segundos > ahora:
+                        self._en_vencimientos.add(usuario_id)
+                        heapq.heappush(self._vencimientos, (ultimo_uso + self.ttl_segundos, usuario_id))
+                        continue
+                    self._quitar(usuario_id)
+                    expirados += 1
+                self.expirados += expirados
+            total += expirados
+        return total
+
+    def __contains__(self, usuario_id):
+        return usuario_id in self.pedidos or usuario_id in self.finalizados
+
+    def __len__(self):
+        return len(self.pedidos)
+
+    def _memoria_estimada(self):
+        """Bytes aproximados: tamaño promedio de los más recientes por el total"""
+        total = 0
+        for pedidos in (self.pedidos, self.finalizados):
+            muestra = list(islice(reversed(pedidos.values()), MUESTRA_MEMORIA))
+            if muestra:
+                total += sum(map(tamano_aproximado, muestra)) * len(pedidos) // len(muestra)
+        return total
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'backend': 'memoria',
+                'pedidos': len(self.pedidos),
+                'finalizados': len(self.finalizados),
+                'memoria_estimada_bytes': self._memoria_estimada(),
+                'ttl_segundos': self.ttl_segundos,
+                'maximo': self.maximo,
+                'maximo_finalizados': self.maximo_finalizados,
+                'expirados': self.expirados,
+                'desalojos': self.desalojos,
+                'desalojos_finalizados': self.desalojos_finalizados,
+                'pendientes_de_vencer': len(self._vencimientos),
+                'franjas': len(self._franjas),
+            }
+
+
+class AlmacenSQLite:
+    """
+    Pedidos en un archivo SQLite en modo WAL: todos los workers del servidor
+    ven los mismos carritos y sobreviven a un reinicio. Cada pedido es una
+    fila (JSON en `datos`), así que leer o escribir un carrito toca una sola
+    fila por su llave primaria. Los finalizados van a `pedidos_finalizados`.
+
+    `ttl_segundos`, `maximo` y `maximo_finalizados` funcionan como en
+    AlmacenMemoria, pero los aplica `barrer` con el índice de `actualizado`
+    (fecha de la última escritura: leer un carrito no lo renueva).
+
+    Las conexiones se reparten desde un pool de hasta `conexiones` por
+    proceso; después de un fork el pool se descarta y se abren nuevas.
+    """
+
+    def __init__(self, ruta_db, conexiones=4, espera_ms=5000, ttl_segundos=0, maximo=0,
+                 maximo_finalizados=1000):
+        self.ruta_db = ruta_db
+        self.espera_ms = espera_ms
+        self.max_conexiones = conexiones
+        self.ttl_segundos = ttl_segundos
+        self.maximo = maximo
+        self.maximo_finalizados = maximo_finalizados
+        self._pool = queue.LifoQueue()
+        self._abiertas = 0
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+        # Contadores de este proceso
+        self.expirados = 0
+        self.desalojos = 0
+        self.desalojos_finalizados = 0
+
+        with self._conexion() as conexion:
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.executescript(ESQUEMA)
+
+    def _abrir(self):
+        conexion = sqlite3.connect(self.ruta_db, isolation_level=None, check_same_thread=False)
+        conexion.execute(f"PRAGMA busy_timeout={int(self.espera_ms)}")
+        # En WAL, NORMAL no pierde consistencia y evita un fsync por escritura
+        conexion.execute("PRAGMA synchronous=NORMAL")
+        return conexion
+
+    @contextmanager
+    def _conexion(self):
+        """Conexión del pool (espera si ya hay `conexiones` en uso)"""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Las conexiones heredadas del proceso padre no se usan
+                self._pool = queue.LifoQueue()
+                self._abiertas = 0
+                self._pid = os.getpid()
+            pool = self._pool
+            try:
+                conexion = pool.get_nowait()
+            except queue.Empty:
+                conexion = None
+                if self._abiertas < self.max_conexiones:
+                    self._abiertas += 1
+                    conexion = self._abrir()
+        if conexion is None:
+            conexion = pool.get()
+        try:
+            yield conexion
+        finally:
+            pool.put(conexion)
+
+    @contextmanager
+    def _transaccion(self):
+        """Conexión con una transacción BEGIN IMMEDIATE: ningún otro worker escribe en medio"""
+        with self._conexion() as conexion:
+            conexion.execute("BEGIN IMMEDIATE")
+            try:
+                yield conexion
+            except BaseException:
+                conexion.execute("ROLLBACK")
+                raise
+            conexion.execute("COMMIT")
+
+    @staticmethod
+    def _leer(conexion, usuario_id):
+        # Un carrito abierto gana sobre un pedido finalizado con el mismo id
+        for tabla in ('pedidos', 'pedidos_finalizados'):
+            fila = conexion.execute(f"SELECT datos FROM {tabla} WHERE id = ?", (usuario_id,)).fetchone()
+            if fila:
+                return Pedido.desde_dict(json.loads(fila[0]))
+        return None
+
+    @staticmethod
+    def _escribir(conexion, pedido):
+        tabla = 'pedidos'
+        if finalizado(pedido):
+            tabla = 'pedidos_finalizados'
+            conexion.execute("DELETE FROM pedidos WHERE id = ?", (pedido.id,))
+        conexion.execute(
+            f"INSERT INTO {tabla} (id, datos, actualizado) VALUES (?, ?, ?) "
+            f"ON CONFLICT (id) DO UPDATE SET datos = excluded.datos, actualizado = excluded.actualizado",
+            (pedido.id, json.dumps(pedido.a_dict(), ensure_ascii=False), time.time())
+        )
+
+    def obtener(self, usuario_id, leer=None):
+        """Pedido del usuario (una copia leída de la base) o None; con `leer`, `leer(pedido)`"""
+        with self._conexion() as conexion:
+            pedido = self._leer(conexion, usuario_id)
+        return leer(pedido) if leer is not None and pedido is not None else pedido
+
+    def guardar(self, pedido):
+        """Crea o reemplaza el pedido con id `pedido.id`"""
+        with self._transaccion() as conexion:
+            self._escribir(conexion, pedido)
+
+    def modificar(self, usuario_id, cambiar):
+        """Igual que AlmacenMemoria.modificar, dentro de una transacción"""
+        with self._transaccion() as conexion:
+            pedido = cambiar(self._leer(conexion, usuario_id))
+            if pedido is not None:
+                self._escribir(conexion, pedido)
+            return pedido
+
+    def eliminar(self, usuario_id):
+        with self._transaccion() as conexion:
+            conexion.execute("DELETE FROM pedidos WHERE id = ?", (usuario_id,))
+            conexion.execute("DELETE FROM pedidos_finalizados WHERE id = ?", (usuario_id,))
+
+    @staticmethod
+    def _recortar(conexion, tabla, maximo):
+        """Borra de `tabla` todo menos las `maximo` filas escritas más recientemente"""
+        fila = conexion.execute(
+            f"SELECT actualizado FROM {tabla} ORDER BY actualizado DESC LIMIT 1 OFFSET ?", (maximo - 1,)
+        ).fetchone()
+        if fila is None:
+            return 0
+        return conexion.execute(f"DELETE FROM {tabla} WHERE actualizado < ?", (fila[0],)).rowcount
+
+    def barrer(self):
+        """Borra los carritos expirados y los que pasan de los máximos; regresa cuántos expiraron"""
+        with self._transaccion() as conexion:
+            expirados = 0
+            if self.ttl_segundos > 0:
+                expirados = conexion.execute(
+                    "DELETE FROM pedidos WHERE actualizado < ?", (time.time() - self.ttl_segundos,)
+                ).rowcount
+            desalojos = self._recortar(conexion, 'pedidos', self.maximo) if self.maximo > 0 else 0
+            desalojos_finalizados = self._recortar(conexion, 'pedidos_finalizados', self.maximo_finalizados)
+
+        self.expirados += expirados
+        self.desalojos += desalojos
+        self.desalojos_finalizados += desalojos_finalizados
+        return expirados
+
+    def __contains__(self, usuario_id):
+        with self._conexion() as conexion:
+            return self._leer(conexion, usuario_id) is not None
+
+    def __len__(self):
+        with self._conexion() as conexion:
+            return conexion.execute("SELECT COUNT(*) FROM pedidos").fetchone()[0]
+
+    def estadisticas(self):
+        with self._conexion() as conexion:
+            pedidos = conexion.execute("SELECT COUNT(*) FROM pedidos").fetchone()[0]
+            finalizados = conexion.execute("SELECT COUNT(*) FROM pedidos_finalizados").fetchone()[0]
+            paginas = conexion.execute("PRAGMA page_count").fetchone()[0]
+            tamano_pagina = conexion.execute("PRAGMA page_size").fetchone()[0]
+        return {
+            'backend': 'sqlite',
+            'ruta': self.ruta_db,
+            'pedidos': pedidos,
+            'finalizados': finalizados,
+            'bytes_en_disco': paginas * tamano_pagina,
+            'ttl_segundos': self.ttl_segundos,
+            'maximo': self.maximo,
+            'maximo_finalizados': self.maximo_finalizados,
+            'expirados': self.expirados,
+            'desalojos': self.desalojos,
+            'desalojos_finalizados': self.desalojos_finalizados,
+            'conexiones_abiertas': self._abiertas,
+            'conexiones_maximas': self.max_conexiones,
+        }
+
+
+class Barrendero:
+    """
+    Llama `almacen.barrer()` cada `intervalo_segundos` desde un hilo propio,
+    fuera del camino de las peticiones. `intervalo_segundos` <= 0 lo desactiva.
+    """
+
+    def __init__(self, almacen, intervalo_segundos=30.0):
+        self.almacen = almacen
+        self.intervalo = intervalo_segundos
+        self._hilo = HiloDemonio('barrendero-pedidos', self._barrer)
+        self.barridos = 0
+        self.ultima_duracion_ms = None
+
+    @property
+    def activo(self):
+        return self.intervalo > 0
+
+    def asegurar_hilo(self):
+        """Arranca el hilo del barrido (también tras un fork del proceso)"""
+        if self.activo:
+            self._hilo.asegurar()
+
+    def _barrer(self):
+        while True:
+            time.sleep(self.intervalo)
+            inicio = time.perf_counter()
+            try:
+                self.almacen.barrer()
+            except Exception as e:
+                print(f"⚠️ Error al barrer los pedidos: {e}")
+            self.barridos += 1
+            self.ultima_duracion_ms = round((time.perf_counter() - inicio) * 1000, 3)
+
+    def estadisticas(self):
+        return {
+            'activo': self.activo,
+            'intervalo_segundos': self.intervalo,
+            'barridos': self.barridos,
+            'ultima_duracion_ms': self.ultima_duracion_ms,
+        }
+
+
+def crear_almacen(backend, ruta_sqlite='pedidos.db', conexiones=4, ttl_segundos=0, maximo=0,
+                  maximo_finalizados=1000, franjas=64):
+    """Almacén de pedidos según la configuración ('memoria' o 'sqlite')"""
+    if backend == 'memoria':
+        return AlmacenMemoria(ttl_segundos, maximo, maximo_finalizados, franjas)
+    if backend == 'sqlite':
+        return AlmacenSQLite(ruta_sqlite, conexiones, ttl_segundos=ttl_segundos, maximo=maximo,
+                             maximo_finalizados=maximo_finalizados)
+    raise ValueError(f"Almacén de pedidos desconocido: {backend!r} (usa 'memoria' o 'sqlite')")
@@ -5,16 +5,25 @@ Con Red Neuronal para Clasificación de Intenciones
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import json
-import re
 import os
-import random
-from difflib import SequenceMatcher
+import threading
 
-# Importar el clasificador de intenciones
-from modelo_intenciones import ClasificadorIntenciones
+# Los clasificadores de intenciones se importan al cargar el modelo:
+# el motor NumPy no necesita PyTorch instalado
 # Importar el sistema de pedidos
-from sistema_pedidos import gestor_pedidos
+from sistema_pedidos import OperacionesInvalidas, gestor_pedidos, leer_operaciones
+# Agrupación de mensajes concurrentes en un solo forward
+from microlotes import AgrupadorMicrolotes
+# Menú indexado (por id, categoría, disponibilidad y nombre)
+from catalogo_menu import CatalogoMenu, guardar_menu
+# Respuestas JSON serializadas y comprimidas una vez por versión del menú
+from respuestas_precalculadas import CacheRespuestas
+# Recarga en caliente de menu.json
+from vigilante_menu import VigilanteMenu
+import configuracion
+import normalizacion
+import versiones_modelo
+import reentrenamiento
 
 app = Flask(__name__)
 CORS(app)
@@ -22,113 +31,238 @@ CORS(app)
 class ChatbotRestaurante:
     def __init__(self, archivo_menu='menu.json'):
         self.archivo_menu = archivo_menu
-        self.menu = self.cargar_menu()
+        cargar = CatalogoMenu.desde_archivo
+        if configuracion.MENU_BACKEND == 'sqlite':
+            from menu_sqlite import CatalogoMenuSQLite
+            self.archivo_menu = configuracion.MENU_SQLITE
+            cargar = lambda ruta: CatalogoMenuSQLite.desde_archivo(ruta, configuracion.MENU_SQLITE_CACHE)
+        self.vigilante_menu = VigilanteMenu(
+            self.archivo_menu, configuracion.MENU_RECARGA_SEGUNDOS, cargar=cargar
+        )
+        self.catalogo = self.cargar_menu()
+        self.vigilante_menu.suscribir(self.instalar_catalogo)
         
         # Cargar el modelo de red neuronal
         self.clasificador = None
         self.usar_neural = False
+        self.version_modelo = None
+        self._firma_modelo = None
+        self._lock_modelo = threading.Lock()
         self.cargar_modelo_neural()
         
+        # Micro-lotes: los mensajes concurrentes comparten un forward de la red
+        self.agrupador = None
+        if configuracion.MICROLOTES_ACTIVO:
+            self.agrupador = AgrupadorMicrolotes(
+                lambda textos: self.clasificador.obtener_respuesta_lote(textos),
+                espera_maxima_ms=configuracion.MICROLOTE_ESPERA_MS,
+                tamano_maximo=configuracion.MICROLOTE_TAMANO_MAXIMO
+            )
+        
     def cargar_modelo_neural(self):
-        """Intenta cargar el modelo de red neuronal"""
+        """Intenta cargar la versión activa del modelo de red neuronal"""
+        ruta_base = configuracion.RUTA_MODELO
         try:
-            ruta_modelo = 'modelo_chatbot'
-            if os.path.exists(ruta_modelo):
-                self.clasificador = ClasificadorIntenciones()
-                self.clasificador.cargar_modelo(ruta_modelo)
+            if os.path.exists(ruta_base):
+                # Leer la firma antes que el puntero: si cambia en medio, la
+                # próxima verificación vuelve a cargar
+                self._firma_modelo = versiones_modelo.firma_puntero(ruta_base)
+                version, ruta_modelo = versiones_modelo.version_actual(ruta_base)
+                
+                clasificador = self.crear_clasificador(ruta_modelo)
+                clasificador.cargar_modelo(ruta_modelo)
+                
+                # Intercambio atómico: las peticiones en curso terminan con el modelo anterior
+                self.clasificador = clasificador
+                self.version_modelo = version
                 self.usar_neural = True
-                print("✅ Modelo de red neuronal cargado correctamente")
+                print(f"✅ Modelo de red neuronal cargado correctamente (versión {version})")
             else:
                 print("⚠️ Modelo no encontrado. Ejecuta 'python entrenar_modelo.py' primero.")
                 print("   Usando modo de respaldo con patrones.")
         except Exception as e:
             print(f"⚠️ Error cargando modelo neural: {e}")
-            print("   Usando modo de respaldo con patrones.")
-            self.usar_neural = False
+            if self.clasificador is not None:
+                print(f"   Se conserva la versión {self.version_modelo}.")
+            else:
+                print("   Usando modo de respaldo con patrones.")
+                self.usar_neural = False
+    
+    def verificar_version_modelo(self):
+        """
+        Recarga el modelo si otro proceso publicó o revirtió una versión.
+        Cuesta un stat por llamada; solo carga cuando el puntero cambió.
+        """
+        ruta_base = configuracion.RUTA_MODELO
+        if versiones_modelo.firma_puntero(ruta_base) == self._firma_modelo:
+            return False
+        
+        with self._lock_modelo:
+            # Otro hilo pudo haberlo recargado mientras esperábamos
+            if versiones_modelo.firma_puntero(ruta_base) == self._firma_modelo:
+                return False
+            self.cargar_modelo_neural()
+        return True
+    
+    def crear_clasificador(self, ruta_modelo):
+        """Elige el motor de inferencia según la configuración"""
+        from motor_numpy import ClasificadorIntencionesNumpy, artefacto_disponible
+        
+        motor = configuracion.MOTOR_INFERENCIA
+        if motor == 'auto' and configuracion.CUANTIZACION == 'int8':
+            # La cuantización int8 solo existe en el motor PyTorch
+            motor = 'torch'
+        if motor == 'numpy' or (motor == 'auto' and artefacto_disponible(ruta_modelo)):
+            return ClasificadorIntencionesNumpy()
+        
+        from modelo_intenciones import ClasificadorIntenciones
+        return ClasificadorIntenciones()
     
     def cargar_menu(self):
-        """Carga el menú desde el archivo JSON"""
-        if os.path.exists(self.archivo_menu):
-            with open(self.archivo_menu, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return []
+        """Carga el menú (JSON o SQLite, según la configuración) como catálogo indexado"""
+        return self.vigilante_menu.cargar(self.archivo_menu)
+    
+    def instalar_catalogo(self, catalogo):
+        """
+        Publica un catálogo ya construido. Es un solo cambio de referencia:
+        cada petición lee `self.catalogo` una vez y trabaja con ese
+        catálogo completo, el anterior o el nuevo, nunca con una mezcla.
+        """
+        self.catalogo = catalogo
+    
+    @property
+    def menu(self):
+        """Lista de platillos en el orden de menu.json"""
+        return self.catalogo.platillos
+    
+    def actualizar_menu(self, cambios):
+        """
+        Aplica un lote de cambios (disponible, precio, oferta, ...) al
+        catálogo, lo guarda (menu.json de forma atómica; con SQLite el
+        catálogo guarda en su base) y publica el catálogo nuevo. Los demás
+        workers lo toman en su siguiente recarga.
+        """
+        def construir():
+            catalogo = self.catalogo.con_cambios(cambios)
+            if catalogo is not self.catalogo and configuracion.MENU_BACKEND != 'sqlite':
+                guardar_menu(catalogo.platillos, self.archivo_menu)
+            return catalogo
+        
+        return self.vigilante_menu.actualizar(construir)
     
     def limpiar_texto(self, texto):
         """Limpia y normaliza el texto del usuario"""
-        texto = texto.lower()
-        texto = re.sub(r'[¿?¡!.,;]', '', texto)
-        return texto.strip()
-    
-    def similitud_texto(self, texto1, texto2):
-        """Calcula la similitud entre dos textos"""
-        return SequenceMatcher(None, texto1.lower(), texto2.lower()).ratio()
+        return normalizacion.normalizar(texto)
     
     def buscar_platillo(self, nombre_platillo):
         """Busca un platillo en el menú por nombre"""
-        nombre_limpio = self.limpiar_texto(nombre_platillo)
-        mejores_coincidencias = []
-        
-        for platillo in self.menu:
-            nombre_plat = self.limpiar_texto(platillo['nombre'])
-            similitud = self.similitud_texto(nombre_limpio, nombre_plat)
-            
-            if similitud > 0.6:
-                mejores_coincidencias.append((platillo, similitud))
-        
-        mejores_coincidencias.sort(key=lambda x: x[1], reverse=True)
-        return [p[0] for p in mejores_coincidencias[:3]]
+        return [p for p, _ in self.buscar_platillo_con_similitud(nombre_platillo)]
+    
+    def buscar_platillo_con_similitud(self, nombre_platillo, limite=3):
+        """Las mejores coincidencias del menú como (platillo, similitud), de mayor a menor"""
+        return self.catalogo.buscar(nombre_platillo, umbral=0.6, limite=limite)
     
     def formatear_platillo(self, platillo):
-        """Formatea la información de un platillo"""
-        disponible = "✓ Disponible" if platillo['disponible'] else "✗ No disponible"
-        precio_final = platillo['precio']
-        
-        info = f"\n🍽️ **{platillo['nombre']}**\n"
-        info += f"{platillo['descripcion']}\n"
-        info += f"💰 Precio: ${precio_final} pesos\n"
-        info += f"📦 Estado: {disponible}"
-        
-        if platillo.get('oferta'):
-            info += f"\n🎉 ¡EN OFERTA! Descuento: {platillo['descuento']}%"
-        
-        if platillo.get('mas_vendido'):
-            info += "\n⭐ ¡Más vendido!"
-        
-        if platillo.get('popular'):
-            info += "\n🔥 ¡Popular!"
-        
-        return info
+        """Formatea la información de un platillo (precalculada por versión del menú)"""
+        return self.catalogo.ficha(platillo)
+    
+    def clasificar_lote(self, mensajes):
+        """Obtiene la respuesta de la red neuronal para varios mensajes a la vez"""
+        if self.agrupador is not None:
+            return self.agrupador.enviar_varios(mensajes)
+        return self.clasificador.obtener_respuesta_lote(mensajes)
     
     def responder(self, mensaje_usuario):
         """Genera una respuesta al mensaje del usuario"""
+        return self.responder_lote([mensaje_usuario])[0]
+    
+    def responder_lote(self, mensajes):
+        """Genera las respuestas a varios mensajes con un solo forward de la red"""
+        respuestas = [None] * len(mensajes)
+        pendientes = []
+        # Todo el lote se responde con el mismo catálogo aunque el menú se recargue
+        catalogo = self.catalogo
         
         # Primero intentar buscar platillos específicos mencionados
-        platillos_encontrados = self.buscar_platillo(mensaje_usuario)
-        if platillos_encontrados and len(platillos_encontrados) > 0:
+        for i, mensaje_usuario in enumerate(mensajes):
+            coincidencias = catalogo.buscar(mensaje_usuario, umbral=0.6, limite=3)
+            
             # Si la similitud es muy alta, probablemente está preguntando por ese platillo
-            nombre_limpio = self.limpiar_texto(mensaje_usuario)
-            for platillo in self.menu:
-                if self.similitud_texto(nombre_limpio, self.limpiar_texto(platillo['nombre'])) > 0.8:
-                    return self.formatear_platillo(platillo)
+            if coincidencias and coincidencias[0][1] > 0.8:
+                respuestas[i] = catalogo.ficha(coincidencias[0][0])
+            else:
+                pendientes.append((i, [p for p, _ in coincidencias]))
         
         # Usar red neuronal si está disponible
-        if self.usar_neural and self.clasificador:
-            resultado = self.clasificador.obtener_respuesta(mensaje_usuario)
+        resultados = [None] * len(pendientes)
+        if pendientes and self.usar_neural and self.clasificador:
+            resultados = self.clasificar_lote([mensajes[i] for i, _ in pendientes])
+        
+        for (i, platillos_encontrados), resultado in zip(pendientes, resultados):
+            respuestas[i] = self._responder_sin_platillo(catalogo, platillos_encontrados, resultado)
+        
+        return respuestas
+    
+    def agregar_menciones_al_pedido(self, mensaje_usuario, usuario_id):
+        """
+        Agrega al pedido de `usuario_id` todos los platillos que menciona el
+        mensaje ("quiero 2 huevos rancheros y unas flautas de pollo").
+        Regresa None si el mensaje no menciona ningún platillo.
+        """
+        menciones = self.catalogo.extraer_menciones(mensaje_usuario)
+        if not menciones:
+            return None
+        
+        agregados = []
+        no_disponibles = []
+        for mencion in menciones:
+            platillo = mencion['platillo']
+            if not platillo['disponible']:
+                no_disponibles.append(platillo['nombre'])
+                continue
+            if mencion['cantidad'] <= 0:
+                continue
+            gestor_pedidos.agregar_item(usuario_id, platillo, mencion['cantidad'])
+            agregados.append({
+                "id": platillo['id'],
+                "nombre": platillo['nombre'],
+                "cantidad": mencion['cantidad']
+            })
+        
+        respuesta = ""
+        if agregados:
+            respuesta += "✅ Agregué a tu pedido:\n"
+            for item in agregados:
+                respuesta += f"• {item['cantidad']}x {item['nombre']}\n"
+        if no_disponibles:
+            respuesta += f"⚠️ No disponible en este momento: {', '.join(no_disponibles)}\n"
+        respuesta += "\n" + gestor_pedidos.resumen_pedido(usuario_id)
+        
+        return {
+            "respuesta": respuesta,
+            "items_agregados": agregados,
+            "no_disponibles": no_disponibles,
+            "pedido": gestor_pedidos.obtener_pedido(usuario_id)
+        }
+    
+    def _responder_sin_platillo(self, catalogo, platillos_encontrados, resultado):
+        """Respuesta cuando el mensaje no es directamente el nombre de un platillo"""
+        # Si la confianza es buena, usar la respuesta de la red neuronal
+        if resultado is not None and resultado['confianza'] > 0.3:
+            # Intenciones sobre el menú (menú, precios, promociones...) se
+            # responden con la plantilla armada para el menú vigente
+            respuesta = catalogo.respuesta_intencion(resultado['intencion']) or resultado['respuesta']
             
-            # Si la confianza es buena, usar la respuesta de la red neuronal
-            if resultado['confianza'] > 0.3:
-                respuesta = resultado['respuesta']
-                
-                # Log para debugging (opcional, puedes quitar esto en producción)
-                print(f"[Neural] Intención: {resultado['intencion']} ({resultado['confianza']:.1%})")
-                
-                return respuesta
+            # Log para debugging (opcional, puedes quitar esto en producción)
+            print(f"[Neural] Intención: {resultado['intencion']} ({resultado['confianza']:.1%})")
+            
+            return respuesta
         
         # Respaldo: buscar platillos si no se encontró intención clara
         if platillos_encontrados:
             respuesta = "Encontré estos platillos:\n"
             for platillo in platillos_encontrados:
-                respuesta += self.formatear_platillo(platillo) + "\n"
+                respuesta += catalogo.ficha(platillo) + "\n"
             return respuesta
         
         # Respuesta por defecto
@@ -144,9 +278,67 @@ class ChatbotRestaurante:
 
 # Instancia global del chatbot
 bot = ChatbotRestaurante()
+respuestas_menu = CacheRespuestas(bot.catalogo.version)
+
+def responder_precalculado(clave, construir_datos):
+    """
+    Respuesta de un endpoint de solo lectura del menú: el JSON se serializa
+    y comprime una vez por versión del menú y se valida con ETag
+    """
+    # Una sola lectura del catálogo: versión y contenido siempre coinciden
+    return respuesta_precalculada(bot.catalogo, clave, construir_datos).responder(request)
+
+def respuesta_precalculada(catalogo, clave, construir_datos):
+    return respuestas_menu.obtener(
+        catalogo.version, clave,
+        lambda: app.json.response(construir_datos(catalogo)).get_data()
+    )
+
+def datos_menu(catalogo):
+    return {
+        "menu": catalogo.platillos,
+        "total": len(catalogo),
+        "status": "success"
+    }
+
+def datos_disponibles(catalogo):
+    return {
+        "platillos": catalogo.disponibles,
+        "total": len(catalogo.disponibles),
+        "status": "success"
+    }
+
+def datos_estadisticas(catalogo, usar_neural):
+    return {
+        **catalogo.estadisticas(),
+        "modelo_neural_activo": usar_neural,
+        "status": "success"
+    }
+
+def precalcular_respuestas_menu(catalogo):
+    """Tras una recarga, deja listas las respuestas del menú antes de que las pidan"""
+    respuestas_menu.activar(catalogo.version)
+    usar_neural = bot.usar_neural
+    respuesta_precalculada(catalogo, 'menu', datos_menu)
+    respuesta_precalculada(catalogo, 'disponibles', datos_disponibles)
+    respuesta_precalculada(
+        catalogo, ('estadisticas', usar_neural),
+        lambda c: datos_estadisticas(c, usar_neural)
+    )
+
+bot.vigilante_menu.suscribir(precalcular_respuestas_menu)
 
 # ===== RUTAS DE LA API =====
 
+@app.before_request
+def verificar_modelo():
+    """Cada worker toma la versión nueva del modelo en su siguiente petición"""
+    bot.verificar_version_modelo()
+    # Arranca la vigilancia de menu.json en este worker (no corre en el maestro)
+    bot.vigilante_menu.asegurar_hilo()
+    # Y el barrido de carritos abandonados
+    gestor_pedidos.barrendero.asegurar_hilo()
+
 @app.route('/')
 def home():
     """Página de inicio de la API"""
@@ -155,14 +347,28 @@ def home():
         "version": "2.0 - Con Red Neuronal",
         "status": "running",
         "modelo_neural": bot.usar_neural,
+        "motor": type(bot.clasificador).__name__ if bot.clasificador else None,
         "endpoints": {
-            "/chat": "POST - Enviar mensaje al chatbot",
+            "/chat": "POST - Enviar mensaje al chatbot (modo 'pedido' agrega los platillos mencionados)",
+            "/chat/lote": "POST - Enviar varios mensajes al chatbot",
+            "/chat/estadisticas": "GET - Estadísticas de micro-lotes, caches y patrones exactos",
             "/menu": "GET - Obtener menú completo",
             "/menu/disponibles": "GET - Obtener solo platillos disponibles",
+            "/menu/consulta": "GET - Filtrar (categoria, precio_min, precio_max, disponible, oferta, "
+                              "mas_vendido, popular), ordenar (orden) y paginar (limite, cursor) el menú",
+            "/menu/recargas": "GET - Estado de la recarga en caliente del menú",
+            "/menu/actualizar": "POST - Cambiar disponibilidad, precio u ofertas de varios platillos a la vez",
+            "/pedido/operaciones": "POST - Agregar, quitar, cambiar cantidades y datos del cliente "
+                                   "en una sola llamada (todas o ninguna)",
+            "/pedido/estadisticas": "GET - Carritos abiertos, memoria estimada, expirados y desalojados",
             "/platillo/<id>": "GET - Información de un platillo",
             "/buscar": "POST - Buscar platillos",
             "/estadisticas": "GET - Estadísticas del menú",
-            "/health": "GET - Estado del servicio"
+            "/health": "GET - Estado del servicio",
+            "/reentrenar": "POST - Reentrenar el modelo en segundo plano",
+            "/reentrenar/estado/<id>": "GET - Progreso de un reentrenamiento",
+            "/modelo/version": "GET - Versión activa del modelo",
+            "/modelo/revertir": "POST - Volver a la versión anterior del modelo"
         }
     })
 
@@ -178,6 +384,23 @@ def chat():
                 "error": "El mensaje no puede estar vacío"
             }), 400
         
+        # Modo pedido: "quiero 2 huevos rancheros y unas flautas" se agrega al carrito
+        if data.get('modo') == 'pedido':
+            usuario_id = data.get('usuario_id')
+            if not usuario_id:
+                return jsonify({
+                    "error": "usuario_id es requerido en modo pedido",
+                    "status": "error"
+                }), 400
+            
+            resultado = bot.agregar_menciones_al_pedido(mensaje, usuario_id)
+            if resultado is not None:
+                return jsonify({
+                    **resultado,
+                    "status": "success",
+                    "modelo": "pedido"
+                })
+        
         respuesta = bot.responder(mensaje)
         
         return jsonify({
@@ -192,29 +415,159 @@ def chat():
             "status": "error"
         }), 500
 
-@app.route('/menu', methods=['GET'])
-def obtener_menu():
-    """Obtiene el menú completo"""
+@app.route('/chat/lote', methods=['POST'])
+def chat_lote():
+    """Responde varios mensajes en una sola petición"""
+    try:
+        data = request.get_json()
+        mensajes = data.get('mensajes', [])
+        
+        if not isinstance(mensajes, list) or not mensajes:
+            return jsonify({
+                "error": "mensajes debe ser una lista no vacía"
+            }), 400
+        
+        if not all(isinstance(m, str) and m for m in mensajes):
+            return jsonify({
+                "error": "Ningún mensaje puede estar vacío"
+            }), 400
+        
+        respuestas = bot.responder_lote(mensajes)
+        
+        return jsonify({
+            "respuestas": respuestas,
+            "total": len(respuestas),
+            "status": "success",
+            "modelo": "neural" if bot.usar_neural else "patrones"
+        })
+    
+    except Exception as e:
+        return jsonify({
+            "error": str(e),
+            "status": "error"
+        }), 500
+
+@app.route('/chat/estadisticas', methods=['GET'])
+def chat_estadisticas():
+    """Estadísticas de micro-lotes, del cache de predicciones y de las respuestas del menú"""
     return jsonify({
-        "menu": bot.menu,
-        "total": len(bot.menu),
+        "microlotes_activo": bot.agrupador is not None,
+        "microlotes": bot.agrupador.estadisticas() if bot.agrupador else None,
+        "cache_predicciones": bot.clasificador.cache_predicciones.estadisticas() if bot.clasificador else None,
+        "patrones_exactos": bot.clasificador.estadisticas_patrones_exactos() if bot.clasificador else None,
+        "respuestas_menu": respuestas_menu.estadisticas(),
         "status": "success"
     })
 
+@app.route('/menu', methods=['GET'])
+def obtener_menu():
+    """Obtiene el menú completo"""
+    return responder_precalculado('menu', datos_menu)
+
+def _leer_booleano(valor, nombre):
+    valor = valor.strip().lower()
+    if valor in ('1', 'true', 'si', 'sí'):
+        return True
+    if valor in ('0', 'false', 'no'):
+        return False
+    raise ValueError(f"{nombre} debe ser true o false")
+
+def _leer_precio(valor, nombre):
+    try:
+        return float(valor)
+    except ValueError:
+        raise ValueError(f"{nombre} debe ser un número")
+
+@app.route('/menu/consulta', methods=['GET'])
+def consultar_menu():
+    """Platillos filtrados por facetas, ordenados y paginados con cursor"""
+    try:
+        parametros = request.args
+        filtros = {}
+        if 'categoria' in parametros:
+            filtros['categoria'] = parametros['categoria']
+        for faceta in ('disponible', 'oferta', 'mas_vendido', 'popular'):
+            if faceta in parametros:
+                filtros[faceta] = _leer_booleano(parametros[faceta], faceta)
+        if 'precio_min' in parametros or 'precio_max' in parametros:
+            filtros['precio'] = (
+                _leer_precio(parametros['precio_min'], 'precio_min') if 'precio_min' in parametros else None,
+                _leer_precio(parametros['precio_max'], 'precio_max') if 'precio_max' in parametros else None
+            )
+        
+        resultado = bot.catalogo.consultar(
+            filtros,
+            orden=parametros.get('orden', 'menu'),
+            limite=int(parametros.get('limite', 20)),
+            cursor=parametros.get('cursor')
+        )
+        
+        return jsonify({
+            **resultado,
+            "status": "success"
+        })
+    
+    except ValueError as e:
+        return jsonify({
+            "error": str(e),
+            "status": "error"
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "error": str(e),
+            "status": "error"
+        }), 500
+
 @app.route('/menu/disponibles', methods=['GET'])
 def obtener_disponibles():
     """Obtiene solo los platillos disponibles"""
-    disponibles = [p for p in bot.menu if p['disponible']]
+    return responder_precalculado('disponibles', datos_disponibles)
+
+@app.route('/menu/recargas', methods=['GET'])
+def recargas_menu():
+    """Estado de la recarga en caliente de menu.json en este worker"""
     return jsonify({
-        "platillos": disponibles,
-        "total": len(disponibles),
+        "version_menu": bot.catalogo.version,
+        "total_platillos": len(bot.catalogo),
+        "recarga": bot.vigilante_menu.estadisticas(),
         "status": "success"
     })
 
+@app.route('/menu/actualizar', methods=['POST'])
+def actualizar_menu():
+    """
+    Cambios en lote al menú (uso administrativo), todos o ninguno:
+    {"cambios": [{"id": 3, "disponible": 0}, {"id": 5, "precio": 95, "oferta": 1, "descuento": 10}]}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        cambios = data.get('cambios')
+        anterior = bot.catalogo.version
+        
+        catalogo = bot.actualizar_menu(cambios)
+        
+        return jsonify({
+            "version_anterior": anterior,
+            "version_menu": catalogo.version,
+            "platillos": [catalogo.obtener(i) for i in dict.fromkeys(cambio['id'] for cambio in cambios)],
+            "status": "success"
+        })
+    
+    except ValueError as e:
+        return jsonify({
+            "error": str(e),
+            "status": "error"
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "error": str(e),
+            "status": "error"
+        }), 500
+
 @app.route('/platillo/<int:platillo_id>', methods=['GET'])
 def obtener_platillo(platillo_id):
     """Obtiene información de un platillo específico"""
-    platillo = next((p for p in bot.menu if p['id'] == platillo_id), None)
+    platillo = bot.catalogo.obtener(platillo_id)
     
     if platillo:
         return jsonify({
@@ -256,20 +609,11 @@ def buscar_platillo_endpoint():
 @app.route('/estadisticas', methods=['GET'])
 def estadisticas():
     """Obtiene estadísticas del menú"""
-    total = len(bot.menu)
-    disponibles = len([p for p in bot.menu if p['disponible']])
-    mas_vendidos = [p for p in bot.menu if p.get('mas_vendido')]
-    populares = [p for p in bot.menu if p.get('popular')]
-    
-    return jsonify({
-        "total_platillos": total,
-        "disponibles": disponibles,
-        "no_disponibles": total - disponibles,
-        "mas_vendidos": mas_vendidos,
-        "populares": populares,
-        "modelo_neural_activo": bot.usar_neural,
-        "status": "success"
-    })
+    usar_neural = bot.usar_neural
+    return responder_precalculado(
+        ('estadisticas', usar_neural),
+        lambda catalogo: datos_estadisticas(catalogo, usar_neural)
+    )
 
 @app.route('/health')
 def health():
@@ -281,27 +625,90 @@ def health():
 
 @app.route('/reentrenar', methods=['POST'])
 def reentrenar():
-    """Endpoint para reentrenar el modelo (uso administrativo)"""
+    """Inicia el reentrenamiento del modelo en segundo plano (uso administrativo)"""
     try:
-        from modelo_intenciones import ClasificadorIntenciones
+        data = request.get_json(silent=True) or {}
+        epochs = data.get('epochs', 1000)
         
-        clasificador = ClasificadorIntenciones(archivo_datos='datos_entrenamiento.json')
-        clasificador.entrenar(epochs=200, verbose=0)
-        clasificador.guardar_modelo('modelo_chatbot')
+        if not isinstance(epochs, int) or isinstance(epochs, bool) or epochs < 1:
+            return jsonify({
+                "error": "epochs debe ser un entero positivo",
+                "status": "error"
+            }), 400
         
-        # Recargar el modelo en el bot
-        bot.cargar_modelo_neural()
+        trabajo = reentrenamiento.iniciar_reentrenamiento(
+            configuracion.RUTA_MODELO,
+            archivo_datos='datos_entrenamiento.json',
+            epochs=epochs
+        )
         
         return jsonify({
-            "mensaje": "Modelo reentrenado exitosamente",
+            "mensaje": "Reentrenamiento iniciado",
+            "trabajo": trabajo,
+            "estado_url": f"/reentrenar/estado/{trabajo['id']}",
             "status": "success"
-        })
+        }), 202
+    except reentrenamiento.ReentrenamientoEnCurso as e:
+        return jsonify({
+            "error": str(e),
+            "status": "error"
+        }), 409
     except Exception as e:
         return jsonify({
             "error": str(e),
             "status": "error"
         }), 500
 
+@app.route('/reentrenar/estado', methods=['GET'])
+@app.route('/reentrenar/estado/<trabajo_id>', methods=['GET'])
+def estado_reentrenamiento(trabajo_id=None):
+    """Progreso de un reentrenamiento (el más reciente si no se indica)"""
+    if trabajo_id:
+        trabajo = reentrenamiento.leer_estado(configuracion.RUTA_MODELO, trabajo_id)
+    else:
+        trabajo = reentrenamiento.ultimo_trabajo(configuracion.RUTA_MODELO)
+    
+    if not trabajo:
+        return jsonify({
+            "error": "Trabajo de reentrenamiento no encontrado",
+            "status": "error"
+        }), 404
+    
+    return jsonify({
+        "trabajo": trabajo,
+        "status": "success"
+    })
+
+@app.route('/modelo/version', methods=['GET'])
+def version_modelo():
+    """Versión del modelo activa, la que usa este worker y las disponibles"""
+    puntero = versiones_modelo.leer_puntero(configuracion.RUTA_MODELO)
+    return jsonify({
+        "version_activa": puntero['version'],
+        "version_cargada": bot.version_modelo,
+        "historial": puntero.get('historial', []),
+        "disponibles": versiones_modelo.listar_versiones(configuracion.RUTA_MODELO),
+        "status": "success"
+    })
+
+@app.route('/modelo/revertir', methods=['POST'])
+def revertir_modelo():
+    """Vuelve a la versión anterior del modelo (uso administrativo)"""
+    try:
+        version = versiones_modelo.revertir(configuracion.RUTA_MODELO)
+        bot.verificar_version_modelo()
+        
+        return jsonify({
+            "mensaje": f"Modelo revertido a la versión {version}",
+            "version": version,
+            "status": "success"
+        })
+    except ValueError as e:
+        return jsonify({
+            "error": str(e),
+            "status": "error"
+        }), 400
+
 
 # ===== ENDPOINTS DE PEDIDOS =====
 
@@ -314,13 +721,13 @@ def crear_pedido():
         
         if not usuario_id:
             usuario_id = gestor_pedidos.crear_pedido()
+            pedido = gestor_pedidos.obtener_pedido(usuario_id)
         else:
-            if usuario_id not in gestor_pedidos.pedidos:
-                gestor_pedidos.crear_pedido(usuario_id)
+            pedido = gestor_pedidos.asegurar_pedido(usuario_id)
         
         return jsonify({
             "usuario_id": usuario_id,
-            "pedido": gestor_pedidos.obtener_pedido(usuario_id),
+            "pedido": pedido,
             "status": "success"
         })
     
@@ -347,7 +754,7 @@ def agregar_item_pedido():
             }), 400
         
         # Buscar el platillo en el menú
-        platillo = next((p for p in bot.menu if p['id'] == platillo_id), None)
+        platillo = bot.catalogo.obtener(platillo_id)
         
         if not platillo:
             return jsonify({
@@ -540,6 +947,51 @@ def agregar_datos_cliente():
         }), 500
 
 
+@app.route('/pedido/operaciones', methods=['POST'])
+def operaciones_pedido():
+    """
+    Varias operaciones sobre un carrito en una sola llamada, todas o ninguna:
+    {"usuario_id": "...", "operaciones": [{"operacion": "agregar", "platillo_id": 3, "cantidad": 2},
+                                          {"operacion": "quitar", "platillo_id": 5}, ...]}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        usuario_id = data.get('usuario_id')
+        
+        if not usuario_id:
+            return jsonify({
+                "error": "usuario_id es requerido",
+                "status": "error"
+            }), 400
+        
+        operaciones = leer_operaciones(data.get('operaciones'), bot.catalogo)
+        pedido, resumen = gestor_pedidos.aplicar_operaciones(usuario_id, operaciones)
+        
+        return jsonify({
+            "operaciones_aplicadas": len(operaciones),
+            "pedido": pedido,
+            "resumen": resumen,
+            "status": "success"
+        })
+    
+    except OperacionesInvalidas as e:
+        return jsonify({
+            "error": str(e),
+            "errores": e.errores,
+            "status": "error"
+        }), 400
+    except ValueError as e:
+        return jsonify({
+            "error": str(e),
+            "status": "error"
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "error": str(e),
+            "status": "error"
+        }), 500
+
+
 @app.route('/pedido/finalizar', methods=['POST'])
 def finalizar_pedido_endpoint():
     """Finaliza el pedido y genera el link de WhatsApp"""
@@ -576,6 +1028,15 @@ def finalizar_pedido_endpoint():
             "status": "error"
         }), 500
 
+@app.route('/pedido/estadisticas', methods=['GET'])
+def estadisticas_pedidos():
+    """Carritos abiertos y finalizados, memoria estimada, expirados y desalojados en este worker"""
+    return jsonify({
+        "almacen": gestor_pedidos.almacen.estadisticas(),
+        "barrido": gestor_pedidos.barrendero.estadisticas(),
+        "status": "success"
+    })
+
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 10000))
@@ -0,0 +1,189 @@
+"""
+Almacén de pedidos: memoria vs. SQLite (WAL)
+Ejecutar desde la raíz del repo: python -m benchmarks.almacen_pedidos
+
+1. Corre el mismo recorrido de un carrito (crear, agregar, cambiar
+   cantidades, quitar, datos del cliente, finalizar) contra cada almacén y
+   verifica que los pedidos resultantes sean iguales.
+2. Con SQLite, varios procesos agregan platillos al mismo carrito a la vez:
+   ningún incremento debe perderse (lo que con memoria es imposible entre
+   workers: cada uno tiene su propio diccionario).
+3. Mide el tiempo por operación de cada almacén con varios hilos.
+4. Mide el barrido de carritos expirados con el heap de vencimientos
+   contra recorrer todos los carritos, con muchos carritos abiertos.
+"""
+
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+import configuracion
+from almacen_pedidos import LOTE_BARRIDO, AlmacenMemoria, AlmacenSQLite
+from sistema_pedidos import GestorPedidos
+
+PROCESOS = 4
+AGREGADOS_POR_PROCESO = 200
+HILOS = 8
+OPERACIONES_POR_HILO = 500
+CARRITOS = 100000
+TTL_BARRIDO = 5.0
+
+
+def cargar_menu():
+    with open('menu.json', 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class Estados(list):
+    """Copia cada estado al registrarlo: con memoria el pedido se sigue modificando"""
+
+    def append(self, estado):
+        super().append(json.loads(json.dumps(estado, ensure_ascii=False)))
+
+
+def recorrido(gestor, menu):
+    """Operaciones de un carrito; regresa los estados intermedios a comparar"""
+    estados = Estados()
+    usuario = gestor.crear_pedido('cliente-1')
+    estados.append(gestor.obtener_pedido(usuario))
+    for platillo in menu[:5]:
+        estados.append(gestor.agregar_item(usuario, platillo, 2))
+    estados.append(gestor.agregar_item(usuario, menu[0], 3))
+    estados.append(gestor.actualizar_cantidad(usuario, menu[1]['id'], 7))
+    estados.append(gestor.actualizar_cantidad(usuario, menu[2]['id'], 0))
+    estados.append(gestor.quitar_item(usuario, menu[3]['id']))
+    estados.append(gestor.resumen_pedido(usuario))
+    estados.append(gestor.finalizar_pedido(usuario))
+    estados.append(gestor.agregar_datos_cliente(usuario, 'Ana', '6640000000', 'Calle 1', notas='sin cebolla'))
+    resultado = gestor.finalizar_pedido(usuario)
+    estados.append((resultado['codigo'], resultado['pedido']['estado'], resultado['pedido']['total']))
+    estados.append(gestor.obtener_pedido(usuario)['estado'])
+    # Un pedido creado al agregar, sin crear_pedido antes
+    estados.append(gestor.agregar_item('cliente-2', menu[4], 1))
+    estados.append(gestor.vaciar_pedido('cliente-2'))
+    estados.append(gestor.vaciar_pedido('no-existe'))
+    estados.append(gestor.existe_pedido('cliente-2'))
+    estados.append(gestor.existe_pedido('no-existe'))
+    return list(estados)
+
+
+def sin_fechas(estado):
+    if isinstance(estado, dict):
+        return {k: sin_fechas(v) for k, v in estado.items() if not k.startswith('fecha_')}
+    if isinstance(estado, list):
+        return [sin_fechas(v) for v in estado]
+    return estado
+
+
+def agregar_desde_proceso(ruta, platillo):
+    gestor = GestorPedidos(AlmacenSQLite(ruta))
+    for _ in range(AGREGADOS_POR_PROCESO):
+        gestor.agregar_item('compartido', platillo, 1)
+
+
+def medir(gestor, menu):
+    def trabajar(hilo):
+        for i in range(OPERACIONES_POR_HILO):
+            usuario = f"u{hilo}-{i % 20}"
+            gestor.agregar_item(usuario, menu[i % len(menu)], 1)
+            gestor.obtener_pedido(usuario)
+
+    hilos = [threading.Thread(target=trabajar, args=(h,)) for h in range(HILOS)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    total = HILOS * OPERACIONES_POR_HILO * 2
+    return (time.perf_counter() - inicio) / total * 1e6
+
+
+def recorrer_todos(almacen):
+    """Lo que costaría expirar sin heap: revisar cada carrito"""
+    ahora = time.monotonic()
+    return [u for u, uso in almacen._ultimo_uso.items() if uso + almacen.ttl_segundos <= ahora]
+
+
+def medir_barrido(menu):
+    almacen = AlmacenMemoria(ttl_segundos=TTL_BARRIDO)
+    gestor = GestorPedidos(almacen)
+    for i in range(CARRITOS):
+        gestor.agregar_item(f"c{i}", menu[i % len(menu)], 1)
+
+    def ms(funcion):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        return (time.perf_counter() - inicio) * 1000, resultado
+
+    print(f"{'Situación':<40} {'Heap (ms)':>10} {'Recorrer (ms)':>14}")
+    heap, _ = ms(almacen.barrer)
+    recorrer, _ = ms(lambda: recorrer_todos(almacen))
+    print(f"{'Nada vencido':<40} {heap:>10.3f} {recorrer:>14.3f}")
+
+    # Vence el TTL: el 1% quedó abandonado y el resto se siguió usando
+    time.sleep(TTL_BARRIDO)
+    for i in range(CARRITOS):
+        if i % 100:
+            gestor.obtener_pedido(f"c{i}")
+    recorrer, vencidos = ms(lambda: recorrer_todos(almacen))
+    heap, expirados = ms(almacen.barrer)
+    print(f"{'Vence el TTL (1% abandonados)':<40} {heap:>10.3f} {recorrer:>14.3f}")
+    siguiente, _ = ms(almacen.barrer)
+    print(f"{'Barrido siguiente':<40} {siguiente:>10.3f} {recorrer:>14.3f}")
+    print(f"Expirados: {expirados} (recorriendo: {len(vencidos)}) | quedan: {len(almacen)} | "
+          f"el candado se toma por lotes de {LOTE_BARRIDO} vencimientos")
+    assert expirados == len(vencidos), f"Difieren los expirados: {expirados} vs {len(vencidos)}"
+    print("✅ Mismos expirados")
+
+    # El heap solo trabaja cuando vence un carrito (una vez por TTL); recorrer, en cada barrido
+    barridos = configuracion.PEDIDOS_TTL_SEGUNDOS / configuracion.PEDIDOS_BARRIDO_SEGUNDOS
+    print(f"Por cada TTL de {configuracion.PEDIDOS_TTL_SEGUNDOS:g} s con barrido cada "
+          f"{configuracion.PEDIDOS_BARRIDO_SEGUNDOS:g} s: heap ≈ {heap + siguiente * barridos:.0f} ms, "
+          f"recorrer ≈ {recorrer * barridos:.0f} ms")
+
+
+def main():
+    menu = cargar_menu()
+    with tempfile.TemporaryDirectory() as directorio:
+        almacenes = {
+            'memoria': lambda nombre: AlmacenMemoria(),
+            'sqlite': lambda nombre: AlmacenSQLite(os.path.join(directorio, f"{nombre}.db")),
+        }
+
+        print("=== Mismo recorrido en cada almacén ===")
+        resultados = {nombre: sin_fechas(recorrido(GestorPedidos(crear('recorrido')), menu))
+                      for nombre, crear in almacenes.items()}
+        print(f"Pasos comparados: {len(resultados['memoria'])}")
+        assert resultados['memoria'] == resultados['sqlite'], "Los almacenes difieren"
+        print("✅ Mismos pedidos en memoria y en SQLite")
+
+        print("\n=== Varios procesos sobre el mismo carrito (SQLite) ===")
+        ruta = os.path.join(directorio, 'compartido.db')
+        GestorPedidos(AlmacenSQLite(ruta)).crear_pedido('compartido')
+        contexto = multiprocessing.get_context('fork')
+        procesos = [contexto.Process(target=agregar_desde_proceso, args=(ruta, menu[0]))
+                    for _ in range(PROCESOS)]
+        for proceso in procesos:
+            proceso.start()
+        for proceso in procesos:
+            proceso.join()
+        pedido = GestorPedidos(AlmacenSQLite(ruta)).obtener_pedido('compartido')
+        esperado = PROCESOS * AGREGADOS_POR_PROCESO
+        cantidad = pedido['items'][0]['cantidad']
+        print(f"Cantidad: {cantidad} de {esperado} | total: ${pedido['total']}")
+        assert cantidad == esperado, f"Se perdieron incrementos: {cantidad} de {esperado}"
+        print("✅ Ningún incremento perdido")
+
+        print(f"\n=== µs por operación ({HILOS} hilos, agregar + obtener) ===")
+        for nombre, crear in almacenes.items():
+            print(f"{nombre:>8}: {medir(GestorPedidos(crear('medicion')), menu):8.1f}")
+
+    print(f"\n=== Barrido de carritos expirados ({CARRITOS} abiertos, memoria) ===")
+    medir_barrido(menu)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+Búsqueda de platillos: índice de trigramas vs. recorrido completo del menú
+Ejecutar desde la raíz del repo: python -m benchmarks.busqueda_menu
+
+1. Con el menu.json actual, verifica que el índice dé las mismas coincidencias
+   (top 3 con similitud > 0.6) que el recorrido con SequenceMatcher, para
+   nombres, errores de dedo, patrones de entrenamiento y frases de
+   validación. Para la respuesta directa (similitud > 0.8) el recorrido
+   anterior tomaba el primer platillo del menú que pasara el umbral y el
+   índice toma el más parecido: se reportan los casos donde eso cambia.
+2. Mide el tiempo por búsqueda con menús sintéticos de miles de platillos.
+"""
+
+import json
+import random
+import time
+from difflib import SequenceMatcher
+
+import normalizacion
+from busqueda_menu import IndiceTrigramas
+
+
+def buscar_recorriendo(menu, texto, umbral=0.6, limite=3):
+    """buscar_platillo antes del índice: SequenceMatcher contra todo el menú"""
+    consulta = normalizacion.normalizar(texto)
+    coincidencias = []
+    for platillo in menu:
+        similitud = SequenceMatcher(None, consulta, normalizacion.normalizar(platillo['nombre'])).ratio()
+        if similitud > umbral:
+            coincidencias.append((platillo, similitud))
+    coincidencias.sort(key=lambda x: x[1], reverse=True)
+    return coincidencias[:limite]
+
+
+def platillo_exacto_recorriendo(menu, texto):
+    """El segundo recorrido de responder(): primer platillo con similitud > 0.8"""
+    consulta = normalizacion.normalizar(texto)
+    for platillo in menu:
+        if SequenceMatcher(None, consulta, normalizacion.normalizar(platillo['nombre'])).ratio() > 0.8:
+            return platillo
+    return None
+
+
+def con_errores(texto, generador):
+    letras = list(texto)
+    for _ in range(generador.randint(1, 2)):
+        if not letras:
+            break
+        i = generador.randrange(len(letras))
+        operacion = generador.choice(('borrar', 'cambiar', 'duplicar'))
+        if operacion == 'borrar':
+            del letras[i]
+        elif operacion == 'cambiar':
+            letras[i] = generador.choice('abcdefghijklmnopqrstuvwxyz')
+        else:
+            letras.insert(i, letras[i])
+    return ''.join(letras)
+
+
+def consultas_de_prueba(menu, generador):
+    consultas = []
+    for platillo in menu:
+        nombre = platillo['nombre']
+        consultas += [nombre, nombre.upper(), f"¿tienen {nombre}?", nombre.split()[0]]
+        consultas += [con_errores(nombre, generador) for _ in range(5)]
+    with open('datos_entrenamiento.json', 'r', encoding='utf-8') as f:
+        consultas += [p for i in json.load(f)['intenciones'] for p in i['patrones']]
+    with open('benchmarks/frases_validacion.json', 'r', encoding='utf-8') as f:
+        consultas += [frase['texto'] for frase in json.load(f)['frases']]
+    return consultas
+
+
+def verificar_calidad(menu, generador):
+    indice = IndiceTrigramas(menu)
+    consultas = consultas_de_prueba(menu, generador)
+    diferencias_top = 0
+    corregidos = 0
+    diferencias_exacto = 0
+
+    for consulta in consultas:
+        esperado = [(p['id'], round(s, 9)) for p, s in buscar_recorriendo(menu, consulta)]
+        obtenido = [(p['id'], round(s, 9)) for p, s in indice.buscar(consulta, 0.6, 3)]
+        if esperado != obtenido:
+            diferencias_top += 1
+            print(f"  top 3 distinto para {consulta!r}: {esperado} vs {obtenido}")
+
+        exacto = platillo_exacto_recorriendo(menu, consulta)
+        mejores = indice.buscar(consulta, 0.6, 1)
+        exacto_indice = mejores[0][0] if mejores and mejores[0][1] > 0.8 else None
+        if exacto is not exacto_indice:
+            similitud = {p['id']: s for p, s in buscar_recorriendo(menu, consulta, limite=None)}
+            if exacto is not None and exacto_indice is not None and \
+                    similitud[exacto_indice['id']] > similitud[exacto['id']]:
+                corregidos += 1
+                print(f"  {consulta!r}: antes {exacto['nombre']!r}, ahora {exacto_indice['nombre']!r} (más parecido)")
+            else:
+                diferencias_exacto += 1
+                print(f"  platillo > 0.8 distinto para {consulta!r}")
+
+    print(f"Consultas: {len(consultas)} | top 3 distintos: {diferencias_top} | "
+          f"respuesta directa distinta: {diferencias_exacto} | corregida al más parecido: {corregidos}")
+    return diferencias_top == 0 and diferencias_exacto == 0
+
+
+def menu_sintetico(tamano, generador):
+    bases = ['Huevos', 'Tacos', 'Enchiladas', 'Chilaquiles', 'Tortas', 'Sopes', 'Tamales',
+             'Quesadillas', 'Flautas', 'Enmoladas', 'Pozole', 'Tostadas', 'Gorditas', 'Burritos']
+    rellenos = ['de Pollo', 'de Res', 'de Cerdo', 'de Queso', 'de Frijol', 'de Papa', 'de Chorizo',
+                'de Camarón', 'de Nopal', 'de Hongos', 'de Rajas', 'al Pastor', 'de Barbacoa']
+    estilos = ['Rojos', 'Verdes', 'Suizos', 'Divorciados', 'con Mole', 'Rancheros', 'Norteños',
+               'Poblanos', 'Oaxaqueños', 'de la Casa', 'Especiales', 'Gratinados', 'Dorados']
+    return [
+        {'id': i + 1, 'nombre': f"{generador.choice(bases)} {generador.choice(rellenos)} "
+                                f"{generador.choice(estilos)} {i}"}
+        for i in range(tamano)
+    ]
+
+
+def medir(funcion, consultas, repeticiones=1):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for consulta in consultas:
+            funcion(consulta)
+    return (time.perf_counter() - inicio) / (repeticiones * len(consultas)) * 1000
+
+
+def main():
+    generador = random.Random(0)
+    with open('menu.json', 'r', encoding='utf-8') as f:
+        menu = json.load(f)
+
+    print("=== Calidad con menu.json ===")
+    iguales = verificar_calidad(menu, generador)
+    print("✅ Mismos resultados que el recorrido completo" if iguales else "⚠️ Hay diferencias")
+
+    print("\n=== Escalamiento (ms por búsqueda) ===")
+    print(f"{'Platillos':>10} {'Recorrido':>12} {'Índice':>10} {'Construir índice':>18}")
+    for tamano in (len(menu), 1000, 5000, 10000):
+        catalogo = menu if tamano == len(menu) else menu_sintetico(tamano, generador)
+        consultas = [con_errores(p['nombre'], generador) for p in generador.sample(catalogo, 15)]
+        consultas += ['hola buenos dias', 'quiero unas enchiladas verdes', 'cuanto cuesta']
+
+        inicio = time.perf_counter()
+        indice = IndiceTrigramas(catalogo)
+        construccion = (time.perf_counter() - inicio) * 1000
+
+        repeticiones = 20 if tamano < 1000 else 1
+        recorrido = medir(lambda c: buscar_recorriendo(catalogo, c), consultas, repeticiones)
+        con_indice = medir(lambda c: indice.buscar(c, 0.6, 3), consultas, repeticiones * 5)
+        print(f"{tamano:>10} {recorrido:>12.3f} {con_indice:>10.3f} {construccion:>16.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Paridad y costo de arranque: motor NumPy vs. motor PyTorch
+Ejecutar desde la raíz del repo: python -m benchmarks.comparar_motores
+
+1. Verifica que ambos motores den la misma intención (y confianza dentro de
+   una tolerancia) para todos los patrones de entrenamiento.
+2. Mide, en un intérprete nuevo por motor, el tiempo de importar + cargar el
+   modelo y la memoria residente (RSS) del proceso al terminar.
+"""
+
+import json
+import subprocess
+import sys
+
+RUTA_MODELO = 'modelo_chatbot'
+TOLERANCIA = 1e-5
+
+CODIGO_ARRANQUE = """
+import json, time
+inicio = time.perf_counter()
+if {motor!r} == 'numpy':
+    from motor_numpy import ClasificadorIntencionesNumpy as Clasificador
+else:
+    from modelo_intenciones import ClasificadorIntenciones as Clasificador
+clasificador = Clasificador()
+clasificador.cargar_modelo({ruta!r})
+clasificador.predecir_intencion('hola')
+segundos = time.perf_counter() - inicio
+with open('/proc/self/status') as f:
+    rss_kb = next(int(l.split()[1]) for l in f if l.startswith('VmRSS:'))
+print(json.dumps({{'segundos': segundos, 'rss_mb': rss_kb / 1024}}))
+"""
+
+
+def verificar_paridad():
+    from modelo_intenciones import ClasificadorIntenciones
+    from motor_numpy import ClasificadorIntencionesNumpy
+
+    torch_clf = ClasificadorIntenciones()
+    torch_clf.cargar_modelo(RUTA_MODELO)
+    numpy_clf = ClasificadorIntencionesNumpy()
+    numpy_clf.cargar_modelo(RUTA_MODELO)
+
+    with open('datos_entrenamiento.json', 'r', encoding='utf-8') as f:
+        datos = json.load(f)
+    textos = [p for intent in datos['intenciones'] for p in intent['patrones']]
+    textos += ['', 'xyz palabras desconocidas', 'hola quiero ver el menu y los precios']
+
+    esperados = torch_clf.predecir_intencion_lote(textos)
+    obtenidos = numpy_clf.predecir_intencion_lote(textos)
+
+    diferencia_maxima = 0.0
+    for texto, (int_t, conf_t), (int_n, conf_n) in zip(textos, esperados, obtenidos):
+        assert int_t == int_n, f"Intención distinta para {texto!r}: {int_t} vs {int_n}"
+        diferencia_maxima = max(diferencia_maxima, abs(conf_t - conf_n))
+
+    assert diferencia_maxima < TOLERANCIA, f"Confianzas difieren en {diferencia_maxima}"
+    print(f"✅ Paridad: {len(textos)} textos, diferencia máxima de confianza {diferencia_maxima:.2e}")
+
+
+def medir_arranque(motor):
+    salida = subprocess.run(
+        [sys.executable, '-c', CODIGO_ARRANQUE.format(motor=motor, ruta=RUTA_MODELO)],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    verificar_paridad()
+    print()
+    print(f"{'Motor':<8} {'Arranque (s)':>14} {'RSS (MB)':>14}")
+    for motor in ('torch', 'numpy'):
+        resultado = medir_arranque(motor)
+        print(f"{motor:<8} {resultado['segundos']:>14.3f} {resultado['rss_mb']:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
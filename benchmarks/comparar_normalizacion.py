@@ -0,0 +1,100 @@
+"""
+Normalizador único vs. las dos implementaciones anteriores de limpiar_texto
+Ejecutar desde la raíz del repo: python -m benchmarks.comparar_normalizacion
+
+1. Verifica que normalizacion.limpiar_texto dé exactamente lo mismo que el
+   antiguo ProcesadorTexto.limpiar_texto (patrones reales y texto aleatorio)
+   y que el vocabulario construido desde datos_entrenamiento.json no cambie.
+2. Mide el costo por llamada de ambas versiones anteriores y del normalizador
+   nuevo, con y sin la memoización del tokenizador.
+"""
+
+import json
+import random
+import re
+import timeit
+
+import normalizacion
+
+
+def limpiar_clasificador_anterior(texto):
+    """ProcesadorTexto.limpiar_texto antes del normalizador único"""
+    texto = texto.lower()
+    reemplazos = {
+        'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u',
+        'ü': 'u', 'ñ': 'n'
+    }
+    for acento, sin_acento in reemplazos.items():
+        texto = texto.replace(acento, sin_acento)
+    texto = re.sub(r'[^a-z0-9\s]', '', texto)
+    return texto.strip()
+
+
+def limpiar_menu_anterior(texto):
+    """ChatbotRestaurante.limpiar_texto antes del normalizador único"""
+    texto = texto.lower()
+    texto = re.sub(r'[¿?¡!.,;]', '', texto)
+    return texto.strip()
+
+
+def textos_entrenamiento():
+    with open('datos_entrenamiento.json', 'r', encoding='utf-8') as f:
+        datos = json.load(f)
+    return [p for intent in datos['intenciones'] for p in intent['patrones']]
+
+
+def texto_aleatorio(generador):
+    alfabeto = 'abcñáéíóúüÁÉÑÜ¿?¡!.,;:-_ \t\n  ç€😀0123456789AZİ'
+    return ''.join(generador.choice(alfabeto) for _ in range(generador.randint(0, 40)))
+
+
+def verificar_equivalencia():
+    patrones = textos_entrenamiento()
+    generador = random.Random(0)
+    aleatorios = [texto_aleatorio(generador) for _ in range(20000)]
+    todos_caracteres = [chr(c) for c in range(0x3000)]
+
+    for texto in patrones + aleatorios + todos_caracteres:
+        esperado = limpiar_clasificador_anterior(texto)
+        obtenido = normalizacion.limpiar_texto(texto)
+        assert esperado == obtenido, f"Diferencia para {texto!r}: {esperado!r} vs {obtenido!r}"
+        assert tuple(esperado.split()) == normalizacion.tokenizar(texto)
+
+    vocabulario_anterior = sorted({t for p in patrones for t in limpiar_clasificador_anterior(p).split()})
+    vocabulario_nuevo = sorted({t for p in patrones for t in normalizacion.tokenizar(p)})
+    assert vocabulario_anterior == vocabulario_nuevo, "El vocabulario entrenado cambió"
+
+    # El vocabulario del modelo guardado debe seguir siendo alcanzable
+    from motor_numpy import cargar_artefacto
+    palabras_modelo = cargar_artefacto('modelo_chatbot')['vocabulario'].tolist()
+    for palabra in palabras_modelo:
+        assert normalizacion.tokenizar(palabra) == (palabra,), f"{palabra!r} ya no se normaliza a sí misma"
+
+    print(f"✅ Equivalencia: {len(patrones) + len(aleatorios) + len(todos_caracteres)} textos idénticos")
+    print(f"✅ Vocabulario sin cambios: {len(vocabulario_nuevo)} palabras "
+          f"(y las {len(palabras_modelo)} del modelo guardado se normalizan a sí mismas)")
+
+
+def medir(nombre, funcion, textos, repeticiones=20):
+    total = timeit.timeit(lambda: [funcion(t) for t in textos], number=repeticiones)
+    print(f"{nombre:<42} {total / (repeticiones * len(textos)) * 1e6:>8.2f} µs/llamada")
+
+
+def main():
+    verificar_equivalencia()
+
+    textos = textos_entrenamiento() + [
+        '¿Cuánto cuestan los Huevos Rancheros?',
+        '¡Hola! quiero 2 enchiladas y un café de olla, por favor.',
+    ]
+
+    print()
+    medir('Anterior: ChatbotRestaurante.limpiar_texto', limpiar_menu_anterior, textos)
+    medir('Anterior: ProcesadorTexto.limpiar_texto', limpiar_clasificador_anterior, textos)
+    medir('Nuevo: limpiar_texto (translate)', normalizacion.limpiar_texto, textos)
+    normalizacion.tokenizar.cache_clear()
+    medir('Nuevo: tokenizar (memorizado, en caliente)', normalizacion.tokenizar, textos)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Carritos modificados desde muchos hilos a la vez
+Ejecutar desde la raíz del repo: python -m benchmarks.concurrencia_pedidos
+
+1. Prueba de estrés: varios hilos agregan, cambian y quitan platillos en
+   un carrito compartido por todos y en carritos propios. Al final cada
+   carrito debe cumplir subtotal = precio × cantidad y total = suma de
+   subtotales, y las cantidades agregadas no deben perderse. Se corre con
+   candados por franja, con un candado global y sin candados (como antes),
+   con un intervalo de cambio de hilo muy corto para provocar choques.
+   También crea (asegurar_pedido) y agrega a la vez en los mismos carritos.
+2. Rendimiento: operaciones por segundo con candados por franja contra un
+   solo candado global, con modificaciones instantáneas y con una espera
+   dentro de la modificación (lo que pasa cuando el hilo suelta el GIL, p. ej.
+   al leer de SQLite).
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+
+from almacen_pedidos import AlmacenMemoria
+from sistema_pedidos import GestorPedidos
+
+HILOS = 16
+OPERACIONES_POR_HILO = 2000
+CARRITOS_PROPIOS = 4
+ESPERA_EN_MODIFICACION = 0.0005
+
+
+class AlmacenSinCandados(AlmacenMemoria):
+    """Lee, modifica y escribe sin candados, como el diccionario original"""
+
+    def modificar(self, usuario_id, cambiar):
+        pedido = cambiar(self._leer(usuario_id))
+        if pedido is not None:
+            self._escribir(pedido)
+        return pedido
+
+
+class AlmacenLento(AlmacenMemoria):
+    """Simula una modificación que suelta el GIL mientras espera"""
+
+    def modificar(self, usuario_id, cambiar):
+        def cambiar_esperando(pedido):
+            time.sleep(ESPERA_EN_MODIFICACION)
+            return cambiar(pedido)
+        return super().modificar(usuario_id, cambiar_esperando)
+
+
+def cargar_menu():
+    with open('menu.json', 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def estresar(gestor, menu):
+    """
+    Regresa (carritos inconsistentes u operaciones que fallaron, unidades
+    agregadas que se perdieron)
+    """
+    agregadas = [0] * HILOS
+    errores = [0] * HILOS
+    barrera = threading.Barrier(HILOS)
+
+    def trabajar(hilo):
+        generador = random.Random(hilo)
+        barrera.wait()
+        for i in range(OPERACIONES_POR_HILO):
+            usuario = generador.choice(['compartido', f"h{hilo}-{i % CARRITOS_PROPIOS}"])
+            platillo = generador.choice(menu[1:])
+            operacion = generador.random()
+            try:
+                # El platillo 0 solo se agrega en el carrito compartido: su cantidad se puede verificar
+                gestor.agregar_item('compartido', menu[0], 1)
+                agregadas[hilo] += 1
+
+                if operacion < 0.6:
+                    gestor.agregar_item(usuario, platillo, generador.randint(1, 3))
+                elif operacion < 0.85:
+                    gestor.actualizar_cantidad(usuario, platillo['id'], generador.randint(0, 5))
+                else:
+                    gestor.quitar_item(usuario, platillo['id'])
+            except RuntimeError:
+                # Sin candados, otro hilo puede cambiar el carrito mientras se copia
+                errores[hilo] += 1
+
+    hilos = [threading.Thread(target=trabajar, args=(h,)) for h in range(HILOS)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    problemas = sum(errores)
+    for pedido in gestor.almacen.pedidos.values():
+        items = pedido.a_dict()['items']
+        for item in items:
+            if item['subtotal'] != item['precio'] * item['cantidad']:
+                problemas += 1
+        if pedido.total != sum(item['subtotal'] for item in items):
+            problemas += 1
+        if len({item['id'] for item in items}) != len(items):
+            problemas += 1
+
+    compartido = gestor.obtener_pedido('compartido')
+    cantidad = next(item['cantidad'] for item in compartido['items'] if item['id'] == menu[0]['id'])
+    return problemas, sum(agregadas) - cantidad
+
+
+def crear_mientras_agregan(gestor, menu):
+    """
+    Como /pedido/crear y /pedido/agregar a la vez para el mismo usuario: la
+    mitad de los hilos asegura el pedido, la otra mitad agrega. Regresa las
+    unidades agregadas que se perdieron (un pedido vacío encima del carrito).
+    """
+    barrera = threading.Barrier(HILOS)
+
+    def trabajar(hilo):
+        barrera.wait()
+        for i in range(OPERACIONES_POR_HILO):
+            usuario = f"c{i}"
+            if hilo % 2:
+                gestor.agregar_item(usuario, menu[0], 1)
+            else:
+                gestor.asegurar_pedido(usuario)
+
+    hilos = [threading.Thread(target=trabajar, args=(h,)) for h in range(HILOS)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    agregadas = HILOS // 2
+    return sum(agregadas - sum(item['cantidad'] for item in gestor.obtener_pedido(f"c{i}")['items'])
+               for i in range(OPERACIONES_POR_HILO))
+
+
+def rendimiento(gestor, menu, usuarios, operaciones):
+    def trabajar(hilo):
+        generador = random.Random(hilo)
+        for _ in range(operaciones):
+            gestor.agregar_item(generador.choice(usuarios), generador.choice(menu), 1)
+
+    hilos = [threading.Thread(target=trabajar, args=(h,)) for h in range(HILOS)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return HILOS * operaciones / (time.perf_counter() - inicio)
+
+
+def main():
+    menu = cargar_menu()
+
+    print(f"=== Estrés: {HILOS} hilos × {OPERACIONES_POR_HILO} operaciones ===")
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        # Sin candados se espera que falle: es la referencia de lo que los candados evitan
+        for nombre, almacen, con_candados in (('franjas (64)', AlmacenMemoria(franjas=64), True),
+                                              ('candado global', AlmacenMemoria(franjas=1), True),
+                                              ('sin candados', AlmacenSinCandados(), False)):
+            problemas, perdidas = estresar(GestorPedidos(almacen), menu)
+            estado = "✅" if not problemas and not perdidas else "⚠️"
+            print(f"{estado} {nombre:<15} inconsistencias: {problemas:4} | unidades perdidas: {perdidas}")
+            if con_candados:
+                assert not problemas and not perdidas, f"{nombre}: carritos inconsistentes o unidades perdidas"
+        perdidas = crear_mientras_agregan(GestorPedidos(AlmacenMemoria()), menu)
+        assert not perdidas, f"Crear y agregar a la vez perdió {perdidas} unidades"
+        print(f"✅ crear y agregar a la vez (asegurar_pedido) | unidades perdidas: {perdidas}")
+    finally:
+        sys.setswitchinterval(intervalo)
+
+    print(f"\n=== Rendimiento: operaciones por segundo, {HILOS} hilos ===")
+    print(f"{'Modificación':<28} {'Usuarios':>9} {'Global':>10} {'Franjas':>10}")
+    for etiqueta, clase, operaciones in (('instantánea', AlmacenMemoria, 5000),
+                                         (f"con espera de {ESPERA_EN_MODIFICACION * 1000:g} ms",
+                                          AlmacenLento, 100)):
+        for usuarios in (1, 1000):
+            ids = [f"u{i}" for i in range(usuarios)]
+            glob = rendimiento(GestorPedidos(clase(franjas=1)), menu, ids, operaciones)
+            franjas = rendimiento(GestorPedidos(clase(franjas=64)), menu, ids, operaciones)
+            print(f"{etiqueta:<28} {usuarios:>9} {glob:>10.0f} {franjas:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Consulta facetada del menú: índices contra fuerza bruta
+Ejecutar desde la raíz del repo: python -m benchmarks.consulta_menu
+
+1. Compara CONSULTAS consultas al azar (filtros, orden y tamaño de página)
+   contra un filtro de fuerza bruta que recorre el menú: todas las páginas
+   siguiendo el cursor, el total y los conteos por faceta (incluidos el
+   precio mínimo y máximo), con menu.json y con un menú sintético.
+2. Mide ms por consulta con un menú de 20,000 platillos, separando lo que
+   cuestan los conteos por faceta.
+"""
+
+import json
+import random
+import time
+
+import normalizacion
+from catalogo_menu import CatalogoMenu
+from consulta_menu import FACETAS_BOOLEANAS, ORDENES
+from benchmarks.menu_sqlite import menu_completo
+
+CONSULTAS = 600
+PLATILLOS_SINTETICOS = 2000
+PLATILLOS_MEDICION = 20000
+REPETICIONES = 200
+
+
+def filtros_al_azar(generador, platillos):
+    filtros = {}
+    if generador.random() < 0.4:
+        filtros['categoria'] = generador.choice([p['categoria'] for p in platillos] + ['NO EXISTE'])
+    for faceta in FACETAS_BOOLEANAS:
+        if generador.random() < 0.25:
+            filtros[faceta] = generador.random() < 0.5
+    if generador.random() < 0.4:
+        precios = sorted(generador.choice(platillos)['precio'] for _ in range(2))
+        filtros['precio'] = (generador.choice([precios[0], None]), generador.choice([precios[1], None]))
+    return filtros
+
+
+def cumple(platillo, filtros, excepto=None):
+    for faceta, valor in filtros.items():
+        if faceta == excepto:
+            continue
+        if faceta == 'precio':
+            minimo, maximo = valor
+            if minimo is not None and platillo['precio'] < minimo:
+                return False
+            if maximo is not None and platillo['precio'] > maximo:
+                return False
+        elif faceta == 'categoria':
+            if platillo.get('categoria') != valor:
+                return False
+        elif bool(platillo.get(faceta)) != valor:
+            return False
+    return True
+
+
+def fuerza_bruta(platillos, filtros, orden):
+    """(platillos en orden, facetas) recorriendo todo el menú"""
+    claves = {
+        'menu': lambda i: i,
+        'precio': lambda i: (platillos[i]['precio'], i),
+        '-precio': lambda i: (-platillos[i]['precio'], i),
+        'nombre': lambda i: (normalizacion.normalizar(platillos[i]['nombre']), i),
+    }
+    posiciones = [i for i, p in enumerate(platillos) if cumple(p, filtros)]
+    ordenados = [platillos[i] for i in sorted(posiciones, key=claves[orden])]
+
+    facetas = {'categoria': {}}
+    for platillo in platillos:
+        facetas['categoria'].setdefault(platillo.get('categoria'), 0)
+        if cumple(platillo, filtros, excepto='categoria'):
+            facetas['categoria'][platillo.get('categoria')] += 1
+    for faceta in FACETAS_BOOLEANAS:
+        facetas[faceta] = {'true': 0, 'false': 0}
+        for platillo in platillos:
+            if cumple(platillo, filtros, excepto=faceta):
+                facetas[faceta][str(bool(platillo.get(faceta))).lower()] += 1
+    precios = [p['precio'] for p in platillos if cumple(p, filtros, excepto='precio')]
+    facetas['precio'] = {'minimo': min(precios) if precios else None,
+                         'maximo': max(precios) if precios else None}
+    return ordenados, facetas
+
+
+def todas_las_paginas(catalogo, filtros, orden, limite):
+    platillos, cursor = [], None
+    while True:
+        resultado = catalogo.consultar(filtros, orden=orden, limite=limite, cursor=cursor)
+        platillos.extend(resultado['platillos'])
+        cursor = resultado['siguiente_cursor']
+        if cursor is None:
+            return platillos, resultado
+
+
+def comparar(platillos, generador, consultas):
+    catalogo = CatalogoMenu(platillos)
+    diferencias = 0
+    for _ in range(consultas):
+        filtros = filtros_al_azar(generador, platillos)
+        orden = generador.choice(ORDENES)
+        limite = generador.choice([1, 7, 20, 100])
+        obtenidos, ultima = todas_las_paginas(catalogo, filtros, orden, limite)
+        esperados, facetas = fuerza_bruta(platillos, filtros, orden)
+        if obtenidos != esperados or ultima['total'] != len(esperados) or ultima['facetas'] != facetas:
+            diferencias += 1
+    return diferencias
+
+
+def ms(funcion):
+    inicio = time.perf_counter()
+    for _ in range(REPETICIONES):
+        funcion()
+    return (time.perf_counter() - inicio) / REPETICIONES * 1000
+
+
+def main():
+    generador = random.Random(16)
+
+    print(f"=== {CONSULTAS} consultas contra fuerza bruta ===")
+    with open('menu.json', 'r', encoding='utf-8') as f:
+        menu = json.load(f)
+    for nombre, platillos in (('menu.json', menu),
+                              (f"sintético ({PLATILLOS_SINTETICOS})", menu_completo(PLATILLOS_SINTETICOS, generador))):
+        diferencias = comparar(platillos, generador, CONSULTAS // 2)
+        estado = "✅" if not diferencias else "⚠️"
+        print(f"{estado} {nombre:<20} consultas distintas: {diferencias}")
+
+    print(f"\n=== ms por consulta ({PLATILLOS_MEDICION} platillos, promedio de {REPETICIONES}) ===")
+    catalogo = CatalogoMenu(menu_completo(PLATILLOS_MEDICION, generador))
+    indice = catalogo.indice_facetas
+    casos = (
+        ('sin filtros', {}),
+        ('disponible', {'disponible': True}),
+        ('categoría + precio', {'categoria': 'COMIDAS', 'precio': (100, 250)}),
+        ('oferta + popular', {'oferta': True, 'popular': True}),
+    )
+    print(f"{'Filtros':<22} {'Consulta':>9} {'Conteos':>9}")
+    for nombre, filtros in casos:
+        resultado = indice._filtrar(filtros)
+        consulta = ms(lambda: catalogo.consultar(filtros, orden='precio'))
+        conteos = ms(lambda: indice._conteos(filtros, resultado))
+        print(f"{nombre:<22} {consulta:>9.3f} {conteos:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Evaluación de la cuantización dinámica int8 frente al modelo fp32
+Ejecutar desde la raíz del repo: python -m benchmarks.evaluar_cuantizacion [ruta_modelo]
+
+Reporta, por intención, el acuerdo entre el modelo int8 y el fp32 en todos
+los patrones de entrenamiento y en frases de validación no vistas, además de
+la latencia en CPU con un mensaje y con lotes. Con esos datos se decide si
+activar CHATBOT_CUANTIZACION=int8 en un despliegue.
+"""
+
+import json
+import sys
+import time
+from collections import defaultdict
+
+import torch
+
+from modelo_intenciones import ClasificadorIntenciones
+
+ARCHIVO_VALIDACION = 'benchmarks/frases_validacion.json'
+REPETICIONES = 300
+TAMANO_LOTE = 32
+
+
+def cargar(ruta, cuantizacion, vectorizacion_dispersa):
+    # Sin cache: se mide la red, no el LRU
+    clasificador = ClasificadorIntenciones(
+        vectorizacion_dispersa=vectorizacion_dispersa,
+        tamano_cache=0,
+        cuantizacion=cuantizacion
+    )
+    clasificador.cargar_modelo(ruta)
+    # Sin camino rápido: se quiere comparar la red en todos los patrones
+    clasificador.patrones_exactos = {}
+    return clasificador
+
+
+def textos_entrenamiento(archivo_datos):
+    with open(archivo_datos, 'r', encoding='utf-8') as f:
+        datos = json.load(f)
+    return [(intent['tag'], patron) for intent in datos['intenciones'] for patron in intent['patrones']]
+
+
+def textos_validacion():
+    with open(ARCHIVO_VALIDACION, 'r', encoding='utf-8') as f:
+        datos = json.load(f)
+    return [(frase['tag'], frase['texto']) for frase in datos['frases']]
+
+
+def reporte_acuerdo(nombre, ejemplos, fp32, int8):
+    textos = [texto for _, texto in ejemplos]
+    pred_fp32 = fp32.predecir_intencion_lote(textos, umbral_confianza=0)
+    pred_int8 = int8.predecir_intencion_lote(textos, umbral_confianza=0)
+
+    por_intencion = defaultdict(lambda: [0, 0])
+    aciertos_fp32 = aciertos_int8 = 0
+    diferencia_maxima = 0.0
+    for (tag, _), (int_f, conf_f), (int_q, conf_q) in zip(ejemplos, pred_fp32, pred_int8):
+        por_intencion[tag][0] += int_f == int_q
+        por_intencion[tag][1] += 1
+        aciertos_fp32 += int_f == tag
+        aciertos_int8 += int_q == tag
+        diferencia_maxima = max(diferencia_maxima, abs(conf_f - conf_q))
+
+    total = len(ejemplos)
+    acuerdo = sum(a for a, _ in por_intencion.values())
+    print(f"\n=== {nombre}: {total} textos ===")
+    print(f"Acuerdo int8 vs fp32: {acuerdo}/{total} ({acuerdo / total:.1%})")
+    print(f"Precisión fp32: {aciertos_fp32 / total:.1%} | int8: {aciertos_int8 / total:.1%}")
+    print(f"Diferencia máxima de confianza: {diferencia_maxima:.4f}")
+    print(f"{'Intención':<28} {'Acuerdo':>10}")
+    for tag, (a, n) in sorted(por_intencion.items()):
+        marca = '' if a == n else '  ⚠️'
+        print(f"{tag:<28} {a:>4}/{n:<5}{marca}")
+
+
+def medir_latencia(clasificador, textos):
+    # Un mensaje a la vez
+    inicio = time.perf_counter()
+    for i in range(REPETICIONES):
+        clasificador.predecir_intencion(textos[i % len(textos)])
+    individual = (time.perf_counter() - inicio) / REPETICIONES
+
+    # Lotes
+    lotes = [textos[i:i + TAMANO_LOTE] for i in range(0, len(textos), TAMANO_LOTE)]
+    inicio = time.perf_counter()
+    procesados = 0
+    for i in range(max(1, REPETICIONES // len(lotes))):
+        for lote in lotes:
+            clasificador.predecir_intencion_lote(lote)
+            procesados += len(lote)
+    por_mensaje_lote = (time.perf_counter() - inicio) / procesados
+
+    return individual * 1e6, por_mensaje_lote * 1e6
+
+
+def main():
+    ruta = sys.argv[1] if len(sys.argv) > 1 else 'modelo_chatbot'
+    torch.set_num_threads(1)
+
+    entrenamiento = textos_entrenamiento('datos_entrenamiento.json')
+    validacion = textos_validacion()
+    todos = [texto for _, texto in entrenamiento + validacion]
+
+    fp32 = cargar(ruta, 'ninguna', True)
+    int8 = cargar(ruta, 'int8', True)
+    reporte_acuerdo("Patrones de entrenamiento", entrenamiento, fp32, int8)
+    reporte_acuerdo("Frases de validación", validacion, fp32, int8)
+
+    print("\n=== Latencia CPU (1 hilo, µs por mensaje) ===")
+    print(f"{'Variante':<22} {'Individual':>12} {f'Lote de {TAMANO_LOTE}':>12}")
+    for dispersa in (True, False):
+        for cuantizacion in ('ninguna', 'int8'):
+            clasificador = cargar(ruta, cuantizacion, dispersa)
+            individual, lote = medir_latencia(clasificador, todos)
+            nombre = f"{'fp32' if cuantizacion == 'ninguna' else 'int8'} {'dispersa' if dispersa else 'densa'}"
+            print(f"{nombre:<22} {individual:>12.1f} {lote:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Extracción de menciones de platillos: autómata vs. buscar cada nombre
+Ejecutar desde la raíz del repo: python -m benchmarks.extraccion_menciones
+
+1. Con el menu.json actual, compara las menciones del autómata contra una
+   búsqueda ingenua (probar cada patrón en cada posición del mensaje) para
+   mensajes aleatorios que combinan platillos, cantidades y relleno.
+2. Mide el tiempo por mensaje al crecer el menú (el autómata no debería
+   cambiar) y al crecer el mensaje (debería crecer de forma lineal).
+"""
+
+import json
+import random
+import time
+
+import normalizacion
+from menciones_menu import AutomataPlatillos, raiz, cantidad_antes, cantidad_despues
+from benchmarks.busqueda_menu import menu_sintetico
+
+RELLENO = ['quiero', 'por favor', 'y', 'tambien', 'me das', 'para llevar', 'con', 'hola', 'gracias']
+CANTIDADES = ['', '', 'un', 'una', 'dos', '3', '2x', 'cinco']
+
+
+def buscar_ingenuo(automata_patrones, texto):
+    """Mención más larga en cada posición probando todos los patrones"""
+    tokens = normalizacion.tokenizar(texto)
+    claves = [raiz(t) for t in tokens]
+    menciones = []
+    posicion = 0
+    while posicion < len(claves):
+        mejor = None
+        for clave, platillo in automata_patrones:
+            if tuple(claves[posicion:posicion + len(clave)]) == clave and \
+                    (mejor is None or len(clave) > len(mejor[0])):
+                mejor = (clave, platillo)
+        if mejor is None:
+            posicion += 1
+            continue
+        fin = posicion + len(mejor[0])
+        cantidad = cantidad_antes(tokens[posicion - 1]) if posicion > 0 else None
+        if cantidad is None and fin < len(tokens):
+            cantidad = cantidad_despues(tokens[fin])
+        menciones.append((mejor[1]['id'], cantidad if cantidad is not None else 1))
+        posicion = fin
+    return menciones
+
+
+def patrones_de(automata):
+    """Reconstruye (clave, platillo) recorriendo el trie del autómata"""
+    patrones = []
+    pila = [(0, ())]
+    while pila:
+        estado, clave = pila.pop()
+        if automata.salida[estado]:
+            patrones.append((clave, automata.platillos[automata.salida[estado][1]]))
+        for palabra, siguiente in automata.transiciones[estado].items():
+            pila.append((siguiente, clave + (palabra,)))
+    return patrones
+
+
+def mensaje_aleatorio(menu, generador, platillos=3):
+    partes = []
+    for _ in range(platillos):
+        partes.append(generador.choice(RELLENO))
+        partes.append(generador.choice(CANTIDADES))
+        partes.append(generador.choice(menu)['nombre'])
+        if generador.random() < 0.2:
+            partes.append('x2')
+    return ' '.join(p for p in partes if p)
+
+
+def medir(funcion, mensajes, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for mensaje in mensajes:
+            funcion(mensaje)
+    return (time.perf_counter() - inicio) / (repeticiones * len(mensajes)) * 1e6
+
+
+def main():
+    generador = random.Random(0)
+    with open('menu.json', 'r', encoding='utf-8') as f:
+        menu = json.load(f)
+
+    print("=== Calidad con menu.json ===")
+    automata = AutomataPlatillos(menu)
+    patrones = patrones_de(automata)
+    mensajes = [mensaje_aleatorio(menu, generador, generador.randint(1, 4)) for _ in range(2000)]
+    diferencias = 0
+    for mensaje in mensajes:
+        esperado = buscar_ingenuo(patrones, mensaje)
+        obtenido = [(m['platillo']['id'], m['cantidad']) for m in automata.buscar(mensaje)]
+        if esperado != obtenido:
+            diferencias += 1
+            print(f"  {mensaje!r}: {esperado} vs {obtenido}")
+    print(f"Mensajes: {len(mensajes)} | patrones: {automata.num_patrones} | diferencias: {diferencias}")
+    print("✅ Mismas menciones que la búsqueda ingenua" if diferencias == 0 else "⚠️ Hay diferencias")
+
+    print("\n=== Tamaño del menú (µs por mensaje de 3 platillos) ===")
+    print(f"{'Platillos':>10} {'Ingenuo':>12} {'Autómata':>10} {'Construir':>12}")
+    for tamano in (len(menu), 1000, 10000):
+        catalogo = menu if tamano == len(menu) else menu_sintetico(tamano, generador)
+        mensajes = [mensaje_aleatorio(catalogo, generador) for _ in range(50)]
+
+        inicio = time.perf_counter()
+        automata = AutomataPlatillos(catalogo)
+        construccion = (time.perf_counter() - inicio) * 1000
+        patrones = patrones_de(automata)
+
+        ingenuo = medir(lambda m: buscar_ingenuo(patrones, m), mensajes[:5], 1)
+        con_automata = medir(automata.buscar, mensajes, 20)
+        print(f"{tamano:>10} {ingenuo:>12.1f} {con_automata:>10.1f} {construccion:>10.1f} ms")
+
+    print("\n=== Largo del mensaje, menú de 10000 platillos (µs por mensaje) ===")
+    print(f"{'Platillos en el mensaje':>24} {'Palabras':>9} {'Autómata':>10} {'µs/palabra':>11}")
+    for cantidad in (1, 4, 16, 64):
+        mensajes = [mensaje_aleatorio(catalogo, generador, cantidad) for _ in range(20)]
+        palabras = sum(len(normalizacion.tokenizar(m)) for m in mensajes) / len(mensajes)
+        tiempo = medir(automata.buscar, mensajes, 10)
+        print(f"{cantidad:>24} {palabras:>9.0f} {tiempo:>10.1f} {tiempo / palabras:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
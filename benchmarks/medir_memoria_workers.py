@@ -0,0 +1,101 @@
+"""
+Memoria única por worker de gunicorn, con y sin precarga
+Ejecutar desde la raíz del repo: python -m benchmarks.medir_memoria_workers [workers]
+
+Levanta gunicorn dos veces (CHATBOT_PRECARGA=0 y =1), hace algunas peticiones
+a /chat para que cada worker trabaje y lee /proc/<pid>/smaps_rollup de cada
+worker. USS (Private_Clean + Private_Dirty) es la memoria que el worker no
+comparte con nadie; PSS reparte la compartida entre quienes la usan.
+Solo funciona en Linux.
+"""
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+MENSAJES = ['hola', 'menu', 'cuanto cuesta', 'a que hora abren', 'huevos rancheros']
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def leer_smaps(pid):
+    valores = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for linea in f:
+            partes = linea.split()
+            if len(partes) >= 2 and partes[0].endswith(':') and partes[1].isdigit():
+                valores[partes[0][:-1]] = int(partes[1])
+    return {
+        'rss_mb': valores.get('Rss', 0) / 1024,
+        'pss_mb': valores.get('Pss', 0) / 1024,
+        'uss_mb': (valores.get('Private_Clean', 0) + valores.get('Private_Dirty', 0)) / 1024
+    }
+
+
+def hijos(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(p) for p in f.read().split()]
+
+
+def esperar_servidor(url, limite=120):
+    fin = time.time() + limite
+    while time.time() < fin:
+        try:
+            urllib.request.urlopen(url + '/health', timeout=2)
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError("gunicorn no respondió a tiempo")
+
+
+def medir(precarga, workers):
+    puerto = puerto_libre()
+    url = f'http://127.0.0.1:{puerto}'
+    entorno = dict(os.environ, CHATBOT_PRECARGA='1' if precarga else '0', PORT=str(puerto))
+    proceso = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+         '--workers', str(workers), '--bind', f'127.0.0.1:{puerto}', 'app:app'],
+        env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        esperar_servidor(url)
+        # Que los workers carguen lo perezoso y atiendan tráfico real
+        for _ in range(workers * 10):
+            for mensaje in MENSAJES:
+                peticion = urllib.request.Request(
+                    url + '/chat', data=json.dumps({'mensaje': mensaje}).encode(),
+                    headers={'Content-Type': 'application/json'}
+                )
+                urllib.request.urlopen(peticion, timeout=10).read()
+        time.sleep(1)
+        return [leer_smaps(pid) for pid in hijos(proceso.pid)]
+    finally:
+        proceso.send_signal(signal.SIGTERM)
+        proceso.wait(timeout=30)
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    print(f"Workers: {workers}\n")
+    print(f"{'Modo':<12} {'USS/worker (MB)':>16} {'PSS/worker (MB)':>16} {'RSS/worker (MB)':>16} {'USS total (MB)':>15}")
+    for precarga in (False, True):
+        datos = medir(precarga, workers)
+        n = len(datos)
+        uss = sum(d['uss_mb'] for d in datos)
+        pss = sum(d['pss_mb'] for d in datos)
+        rss = sum(d['rss_mb'] for d in datos)
+        nombre = 'precarga' if precarga else 'sin precarga'
+        print(f"{nombre:<12} {uss / n:>16.1f} {pss / n:>16.1f} {rss / n:>16.1f} {uss:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
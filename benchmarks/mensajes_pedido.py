@@ -0,0 +1,130 @@
+"""
+Mensaje de WhatsApp y resumen de pedidos: concatenación con += contra
+plantillas compiladas (mensajes_pedido.py)
+Ejecutar desde la raíz del repo: python -m benchmarks.mensajes_pedido
+
+1. Verifica que ambas formas den exactamente el mismo texto, resumen y link.
+2. Mide µs por mensaje en carritos de cientos de renglones: el texto, el
+   resumen y lo que hace finalizar_pedido (texto + link). Antes, finalizar
+   armaba el texto dos veces: una para el link y otra para `mensaje`.
+   CPython ya extiende en su lugar un texto local con +=, así que armar solo
+   el texto cuesta más o menos lo mismo; la ganancia está en el link, que
+   ya no codifica todo el mensaje carácter por carácter.
+"""
+
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+from mensajes_pedido import MensajesPedido
+from pedido import Pedido
+
+RENGLONES = (10, 100, 300, 1000)
+REPETICIONES = 200
+NUMERO = "5216645631675"
+AHORA = datetime(2026, 1, 15, 13, 45)
+
+
+def pedido_de_prueba(renglones):
+    pedido = Pedido('usuario', AHORA.isoformat())
+    for i in range(renglones):
+        pedido.agregar({'id': i + 1, 'nombre': f"Platillo número {i + 1}", 'precio': 50 + i % 120}, 1 + i % 4)
+    pedido.datos_cliente = {
+        'nombre': 'Ana López', 'telefono': '6640000000', 'direccion': 'Calle 1 #23, Centro',
+        'tipo_entrega': 'domicilio', 'notas': 'Sin cebolla, por favor'
+    }
+    return pedido
+
+
+# Forma anterior (la de sistema_pedidos.py antes de mensajes_pedido.py)
+
+def texto_concatenado(pedido, ahora):
+    mensaje = "🍽️ *NUEVO PEDIDO - FONDA DOÑA MAGUI*\n"
+    mensaje += "=" * 40 + "\n\n"
+
+    cliente = pedido.datos_cliente
+    if cliente:
+        mensaje += f"👤 *Cliente:* {cliente.get('nombre', 'Sin nombre')}\n"
+        mensaje += f"📱 *Teléfono:* {cliente.get('telefono', 'Sin teléfono')}\n"
+        if cliente.get('tipo_entrega') == 'domicilio':
+            mensaje += f"🏠 *Dirección:* {cliente.get('direccion', 'Sin dirección')}\n"
+            mensaje += "🚚 *Tipo:* Entrega a domicilio\n"
+        else:
+            mensaje += "🏪 *Tipo:* Recoger en local\n"
+        if cliente.get('notas'):
+            mensaje += f"📝 *Notas:* {cliente.get('notas')}\n"
+        mensaje += "\n"
+
+    mensaje += "📋 *PEDIDO:*\n"
+    mensaje += "-" * 40 + "\n"
+    for i, item in enumerate(pedido.items.values(), 1):
+        mensaje += f"{i}. *{item.nombre}*\n"
+        mensaje += f"   Cantidad: {item.cantidad}\n"
+        mensaje += f"   Precio unitario: ${item.precio}\n"
+        mensaje += f"   Subtotal: ${item.subtotal}\n\n"
+
+    mensaje += "=" * 40 + "\n"
+    mensaje += f"💰 *TOTAL: ${pedido.total} MXN*\n"
+    mensaje += "=" * 40 + "\n\n"
+    mensaje += f"⏰ Hora del pedido: {ahora.strftime('%d/%m/%Y %H:%M')}\n"
+    mensaje += "\n¡Gracias por tu preferencia! 😊🌮"
+    return mensaje
+
+
+def resumen_concatenado(pedido):
+    resumen = "🛒 *TU PEDIDO ACTUAL:*\n\n"
+    for item in pedido.items.values():
+        resumen += f"• {item.cantidad}x {item.nombre} - ${item.subtotal}\n"
+    resumen += f"\n💰 *Total: ${pedido.total} MXN*"
+    return resumen
+
+
+def finalizar_concatenado(pedido):
+    link = f"https://wa.me/{NUMERO}?text={quote(texto_concatenado(pedido, AHORA))}"
+    return texto_concatenado(pedido, AHORA), link
+
+
+def finalizar_compilado(mensajes, pedido):
+    return mensajes.texto_y_link(pedido, NUMERO, AHORA)
+
+
+def us(funcion):
+    inicio = time.perf_counter()
+    for _ in range(REPETICIONES):
+        funcion()
+    return (time.perf_counter() - inicio) / REPETICIONES * 1e6
+
+
+def main():
+    mensajes = MensajesPedido()
+
+    print("=== Mismo texto ===")
+    iguales = True
+    for renglones in RENGLONES:
+        pedido = pedido_de_prueba(renglones)
+        iguales &= mensajes.texto(pedido, AHORA) == texto_concatenado(pedido, AHORA)
+        iguales &= mensajes.resumen(pedido) == resumen_concatenado(pedido)
+        iguales &= finalizar_compilado(mensajes, pedido) == finalizar_concatenado(pedido)
+    pedido = pedido_de_prueba(3)
+    pedido.datos_cliente = {'nombre': 'Ana', 'telefono': '664', 'tipo_entrega': 'recoger'}
+    iguales &= mensajes.texto(pedido, AHORA) == texto_concatenado(pedido, AHORA)
+    print("✅ Texto, resumen y link idénticos" if iguales else "⚠️ Los mensajes difieren")
+
+    print(f"\n=== µs por mensaje (promedio de {REPETICIONES}) ===")
+    print(f"{'Renglones':>9} {'Mensaje':<22} {'+= (antes)':>11} {'Compilado':>10} {'Mejora':>7}")
+    for renglones in RENGLONES:
+        pedido = pedido_de_prueba(renglones)
+        casos = (
+            ('texto', lambda: texto_concatenado(pedido, AHORA), lambda: mensajes.texto(pedido, AHORA)),
+            ('resumen', lambda: resumen_concatenado(pedido), lambda: mensajes.resumen(pedido)),
+            ('finalizar (texto+link)', lambda: finalizar_concatenado(pedido),
+             lambda: finalizar_compilado(mensajes, pedido)),
+        )
+        for nombre, antes, ahora in casos:
+            tiempo_antes, tiempo_ahora = us(antes), us(ahora)
+            print(f"{renglones:>9} {nombre:<22} {tiempo_antes:>11.1f} {tiempo_ahora:>10.1f} "
+                  f"{tiempo_antes / tiempo_ahora:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
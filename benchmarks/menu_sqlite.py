@@ -0,0 +1,134 @@
+"""
+Catálogo del menú: JSON en memoria vs. SQLite con carga perezosa
+Ejecutar desde la raíz del repo: python -m benchmarks.menu_sqlite
+
+Con un menú sintético de 10,000 platillos (descripción, fotos y
+disponibilidad por sucursal) mide, para cada origen:
+- tiempo de carga y memoria que queda ocupada por el catálogo;
+- búsqueda por id con accesos concentrados en pocos platillos (lo habitual)
+  y con accesos uniformes (peor caso para el cache LRU de SQLite);
+- búsqueda difusa por nombre y consulta facetada.
+También verifica que ambos orígenes den los mismos resultados.
+"""
+
+import gc
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from catalogo_menu import CatalogoMenu
+from menu_sqlite import CatalogoMenuSQLite, importar_json
+from benchmarks.busqueda_menu import con_errores, menu_sintetico
+
+SUCURSALES = ['Centro', 'Otay', 'Playas', 'La Mesa', 'Zona Río', 'Rosarito']
+
+
+def menu_completo(tamano, generador):
+    platillos = menu_sintetico(tamano, generador)
+    for platillo in platillos:
+        platillo.update({
+            'categoria': generador.choice(['DESAYUNOS', 'ANTOJITOS', 'COMIDAS', 'BEBIDAS', 'POSTRES']),
+            'descripcion': ' '.join(generador.choice(['tortilla', 'salsa', 'frijoles', 'queso', 'crema',
+                                                      'cebolla', 'cilantro', 'arroz', 'aguacate'])
+                                    for _ in range(25)),
+            'foto': f"platillo-{platillo['id']}.jpg",
+            'fotos': [{'url': f"https://cdn.example.com/{platillo['id']}/{i}.jpg", 'ancho': 800, 'alto': 600}
+                      for i in range(3)],
+            'precio': generador.randrange(60, 400, 5),
+            'disponible': int(generador.random() < 0.8),
+            'oferta': int(generador.random() < 0.1),
+            'descuento': generador.choice([10, 15, 20, 30]),
+            'popular': generador.random() < 0.05,
+            'sucursales': {s: generador.random() < 0.7 for s in SUCURSALES},
+        })
+    return platillos
+
+
+def cargar_midiendo(funcion):
+    """Carga dos veces: una para el tiempo y otra, con tracemalloc, para la memoria"""
+    gc.collect()
+    inicio = time.perf_counter()
+    funcion()
+    duracion = (time.perf_counter() - inicio) * 1000
+
+    gc.collect()
+    tracemalloc.start()
+    catalogo = funcion()
+    gc.collect()
+    memoria = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+    return catalogo, duracion, memoria
+
+
+def medir(funcion, argumentos):
+    inicio = time.perf_counter()
+    for argumento in argumentos:
+        funcion(argumento)
+    return (time.perf_counter() - inicio) / len(argumentos) * 1e6
+
+
+def main():
+    generador = random.Random(0)
+    platillos = menu_completo(10000, generador)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_json = os.path.join(directorio, 'menu.json')
+        ruta_db = os.path.join(directorio, 'menu.db')
+        with open(ruta_json, 'w', encoding='utf-8') as f:
+            json.dump(platillos, f, ensure_ascii=False)
+
+        inicio = time.perf_counter()
+        importar_json(ruta_json, ruta_db)
+        print(f"Importación: {(time.perf_counter() - inicio) * 1000:.0f} ms | "
+              f"menu.json {os.path.getsize(ruta_json) / 1e6:.1f} MB, menu.db {os.path.getsize(ruta_db) / 1e6:.1f} MB")
+
+        json_cat, carga_json, memoria_json = cargar_midiendo(lambda: CatalogoMenu.desde_archivo(ruta_json))
+        sqlite_cat, carga_sqlite, memoria_sqlite = cargar_midiendo(
+            lambda: CatalogoMenuSQLite.desde_archivo(ruta_db, tamano_cache=1024))
+
+        ids = [p['id'] for p in platillos]
+        # 90% de los accesos a 500 platillos: los más pedidos
+        populares = generador.sample(ids, 500)
+        concentrados = [generador.choice(populares) if generador.random() < 0.9 else generador.choice(ids)
+                        for _ in range(20000)]
+        uniformes = [generador.choice(ids) for _ in range(20000)]
+        busquedas = [con_errores(generador.choice(platillos)['nombre'], generador) for _ in range(300)]
+        consultas = [
+            {'categoria': generador.choice(['DESAYUNOS', 'COMIDAS']), 'disponible': True,
+             'precio': (generador.choice([None, 100]), generador.choice([None, 250]))}
+            for _ in range(300)
+        ]
+
+        # Mismos resultados en ambos orígenes
+        iguales = all(json_cat.obtener(i) == sqlite_cat.obtener(i) for i in uniformes[:2000])
+        iguales &= all([p['id'] for p, _ in json_cat.buscar(b, 0.6, 3)] ==
+                       [p['id'] for p, _ in sqlite_cat.buscar(b, 0.6, 3)] for b in busquedas)
+        iguales &= all(json_cat.consultar(f, 'precio', 20) == sqlite_cat.consultar(f, 'precio', 20)
+                       for f in consultas[:50])
+        print("✅ Mismos resultados en JSON y SQLite" if iguales else "⚠️ Los resultados difieren")
+
+        sqlite_cat.cache.limpiar()
+        filas = [
+            ('Carga (ms)', carga_json, carga_sqlite),
+            ('Memoria del catálogo (MB)', memoria_json, memoria_sqlite),
+            ('Por id, accesos concentrados (µs)', medir(json_cat.obtener, concentrados),
+             medir(sqlite_cat.obtener, concentrados)),
+            ('Por id, accesos uniformes (µs)', medir(json_cat.obtener, uniformes),
+             medir(sqlite_cat.obtener, uniformes)),
+            ('Búsqueda difusa top 3 (µs)', medir(lambda b: json_cat.buscar(b, 0.6, 3), busquedas),
+             medir(lambda b: sqlite_cat.buscar(b, 0.6, 3), busquedas)),
+            ('Consulta facetada, 20 por página (µs)', medir(lambda f: json_cat.consultar(f, 'precio', 20), consultas),
+             medir(lambda f: sqlite_cat.consultar(f, 'precio', 20), consultas)),
+        ]
+
+        print(f"\n{'10,000 platillos':<40} {'JSON':>10} {'SQLite':>10}")
+        for nombre, valor_json, valor_sqlite in filas:
+            print(f"{nombre:<40} {valor_json:>10.1f} {valor_sqlite:>10.1f}")
+        print(f"\nCache LRU de SQLite: {sqlite_cat.cache.estadisticas()}")
+
+
+if __name__ == '__main__':
+    main()
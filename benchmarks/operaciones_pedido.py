@@ -0,0 +1,259 @@
+"""
+Lotes de operaciones sobre un carrito (/pedido/operaciones): todo o nada
+Ejecutar desde la raíz del repo: python -m benchmarks.operaciones_pedido
+
+1. Lotes al azar con operaciones válidas e inválidas mezcladas, con el
+   almacén en memoria y en SQLite. Un lote con alguna inválida debe
+   rechazarse entero: `errores` señala exactamente las inválidas y el
+   carrito queda igual (o sin crearse). Un lote válido debe dejar el mismo
+   carrito que aplicar sus operaciones una por una.
+2. Límite de MAXIMO_OPERACIONES por lote: justo en el límite se aplica,
+   uno más se rechaza sin tocar el carrito. Lo mismo con una lista vacía o
+   algo que no es lista.
+3. Con hilos: un lote nunca se ve a medias mientras otros hilos leen y
+   modifican el mismo carrito.
+4. ms por carrito en SQLite: un lote contra las mismas operaciones en
+   llamadas separadas.
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from almacen_pedidos import AlmacenMemoria, AlmacenSQLite
+from catalogo_menu import CatalogoMenu
+from sistema_pedidos import MAXIMO_OPERACIONES, GestorPedidos, OperacionesInvalidas, leer_operaciones
+
+LOTES = 400
+HILOS = 8
+LOTES_POR_HILO = 300
+CARRITOS_MEDICION = 200
+OPERACIONES_MEDICION = 20
+
+# Operaciones que leer_operaciones debe rechazar
+INVALIDAS = (
+    "no es un objeto",
+    {'operacion': 'pagar', 'platillo_id': 1},
+    {'operacion': 'agregar', 'platillo_id': 9999},
+    {'operacion': 'agregar', 'platillo_id': '1'},
+    {'operacion': 'agregar', 'platillo_id': True},
+    {'operacion': 'agregar', 'platillo_id': 1, 'cantidad': 0},
+    {'operacion': 'agregar', 'platillo_id': 1, 'cantidad': 1.5},
+    {'operacion': 'quitar'},
+    {'operacion': 'actualizar_cantidad', 'platillo_id': 1},
+    {'operacion': 'actualizar_cantidad', 'platillo_id': 1, 'cantidad': True},
+    {'operacion': 'datos_cliente', 'nombre': 'Ana'},
+    {'operacion': 'datos_cliente', 'nombre': 'Ana', 'telefono': '664', 'tipo_entrega': 'domicilio'},
+)
+
+
+def cargar_catalogo():
+    with open('menu.json', 'r', encoding='utf-8') as f:
+        return CatalogoMenu(json.load(f))
+
+
+def operacion_valida(generador, disponibles, ids):
+    tipo = generador.random()
+    if tipo < 0.5:
+        return {'operacion': 'agregar', 'platillo_id': generador.choice(disponibles),
+                'cantidad': generador.randint(1, 4)}
+    if tipo < 0.7:
+        return {'operacion': 'actualizar_cantidad', 'platillo_id': generador.choice(ids),
+                'cantidad': generador.randint(-1, 5)}
+    if tipo < 0.9:
+        return {'operacion': 'quitar', 'platillo_id': generador.choice(ids)}
+    return {'operacion': 'datos_cliente', 'nombre': 'Ana', 'telefono': '6640000000',
+            'tipo_entrega': 'recoger', 'notas': str(generador.randint(1, 99))}
+
+
+def lote_al_azar(generador, catalogo, no_disponible):
+    """(lote, índices de las operaciones inválidas)"""
+    disponibles = [p['id'] for p in catalogo.disponibles]
+    ids = [p['id'] for p in catalogo.platillos]
+    lote, invalidas = [], set()
+    for indice in range(generador.randint(1, 12)):
+        azar = generador.random()
+        if azar < 0.05:
+            lote.append({'operacion': 'agregar', 'platillo_id': no_disponible})
+            invalidas.add(indice)
+        elif azar < 0.12:
+            lote.append(generador.choice(INVALIDAS))
+            invalidas.add(indice)
+        else:
+            lote.append(operacion_valida(generador, disponibles, ids))
+    return lote, invalidas
+
+
+def sin_fecha(pedido):
+    return pedido and {k: v for k, v in pedido.items() if k != 'fecha_creacion'}
+
+
+def una_por_una(gestor, usuario_id, lote, catalogo):
+    """Las operaciones del lote con los métodos de siempre del gestor"""
+    # aplicar_operaciones crea el carrito si no existe, aunque el lote solo quite
+    gestor.asegurar_pedido(usuario_id)
+    for operacion in lote:
+        tipo = operacion['operacion']
+        if tipo == 'agregar':
+            gestor.agregar_item(usuario_id, catalogo.obtener(operacion['platillo_id']),
+                                operacion.get('cantidad', 1))
+        elif tipo == 'quitar':
+            gestor.quitar_item(usuario_id, operacion['platillo_id'])
+        elif tipo == 'actualizar_cantidad':
+            gestor.actualizar_cantidad(usuario_id, operacion['platillo_id'], operacion['cantidad'])
+        else:
+            gestor.agregar_datos_cliente(usuario_id, operacion['nombre'], operacion['telefono'],
+                                         operacion.get('direccion', ''), operacion['tipo_entrega'],
+                                         operacion.get('notas', ''))
+
+
+def todo_o_nada(crear_almacen, catalogo, generador):
+    """Regresa (lotes aplicados, lotes rechazados, problemas encontrados)"""
+    gestor, espejo = GestorPedidos(crear_almacen()), GestorPedidos(crear_almacen())
+    no_disponible = next(p['id'] for p in catalogo.platillos if not p['disponible'])
+    usuarios = [f"u{i}" for i in range(10)]
+    aplicados = rechazados = problemas = 0
+
+    for _ in range(LOTES):
+        usuario = generador.choice(usuarios)
+        lote, invalidas = lote_al_azar(generador, catalogo, no_disponible)
+        antes = gestor.obtener_pedido(usuario)
+        try:
+            pedido, _ = gestor.aplicar_operaciones(usuario, leer_operaciones(lote, catalogo))
+        except OperacionesInvalidas as e:
+            rechazados += 1
+            if {error['indice'] for error in e.errores} != invalidas:
+                problemas += 1
+            if gestor.obtener_pedido(usuario) != antes:
+                problemas += 1
+            continue
+
+        aplicados += 1
+        if invalidas:
+            # Se aplicó un lote que debía rechazarse
+            problemas += 1
+            continue
+        una_por_una(espejo, usuario, lote, catalogo)
+        esperado = sin_fecha(espejo.obtener_pedido(usuario))
+        if sin_fecha(pedido) != esperado or sin_fecha(gestor.obtener_pedido(usuario)) != esperado:
+            problemas += 1
+    return aplicados, rechazados, problemas
+
+
+def limites(catalogo):
+    """Regresa los casos del límite de operaciones que no se comportan como deben"""
+    gestor = GestorPedidos(AlmacenMemoria())
+    agregar = {'operacion': 'agregar', 'platillo_id': catalogo.disponibles[0]['id'], 'cantidad': 1}
+    fallas = []
+
+    pedido, _ = gestor.aplicar_operaciones('u', leer_operaciones([agregar] * MAXIMO_OPERACIONES, catalogo))
+    if pedido['items'][0]['cantidad'] != MAXIMO_OPERACIONES:
+        fallas.append(f"{MAXIMO_OPERACIONES} operaciones")
+
+    antes = gestor.obtener_pedido('u')
+    for nombre, lote in ((f"{MAXIMO_OPERACIONES + 1} operaciones", [agregar] * (MAXIMO_OPERACIONES + 1)),
+                         ('lista vacía', []), ('no es lista', agregar), ('sin operaciones', None)):
+        for usuario in ('u', 'nuevo'):
+            try:
+                gestor.aplicar_operaciones(usuario, leer_operaciones(lote, catalogo))
+                fallas.append(f"{nombre} ({usuario})")
+            except OperacionesInvalidas:
+                # Demasiado grande o vacío: se rechaza el lote entero, no operación por operación
+                fallas.append(f"{nombre} ({usuario})")
+            except ValueError:
+                if gestor.obtener_pedido('u') != antes or 'nuevo' in gestor.almacen:
+                    fallas.append(f"{nombre} ({usuario})")
+    return fallas
+
+
+def lotes_con_hilos(catalogo):
+    """
+    Cada lote agrega una unidad de dos platillos; otros hilos leen el carrito
+    y le cambian un tercero. Regresa las veces que se vio un lote a medias.
+    """
+    gestor = GestorPedidos(AlmacenMemoria())
+    primero, segundo, tercero = (p['id'] for p in catalogo.disponibles[:3])
+    lote = leer_operaciones([{'operacion': 'agregar', 'platillo_id': primero},
+                             {'operacion': 'agregar', 'platillo_id': segundo}], catalogo)
+    cambio = leer_operaciones([{'operacion': 'agregar', 'platillo_id': tercero}], catalogo)
+    a_medias = [0] * HILOS
+    barrera = threading.Barrier(HILOS)
+
+    def trabajar(hilo):
+        barrera.wait()
+        for _ in range(LOTES_POR_HILO):
+            if hilo % 2:
+                gestor.aplicar_operaciones('compartido', lote)
+            else:
+                gestor.aplicar_operaciones('compartido', cambio)
+                pedido = gestor.obtener_pedido('compartido')
+                cantidades = {item['id']: item['cantidad'] for item in pedido['items']}
+                if cantidades.get(primero) != cantidades.get(segundo):
+                    a_medias[hilo] += 1
+
+    hilos = [threading.Thread(target=trabajar, args=(h,)) for h in range(HILOS)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return sum(a_medias)
+
+
+def ms_por_carrito(gestor, catalogo, en_lote):
+    disponibles = [p['id'] for p in catalogo.disponibles]
+    lote = [{'operacion': 'agregar', 'platillo_id': disponibles[i % len(disponibles)], 'cantidad': 1}
+            for i in range(OPERACIONES_MEDICION)]
+    inicio = time.perf_counter()
+    for i in range(CARRITOS_MEDICION):
+        if en_lote:
+            gestor.aplicar_operaciones(f"m{i}", leer_operaciones(lote, catalogo))
+        else:
+            una_por_una(gestor, f"m{i}", lote, catalogo)
+    return (time.perf_counter() - inicio) / CARRITOS_MEDICION * 1000
+
+
+def main():
+    catalogo = cargar_catalogo()
+    generador = random.Random(24)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        contador = iter(range(1000))
+        almacenes = (
+            ('memoria', AlmacenMemoria),
+            ('sqlite', lambda: AlmacenSQLite(os.path.join(carpeta, f"pedidos{next(contador)}.db"))),
+        )
+
+        print(f"=== Todo o nada: {LOTES} lotes al azar ===")
+        for nombre, crear in almacenes:
+            aplicados, rechazados, problemas = todo_o_nada(crear, catalogo, generador)
+            estado = "✅" if not problemas else "⚠️"
+            print(f"{estado} {nombre:<8} aplicados: {aplicados:4} | rechazados: {rechazados:4} | "
+                  f"problemas: {problemas}")
+
+        print(f"\n=== Límite de {MAXIMO_OPERACIONES} operaciones ===")
+        fallas = limites(catalogo)
+        print("✅ Límite y lotes vacíos rechazados sin tocar el carrito" if not fallas
+              else f"⚠️ Fallan: {', '.join(fallas)}")
+
+        print(f"\n=== Lotes con {HILOS} hilos en el mismo carrito ===")
+        intervalo = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            a_medias = lotes_con_hilos(catalogo)
+        finally:
+            sys.setswitchinterval(intervalo)
+        print(f"{'✅' if not a_medias else '⚠️'} lotes vistos a medias: {a_medias}")
+
+        print(f"\n=== ms por carrito con {OPERACIONES_MEDICION} operaciones (SQLite) ===")
+        separadas = ms_por_carrito(GestorPedidos(almacenes[1][1]()), catalogo, en_lote=False)
+        en_lote = ms_por_carrito(GestorPedidos(almacenes[1][1]()), catalogo, en_lote=True)
+        print(f"{'Llamadas separadas':<20} {separadas:>8.2f}")
+        print(f"{'Un lote':<20} {en_lote:>8.2f} ({separadas / en_lote:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""
+Representación de un carrito: diccionarios contra Pedido/ItemPedido
+Ejecutar desde la raíz del repo: python -m benchmarks.representacion_pedidos
+
+Antes cada carrito era un diccionario con una lista de items: agregar,
+cambiar o quitar un platillo recorría la lista y el total se volvía a sumar
+en cada cambio. Ahora es un Pedido (slots) con los items indexados por id y
+el total llevado al día. Se compara:
+
+1. Memoria por carrito (tracemalloc) con distintos números de platillos.
+2. µs por operación (agregar uno nuevo, sumar a uno existente, cambiar
+   cantidad, quitar) y lo que cuesta convertir el carrito al JSON de
+   /pedido/*, que con diccionarios ya estaba hecho.
+3. Que ambas representaciones den exactamente el mismo JSON.
+"""
+
+import copy
+import random
+import time
+import tracemalloc
+from datetime import datetime
+
+from pedido import Pedido
+
+CARRITOS = 2000
+TAMANOS = (1, 5, 20, 100)
+REPETICIONES = 2000
+
+
+def menu_sintetico(cantidad):
+    return [{'id': i + 1, 'nombre': f"Platillo {i + 1}", 'precio': 50 + i % 120} for i in range(cantidad)]
+
+
+# Representación anterior (la de sistema_pedidos.py antes de Pedido)
+
+def dict_nuevo(usuario_id):
+    return {
+        'id': usuario_id,
+        'items': [],
+        'total': 0,
+        'fecha_creacion': datetime.now().isoformat(),
+        'estado': 'en_proceso',
+        'datos_cliente': {}
+    }
+
+
+def dict_total(pedido):
+    pedido['total'] = sum(item['subtotal'] for item in pedido['items'])
+
+
+def dict_agregar(pedido, platillo, cantidad=1):
+    for item in pedido['items']:
+        if item['id'] == platillo['id']:
+            item['cantidad'] += cantidad
+            item['subtotal'] = item['cantidad'] * platillo['precio']
+            dict_total(pedido)
+            return
+    pedido['items'].append({
+        'id': platillo['id'],
+        'nombre': platillo['nombre'],
+        'precio': platillo['precio'],
+        'cantidad': cantidad,
+        'subtotal': platillo['precio'] * cantidad
+    })
+    dict_total(pedido)
+
+
+def dict_actualizar(pedido, platillo_id, cantidad):
+    if cantidad <= 0:
+        dict_quitar(pedido, platillo_id)
+        return
+    for item in pedido['items']:
+        if item['id'] == platillo_id:
+            item['cantidad'] = cantidad
+            item['subtotal'] = item['precio'] * cantidad
+            break
+    dict_total(pedido)
+
+
+def dict_quitar(pedido, platillo_id):
+    pedido['items'] = [item for item in pedido['items'] if item['id'] != platillo_id]
+    dict_total(pedido)
+
+
+def representaciones():
+    return {
+        'diccionario': (dict_nuevo, dict_agregar, dict_actualizar, dict_quitar, lambda p: p),
+        'Pedido': (lambda u: Pedido(u, datetime.now().isoformat()), Pedido.agregar,
+                   Pedido.actualizar_cantidad, Pedido.quitar, Pedido.a_dict),
+    }
+
+
+def llenar(nuevo, agregar, usuario_id, menu):
+    pedido = nuevo(usuario_id)
+    for platillo in menu:
+        agregar(pedido, platillo, 2)
+    return pedido
+
+
+def memoria_por_carrito(nuevo, agregar, menu):
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    carritos = [llenar(nuevo, agregar, f"usuario-{i}", menu) for i in range(CARRITOS)]
+    despues = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del carritos
+    return (despues - antes) / CARRITOS
+
+
+def us(funcion, preparar):
+    """µs por llamada de `funcion(estado)`, con un estado nuevo de `preparar` en cada una"""
+    estados = [preparar() for _ in range(REPETICIONES)]
+    inicio = time.perf_counter()
+    for estado in estados:
+        funcion(estado)
+    return (time.perf_counter() - inicio) / REPETICIONES * 1e6
+
+
+def medir_operaciones(nuevo, agregar, actualizar, quitar, a_dict, menu):
+    base = llenar(nuevo, agregar, 'usuario', menu)
+    nuevo_platillo = {'id': 0, 'nombre': 'Nuevo', 'precio': 99}
+    # El último platillo: el peor caso para recorrer la lista
+    ultimo = menu[-1]
+    preparar = lambda: copy.deepcopy(base)
+    return {
+        'agregar nuevo': us(lambda p: agregar(p, nuevo_platillo, 1), preparar),
+        'sumar existente': us(lambda p: agregar(p, ultimo, 1), preparar),
+        'cambiar cantidad': us(lambda p: actualizar(p, ultimo['id'], 5), preparar),
+        'quitar': us(lambda p: quitar(p, ultimo['id']), preparar),
+        'a JSON': us(a_dict, preparar),
+    }
+
+
+def mismo_json():
+    """Las mismas operaciones al azar en ambas representaciones dan el mismo JSON"""
+    menu = menu_sintetico(30)
+    (d_nuevo, d_agregar, d_actualizar, d_quitar, _), (p_nuevo, p_agregar, p_actualizar, p_quitar, _) = \
+        representaciones().values()
+    como_dict, como_pedido = d_nuevo('u'), p_nuevo('u')
+    generador = random.Random(7)
+    for _ in range(5000):
+        platillo = generador.choice(menu)
+        operacion = generador.random()
+        if operacion < 0.5:
+            cantidad = generador.randint(1, 3)
+            d_agregar(como_dict, platillo, cantidad)
+            p_agregar(como_pedido, platillo, cantidad)
+        elif operacion < 0.8:
+            cantidad = generador.randint(-1, 4)
+            d_actualizar(como_dict, platillo['id'], cantidad)
+            p_actualizar(como_pedido, platillo['id'], cantidad)
+        else:
+            d_quitar(como_dict, platillo['id'])
+            p_quitar(como_pedido, platillo['id'])
+        esperado = {k: v for k, v in como_dict.items() if k != 'fecha_creacion'}
+        obtenido = {k: v for k, v in como_pedido.a_dict().items() if k != 'fecha_creacion'}
+        if esperado != obtenido or list(como_dict) != list(como_pedido.a_dict()):
+            return False
+    return True
+
+
+def main():
+    print(f"=== Memoria por carrito (bytes, promedio de {CARRITOS}) ===")
+    print(f"{'Platillos':>9} {'Diccionario':>12} {'Pedido':>10} {'Ahorro':>8}")
+    for tamano in TAMANOS:
+        menu = menu_sintetico(tamano)
+        como_dict, como_pedido = (memoria_por_carrito(nuevo, agregar, menu)
+                                  for nuevo, agregar, *_ in representaciones().values())
+        print(f"{tamano:>9} {como_dict:>12.0f} {como_pedido:>10.0f} {1 - como_pedido / como_dict:>8.0%}")
+
+    print("\n=== µs por operación ===")
+    for tamano in TAMANOS:
+        menu = menu_sintetico(tamano)
+        resultados = {nombre: medir_operaciones(*funciones, menu)
+                      for nombre, funciones in representaciones().items()}
+        print(f"\n{tamano} platillos en el carrito")
+        print(f"{'Operación':<18} {'Diccionario':>12} {'Pedido':>10}")
+        for operacion in resultados['Pedido']:
+            print(f"{operacion:<18} {resultados['diccionario'][operacion]:>12.2f} "
+                  f"{resultados['Pedido'][operacion]:>10.2f}")
+
+    print("\n=== Mismo JSON ===")
+    print("✅ Ambas representaciones dan el mismo JSON" if mismo_json() else "⚠️ El JSON difiere")
+
+
+if __name__ == '__main__':
+    main()
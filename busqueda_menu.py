@@ -0,0 +1,103 @@
+"""
+Búsqueda Difusa de Platillos - La Taza Loca
+Índice invertido de trigramas de caracteres sobre los nombres del menú
+"""
+
+import copy
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from heapq import nlargest
+from itertools import chain
+
+import normalizacion
+
+
+def trigramas(texto):
+    """Trigramas de caracteres del texto con un espacio de relleno en los extremos"""
+    relleno = f" {texto} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+class IndiceTrigramas:
+    """
+    Índice para buscar platillos por nombre aproximado.
+
+    Los nombres se normalizan una sola vez al construir el índice. Cada
+    búsqueda cuenta, con las listas de los trigramas de la consulta, cuántos
+    trigramas comparte con cada platillo; descarta los que por longitud no
+    pueden alcanzar el umbral y, de los restantes, solo a los
+    `max_candidatos` con más trigramas en común (coeficiente de Dice) les
+    calcula la similitud de SequenceMatcher, la misma métrica que usaba el
+    recorrido completo del menú.
+    """
+
+    def __init__(self, platillos, max_candidatos=50, nombres=None):
+        self.platillos = list(platillos)
+        self.max_candidatos = max_candidatos
+        # `nombres` permite reutilizar nombres ya normalizados por quien construye el índice
+        if nombres is None:
+            nombres = [normalizacion.normalizar(p['nombre']) for p in self.platillos]
+        self.nombres = list(nombres)
+        self.num_trigramas = []
+
+        self.indice = defaultdict(list)
+        for posicion, nombre in enumerate(self.nombres):
+            trigramas_nombre = trigramas(nombre)
+            self.num_trigramas.append(len(trigramas_nombre))
+            for trigrama in trigramas_nombre:
+                self.indice[trigrama].append(posicion)
+
+    def __len__(self):
+        return len(self.platillos)
+
+    def con_platillos(self, platillos):
+        """El mismo índice sobre otra lista de platillos con los mismos nombres en las mismas posiciones"""
+        nuevo = copy.copy(self)
+        nuevo.platillos = platillos
+        return nuevo
+
+    def candidatos(self, consulta, umbral):
+        """
+        Posiciones con trigramas en común y longitud compatible con el umbral,
+        las de mayor coeficiente de Dice primero
+        """
+        trigramas_consulta = trigramas(consulta)
+        compartidos = Counter(chain.from_iterable(
+            self.indice.get(trigrama, ()) for trigrama in trigramas_consulta
+        ))
+
+        largo = len(consulta)
+        total_consulta = len(trigramas_consulta)
+        puntajes = []
+        for posicion, comunes in compartidos.items():
+            largo_nombre = len(self.nombres[posicion])
+            # ratio = 2*M / (la + lb) <= 2*min(la, lb) / (la + lb)
+            if 2 * min(largo, largo_nombre) <= umbral * (largo + largo_nombre):
+                continue
+            puntajes.append((2 * comunes / (total_consulta + self.num_trigramas[posicion]), posicion))
+
+        if len(puntajes) > self.max_candidatos:
+            puntajes = nlargest(self.max_candidatos, puntajes)
+        return [posicion for _, posicion in puntajes]
+
+    def buscar(self, texto, umbral=0.6, limite=None):
+        """
+        Regresa [(platillo, similitud), ...] con similitud > umbral, de mayor
+        a menor similitud (a igual similitud, en el orden del menú).
+        """
+        consulta = normalizacion.normalizar(texto)
+        resultados = []
+
+        for posicion in self.candidatos(consulta, umbral):
+            comparador = SequenceMatcher(None, consulta, self.nombres[posicion])
+            # quick_ratio es una cota superior barata de ratio
+            if comparador.quick_ratio() <= umbral:
+                continue
+            similitud = comparador.ratio()
+            if similitud > umbral:
+                resultados.append((posicion, similitud))
+
+        resultados.sort(key=lambda r: (-r[1], r[0]))
+        if limite is not None:
+            resultados = resultados[:limite]
+        return [(self.platillos[posicion], similitud) for posicion, similitud in resultados]
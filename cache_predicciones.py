@@ -0,0 +1,91 @@
+"""
+Cache LRU de Predicciones - La Taza Loca
+Evita repetir la inferencia para mensajes con las mismas palabras conocidas
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """
+    Cache acotado con política LRU y expiración por tiempo (TTL).
+
+    `tamano_maximo` <= 0 desactiva el cache; `ttl_segundos` <= 0 hace que las
+    entradas no expiren. Es seguro para usarse desde varios hilos.
+    """
+
+    def __init__(self, tamano_maximo=1024, ttl_segundos=0):
+        self.tamano_maximo = tamano_maximo
+        self.ttl_segundos = ttl_segundos
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.expiraciones = 0
+        self.invalidaciones = 0
+
+    @property
+    def activo(self):
+        return self.tamano_maximo > 0
+
+    def obtener(self, clave):
+        """Regresa el valor guardado o None si no existe o ya expiró"""
+        if not self.activo:
+            return None
+
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+
+            valor, expira = entrada
+            if expira is not None and expira <= time.monotonic():
+                del self._datos[clave]
+                self.expiraciones += 1
+                self.fallos += 1
+                return None
+
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave, valor):
+        """Guarda un valor, desalojando el menos usado si el cache está lleno"""
+        if not self.activo:
+            return
+
+        expira = time.monotonic() + self.ttl_segundos if self.ttl_segundos > 0 else None
+        with self._lock:
+            self._datos[clave] = (valor, expira)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.tamano_maximo:
+                self._datos.popitem(last=False)
+                self.desalojos += 1
+
+    def limpiar(self):
+        """Invalida todas las entradas (p. ej. al recargar el modelo)"""
+        with self._lock:
+            self._datos.clear()
+            self.invalidaciones += 1
+
+    def estadisticas(self):
+        """Contadores de aciertos, fallos y desalojos"""
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'activo': self.activo,
+                'tamano': len(self._datos),
+                'tamano_maximo': self.tamano_maximo,
+                'ttl_segundos': self.ttl_segundos,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': round(self.aciertos / consultas, 4) if consultas else 0.0,
+                'desalojos': self.desalojos,
+                'expiraciones': self.expiraciones,
+                'invalidaciones': self.invalidaciones
+            }
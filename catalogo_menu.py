@@ -0,0 +1,335 @@
+"""
+Catálogo del Menú - La Taza Loca
+Menú en memoria con índices precalculados por id, categoría, disponibilidad
+y banderas, para no recorrer la lista completa en cada petición
+"""
+
+import copy
+import hashlib
+from bisect import bisect_left
+import json
+import math
+import os
+import uuid
+
+import normalizacion
+from busqueda_menu import IndiceTrigramas
+from consulta_menu import IndiceFacetas
+from menciones_menu import AutomataPlatillos
+from plantillas_respuestas import PlantillasMenu, formatear_platillo
+
+BANDERAS = ('oferta', 'mas_vendido', 'popular')
+CAMPOS_REQUERIDOS = ('id', 'nombre', 'categoria', 'descripcion', 'precio', 'disponible')
+# Campos que se pueden cambiar en caliente con CatalogoMenu.con_cambios
+CAMPOS_ACTUALIZABLES = ('disponible', 'precio', 'oferta', 'descuento', 'mas_vendido', 'popular')
+# Platillos por bloque en version_menu: cambiar uno solo vuelve a resumir su bloque
+BLOQUE_VERSION = 256
+
+
+def huella_platillo(platillo):
+    return hashlib.sha256(
+        json.dumps(platillo, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    ).digest()
+
+
+def huella_bloque(huellas, bloque):
+    inicio = bloque * BLOQUE_VERSION
+    return hashlib.sha256(b''.join(huellas[inicio:inicio + BLOQUE_VERSION])).digest()
+
+
+def huellas_de_bloques(huellas):
+    return [huella_bloque(huellas, bloque) for bloque in range(-(-len(huellas) // BLOQUE_VERSION))]
+
+
+def version_menu(platillos, huellas=None, bloques=None):
+    """
+    Huella del contenido del menú: igual en todos los workers para el mismo
+    menú. Se calcula sobre la huella de cada bloque de BLOQUE_VERSION
+    platillos (`bloques`, si ya se tienen), y la de cada bloque sobre la de
+    sus platillos (`huellas`): cambiar unos platillos solo vuelve a
+    serializar esos y a resumir sus bloques.
+    """
+    if bloques is None:
+        if huellas is None:
+            huellas = [huella_platillo(p) for p in platillos]
+        bloques = huellas_de_bloques(huellas)
+    return hashlib.sha256(b''.join(bloques)).hexdigest()[:16]
+
+
+def _es_numero(valor):
+    """int o float finito (ni bool, ni NaN, ni infinito)"""
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool) and math.isfinite(valor)
+
+
+def _leer_valor(platillo_id, campo, valor):
+    """Valor de un campo actualizable ya validado; ValueError si no es válido"""
+    if campo in ('disponible',) + BANDERAS:
+        # Como en menu.json: 0 o 1
+        if isinstance(valor, bool) or (type(valor) is int and valor in (0, 1)):
+            return int(valor)
+        raise ValueError(f"{campo} del platillo {platillo_id} debe ser true/false o 0/1: {valor!r}")
+    if campo == 'precio':
+        if _es_numero(valor) and valor >= 0:
+            return valor
+        raise ValueError(f"precio del platillo {platillo_id} debe ser un número mayor o igual a 0: {valor!r}")
+    if _es_numero(valor) and 0 <= valor <= 100:
+        return valor
+    raise ValueError(f"descuento del platillo {platillo_id} debe ser un número entre 0 y 100: {valor!r}")
+
+
+def con_reemplazos(lista, cambiados, posiciones, pertenece):
+    """
+    Copia de `lista` (platillos en el orden del menú) con cada platillo de
+    `cambiados` puesto en su lugar, agregado o quitado según
+    `pertenece(platillo)`. Cada uno se ubica con bisect por su posición en el
+    menú (`posiciones`), sin recorrer la lista.
+    """
+    lista = list(lista)
+    posicion_de = lambda p: posiciones[p['id']]
+    for platillo in cambiados:
+        lugar = bisect_left(lista, posiciones[platillo['id']], key=posicion_de)
+        estaba = lugar < len(lista) and lista[lugar]['id'] == platillo['id']
+        if pertenece(platillo):
+            if estaba:
+                lista[lugar] = platillo
+            else:
+                lista.insert(lugar, platillo)
+        elif estaba:
+            del lista[lugar]
+    return lista
+
+
+def leer_cambios(cambios, obtener):
+    """
+    {id: platillo cambiado} para una lista de [{'id': ..., campo: valor}, ...],
+    con `obtener(id)` el platillo actual. Todos o ninguno: un cambio inválido
+    lanza ValueError. Los platillos que quedan igual no se regresan.
+    """
+    if not isinstance(cambios, list) or not cambios:
+        raise ValueError("cambios debe ser una lista no vacía")
+
+    actuales = {}
+    nuevos = {}
+    for cambio in cambios:
+        if not isinstance(cambio, dict) or 'id' not in cambio:
+            raise ValueError("Cada cambio debe ser un objeto con 'id'")
+        platillo_id = cambio['id']
+        if not isinstance(platillo_id, int) or isinstance(platillo_id, bool):
+            raise ValueError(f"No existe el platillo {platillo_id!r}")
+        if platillo_id not in actuales:
+            platillo = obtener(platillo_id)
+            if platillo is None:
+                raise ValueError(f"No existe el platillo {platillo_id!r}")
+            actuales[platillo_id] = platillo
+        campos = [campo for campo in cambio if campo != 'id']
+        invalidos = [campo for campo in campos if campo not in CAMPOS_ACTUALIZABLES]
+        if invalidos or not campos:
+            raise ValueError(f"El cambio del platillo {platillo_id} solo puede tener: "
+                             f"{', '.join(CAMPOS_ACTUALIZABLES)}")
+        # Varios cambios al mismo platillo se aplican en orden
+        actual = nuevos.get(platillo_id, actuales[platillo_id])
+        nuevos[platillo_id] = {**actual, **{campo: _leer_valor(platillo_id, campo, cambio[campo])
+                                            for campo in campos}}
+
+    validar_menu(list(nuevos.values()))
+    return {platillo_id: platillo for platillo_id, platillo in nuevos.items()
+            if platillo != actuales[platillo_id]}
+
+
+def validar_menu(platillos):
+    """Lanza ValueError si el menú no tiene la forma que esperan los endpoints"""
+    if not isinstance(platillos, list):
+        raise ValueError("El menú debe ser una lista de platillos")
+
+    ids = set()
+    for posicion, platillo in enumerate(platillos):
+        if not isinstance(platillo, dict):
+            raise ValueError(f"El platillo en la posición {posicion} no es un objeto")
+        faltantes = [campo for campo in CAMPOS_REQUERIDOS if campo not in platillo]
+        if faltantes:
+            raise ValueError(f"Al platillo en la posición {posicion} le faltan: {', '.join(faltantes)}")
+
+        platillo_id = platillo['id']
+        if not isinstance(platillo_id, int) or isinstance(platillo_id, bool):
+            raise ValueError(f"id inválido en la posición {posicion}: {platillo_id!r}")
+        if platillo_id in ids:
+            raise ValueError(f"id repetido: {platillo_id}")
+        ids.add(platillo_id)
+
+        if not isinstance(platillo['nombre'], str) or not platillo['nombre'].strip():
+            raise ValueError(f"El platillo {platillo_id} no tiene nombre")
+        precio = platillo['precio']
+        if not _es_numero(precio) or precio < 0:
+            raise ValueError(f"Precio inválido en el platillo {platillo_id}: {precio!r}")
+        if platillo.get('oferta') and 'descuento' not in platillo:
+            raise ValueError(f"El platillo {platillo_id} está en oferta pero no tiene descuento")
+        alias = platillo.get('alias', [])
+        if not isinstance(alias, list) or not all(isinstance(a, str) for a in alias):
+            raise ValueError(f"alias del platillo {platillo_id} debe ser una lista de textos")
+
+
+def guardar_menu(platillos, archivo_menu):
+    """
+    Escribe el menú con el formato de menu.json en un temporal y lo renombra:
+    los workers que lo vigilan ven el menú nuevo completo o el anterior
+    """
+    temporal = f"{archivo_menu}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(platillos, f, ensure_ascii=False, indent=4, allow_nan=False)
+        f.write('\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, archivo_menu)
+
+
+class CatalogoMenu:
+    """
+    Vista indexada del menú. Se construye una vez a partir de la lista que
+    trae menu.json y no se modifica después: para cambiar el menú se crea un
+    catálogo nuevo y se reemplaza la referencia, así quien esté leyendo el
+    anterior nunca ve índices a medio actualizar.
+
+    Las listas que regresa conservan el orden del menú y son compartidas:
+    no deben modificarse.
+    """
+
+    def __init__(self, platillos):
+        self.platillos = list(platillos)
+        self.huellas = [huella_platillo(p) for p in self.platillos]
+        self.bloques = huellas_de_bloques(self.huellas)
+        self.version = version_menu(self.platillos, bloques=self.bloques)
+        self.por_id = {p['id']: p for p in self.platillos}
+        self.posiciones = {p['id']: posicion for posicion, p in enumerate(self.platillos)}
+
+        self.por_categoria = {}
+        for platillo in self.platillos:
+            self.por_categoria.setdefault(platillo.get('categoria'), []).append(platillo)
+
+        self.disponibles = [p for p in self.platillos if p.get('disponible')]
+        self.por_bandera = {
+            bandera: [p for p in self.platillos if p.get(bandera)]
+            for bandera in BANDERAS
+        }
+
+        self.nombres_normalizados = [normalizacion.normalizar(p['nombre']) for p in self.platillos]
+        self.indice_busqueda = IndiceTrigramas(self.platillos, nombres=self.nombres_normalizados)
+        self.automata_menciones = AutomataPlatillos(self.platillos, self.nombres_normalizados)
+        self.indice_facetas = IndiceFacetas(self.platillos, self.nombres_normalizados, self.version)
+        self.plantillas = PlantillasMenu(self.platillos)
+
+    @classmethod
+    def desde_archivo(cls, archivo_menu):
+        """Carga y valida el menú desde un archivo JSON (vacío si el archivo no existe)"""
+        if os.path.exists(archivo_menu):
+            with open(archivo_menu, 'r', encoding='utf-8') as f:
+                platillos = json.load(f)
+            validar_menu(platillos)
+            return cls(platillos)
+        return cls([])
+
+    def con_cambios(self, cambios):
+        """
+        Catálogo nuevo con los cambios de disponibilidad, precio y banderas
+        aplicados (todos o ninguno: un cambio inválido lanza ValueError).
+
+        No recorre el menú: nombres, búsqueda y menciones se comparten con
+        este catálogo; las listas por categoría, disponibilidad y bandera,
+        las facetas, las plantillas y la versión solo se corrigen en las
+        posiciones de los platillos que cambiaron.
+        """
+        nuevos = leer_cambios(cambios, self.por_id.get)
+        if not nuevos:
+            return self
+
+        catalogo = copy.copy(self)
+        catalogo.platillos = list(self.platillos)
+        catalogo.por_id = dict(self.por_id)
+        catalogo.huellas = list(self.huellas)
+        catalogo.bloques = list(self.bloques)
+        for platillo_id, platillo in nuevos.items():
+            posicion = self.posiciones[platillo_id]
+            catalogo.platillos[posicion] = platillo
+            catalogo.por_id[platillo_id] = platillo
+            catalogo.huellas[posicion] = huella_platillo(platillo)
+        for bloque in {self.posiciones[platillo_id] // BLOQUE_VERSION for platillo_id in nuevos}:
+            catalogo.bloques[bloque] = huella_bloque(catalogo.huellas, bloque)
+        catalogo.version = version_menu(catalogo.platillos, bloques=catalogo.bloques)
+
+        cambiados = list(nuevos.values())
+        catalogo.por_categoria = dict(self.por_categoria)
+        for categoria in {p.get('categoria') for p in cambiados}:
+            catalogo.por_categoria[categoria] = con_reemplazos(
+                self.por_categoria[categoria], [p for p in cambiados if p.get('categoria') == categoria],
+                self.posiciones, lambda p: True
+            )
+        catalogo.disponibles = con_reemplazos(self.disponibles, cambiados, self.posiciones,
+                                              lambda p: p.get('disponible'))
+        catalogo.por_bandera = {
+            bandera: con_reemplazos(self.por_bandera[bandera], cambiados, self.posiciones,
+                                    lambda p, bandera=bandera: p.get(bandera))
+            for bandera in BANDERAS
+        }
+
+        posiciones = [self.posiciones[platillo_id] for platillo_id in nuevos]
+        catalogo.indice_busqueda = self.indice_busqueda.con_platillos(catalogo.platillos)
+        catalogo.automata_menciones = self.automata_menciones.con_platillos(catalogo.platillos)
+        catalogo.indice_facetas = self.indice_facetas.con_cambios(
+            catalogo.platillos, posiciones, catalogo.version
+        )
+        catalogo.plantillas = self.plantillas.con_cambios(catalogo.platillos, cambiados)
+        return catalogo
+
+    def __len__(self):
+        return len(self.platillos)
+
+    def __iter__(self):
+        return iter(self.platillos)
+
+    def obtener(self, platillo_id):
+        """Platillo con ese id, o None"""
+        return self.por_id.get(platillo_id)
+
+    def categorias(self):
+        """Nombres de las categorías en el orden en que aparecen en el menú"""
+        return list(self.por_categoria)
+
+    def de_categoria(self, categoria):
+        """Platillos de una categoría (lista vacía si no existe)"""
+        return self.por_categoria.get(categoria, [])
+
+    def con_bandera(self, bandera):
+        """Platillos marcados con `oferta`, `mas_vendido` o `popular`"""
+        return self.por_bandera[bandera]
+
+    def buscar(self, texto, umbral=0.6, limite=None):
+        """Búsqueda difusa por nombre: [(platillo, similitud), ...]"""
+        return self.indice_busqueda.buscar(texto, umbral=umbral, limite=limite)
+
+    def extraer_menciones(self, texto):
+        """Platillos mencionados en un mensaje con su cantidad (ver AutomataPlatillos.buscar)"""
+        return self.automata_menciones.buscar(texto)
+
+    def consultar(self, filtros=None, orden='menu', limite=20, cursor=None):
+        """Consulta facetada y paginada (ver IndiceFacetas.consultar)"""
+        return self.indice_facetas.consultar(filtros, orden=orden, limite=limite, cursor=cursor)
+
+    def ficha(self, platillo):
+        """Texto de formatear_platillo para un platillo, ya armado si es de este catálogo"""
+        ficha = self.plantillas.fichas.get(platillo['id'])
+        if ficha is None or self.por_id.get(platillo['id']) is not platillo:
+            return formatear_platillo(platillo)
+        return ficha
+
+    def respuesta_intencion(self, intencion):
+        """Respuesta armada con el menú para la intención, o None si no tiene plantilla"""
+        return self.plantillas.respuestas.get(intencion)
+
+    def estadisticas(self):
+        """Conteos precalculados del menú"""
+        return {
+            'total_platillos': len(self.platillos),
+            'disponibles': len(self.disponibles),
+            'no_disponibles': len(self.platillos) - len(self.disponibles),
+            'mas_vendidos': self.por_bandera['mas_vendido'],
+            'populares': self.por_bandera['popular'],
+        }
@@ -0,0 +1,185 @@
+"""
+Base común de los Clasificadores de Intenciones
+La Taza Loca - Chatbot Inteligente
+Lógica de predicción y respuestas compartida por el motor PyTorch y el motor NumPy
+"""
+
+import random
+import threading
+
+import configuracion
+from cache_predicciones import CacheLRU
+from procesador_texto import ProcesadorTexto
+
+
+RESPUESTA_DESCONOCIDA = "Lo siento, no entendí bien. ¿Quieres ver el **menú**, **precios** o **hacer un pedido**? 😄"
+
+
+class ClasificadorBase:
+    """
+    Interfaz común de los clasificadores de intenciones.
+
+    Cada motor implementa `esta_cargado` y `_inferir_indices`; el resto
+    (umbral de confianza, cache, respuestas, API por lotes) es compartido.
+
+    Como el modelo es una bolsa de palabras, dos mensajes con el mismo
+    conjunto de palabras conocidas producen la misma predicción: el cache
+    se indexa por la tupla ordenada de sus índices en el vocabulario.
+
+    Antes de eso, los mensajes que son literalmente uno de los patrones de
+    entrenamiento (ya normalizados) se resuelven con una tabla hash, con
+    confianza 1.0 y sin tocar la red.
+    """
+
+    def __init__(self, tamano_cache=None, ttl_cache=None):
+        self.procesador = ProcesadorTexto()
+        self.clases = []
+        self.respuestas = {}
+        self.cache_predicciones = CacheLRU(
+            configuracion.CACHE_PREDICCIONES_TAMANO if tamano_cache is None else tamano_cache,
+            configuracion.CACHE_PREDICCIONES_TTL if ttl_cache is None else ttl_cache
+        )
+
+        # Patrón de entrenamiento normalizado -> índice de clase
+        self.patrones_exactos = {}
+        self.aciertos_patron_exacto = 0
+        self.consultas_patron_exacto = 0
+        self._lock_contadores = threading.Lock()
+
+    def esta_cargado(self):
+        """Indica si hay un modelo listo para predecir"""
+        raise NotImplementedError
+
+    def _inferir_indices(self, lista_indices):
+        """
+        Ejecuta la red para varios textos ya vectorizados como listas de
+        índices del vocabulario. Regresa (confianzas, indices_clase) de la
+        clase más probable de cada texto.
+        """
+        raise NotImplementedError
+
+    def construir_patrones_exactos(self, intenciones):
+        """
+        Construye la tabla de patrones exactos a partir de las intenciones de
+        entrenamiento. Los patrones que aparecen en más de una intención se
+        descartan y quedan a cargo de la red.
+        """
+        tabla = {}
+        ambiguos = set()
+        for intent in intenciones:
+            idx_clase = self.clases.index(intent['tag'])
+            for patron in intent['patrones']:
+                clave = self.procesador.normalizar(patron)
+                if not clave:
+                    continue
+                if tabla.get(clave, idx_clase) != idx_clase:
+                    ambiguos.add(clave)
+                tabla[clave] = idx_clase
+
+        for clave in ambiguos:
+            del tabla[clave]
+
+        self.patrones_exactos = tabla
+        return tabla
+
+    def estadisticas_patrones_exactos(self):
+        """Cuántas predicciones resolvió la tabla de patrones sin usar la red"""
+        with self._lock_contadores:
+            aciertos = self.aciertos_patron_exacto
+            consultas = self.consultas_patron_exacto
+        return {
+            'patrones': len(self.patrones_exactos),
+            'consultas': consultas,
+            'aciertos': aciertos,
+            'tasa_aciertos': round(aciertos / consultas, 4) if consultas else 0.0
+        }
+
+    def predecir_intencion(self, texto, umbral_confianza=0.10):
+        """Predice la intención de un texto"""
+        return self.predecir_intencion_lote([texto], umbral_confianza)[0]
+
+    def predecir_intencion_lote(self, textos, umbral_confianza=0.10):
+        """
+        Predice la intención de varios textos con un solo forward de la red.
+
+        Retorna una lista de tuplas (intencion, confianza) en el mismo orden
+        que `textos`; la intención es None si la confianza no supera el umbral.
+        """
+        if not self.esta_cargado():
+            raise ValueError("El modelo no está cargado. Entrena o carga un modelo primero.")
+
+        if not textos:
+            return []
+
+        claves = []
+        predicciones = []
+        aciertos_exactos = 0
+        for texto in textos:
+            tokens = self.procesador.tokenizar(texto)
+
+            # Camino rápido: el mensaje es un patrón de entrenamiento
+            idx_clase = self.patrones_exactos.get(' '.join(tokens))
+            if idx_clase is not None:
+                claves.append(None)
+                predicciones.append((1.0, idx_clase))
+                aciertos_exactos += 1
+                continue
+
+            clave = tuple(self.procesador.tokens_a_indices(tokens))
+            claves.append(clave)
+            predicciones.append(self.cache_predicciones.obtener(clave))
+
+        with self._lock_contadores:
+            self.consultas_patron_exacto += len(textos)
+            self.aciertos_patron_exacto += aciertos_exactos
+
+        # Solo se ejecuta la red para los conjuntos de palabras no cacheados
+        pendientes = {}
+        for clave, prediccion in zip(claves, predicciones):
+            if prediccion is None and clave not in pendientes:
+                pendientes[clave] = None
+
+        if pendientes:
+            confianzas, indices_max = self._inferir_indices([list(clave) for clave in pendientes])
+            for clave, confianza, idx_max in zip(pendientes, confianzas, indices_max):
+                pendientes[clave] = (confianza, idx_max)
+                self.cache_predicciones.guardar(clave, (confianza, idx_max))
+
+        resultados = []
+        for clave, prediccion in zip(claves, predicciones):
+            confianza, idx_max = prediccion if prediccion is not None else pendientes[clave]
+            if confianza < umbral_confianza:
+                resultados.append((None, confianza))
+            else:
+                resultados.append((self.clases[idx_max], confianza))
+
+        return resultados
+
+    def generar_respuesta(self, intencion, confianza):
+        """Arma la respuesta para una intención ya predicha"""
+        if intencion is None:
+            return {
+                'respuesta': RESPUESTA_DESCONOCIDA,
+                'intencion': 'desconocida',
+                'confianza': float(confianza)
+            }
+
+        respuesta = random.choice(self.respuestas[intencion])
+
+        return {
+            'respuesta': respuesta,
+            'intencion': intencion,
+            'confianza': float(confianza)
+        }
+
+    def obtener_respuesta(self, texto):
+        """Obtiene una respuesta para el texto del usuario"""
+        intencion, confianza = self.predecir_intencion(texto)
+        return self.generar_respuesta(intencion, confianza)
+
+    def obtener_respuesta_lote(self, textos):
+        """Obtiene las respuestas para varios textos en un solo forward"""
+        return [
+            self.generar_respuesta(intencion, confianza)
+            for intencion, confianza in self.predecir_intencion_lote(textos)
+        ]
@@ -0,0 +1,106 @@
+"""
+Configuración del Chatbot - La Taza Loca
+Valores ajustables por despliegue mediante variables de entorno
+"""
+
+import os
+
+
+def _leer_bool(nombre, por_defecto=False):
+    """Lee una variable de entorno como booleano ('1', 'true', 'si', ...)"""
+    valor = os.environ.get(nombre)
+    if valor is None:
+        return por_defecto
+    return valor.strip().lower() in ('1', 'true', 'si', 'sí', 'yes', 'on')
+
+
+def _leer_int(nombre, por_defecto):
+    """Lee una variable de entorno como entero"""
+    valor = os.environ.get(nombre)
+    return int(valor) if valor else por_defecto
+
+
+def _leer_float(nombre, por_defecto):
+    """Lee una variable de entorno como flotante"""
+    valor = os.environ.get(nombre)
+    return float(valor) if valor else por_defecto
+
+
+# ===== MICRO-LOTES DE INFERENCIA =====
+# Agrupa los mensajes concurrentes de /chat en un solo forward de la red.
+# Solo conviene con workers multihilo (gunicorn --threads / gthread).
+MICROLOTES_ACTIVO = _leer_bool('CHATBOT_MICROLOTES', False)
+MICROLOTE_ESPERA_MS = _leer_float('CHATBOT_MICROLOTE_ESPERA_MS', 5.0)
+MICROLOTE_TAMANO_MAXIMO = _leer_int('CHATBOT_MICROLOTE_TAMANO_MAXIMO', 32)
+
+# ===== MOTOR DE INFERENCIA =====
+# 'auto': usa el artefacto NumPy (modelo.npz) si existe y, si no, PyTorch.
+# 'numpy' / 'torch': fuerza un motor.
+MOTOR_INFERENCIA = os.environ.get('CHATBOT_MOTOR', 'auto').strip().lower()
+
+# ===== CACHE DE PREDICCIONES =====
+# LRU de (intención, confianza) por conjunto de palabras conocidas.
+# Tamaño 0 desactiva el cache; TTL 0 hace que las entradas no expiren.
+CACHE_PREDICCIONES_TAMANO = _leer_int('CHATBOT_CACHE_PREDICCIONES_TAMANO', 2048)
+CACHE_PREDICCIONES_TTL = _leer_float('CHATBOT_CACHE_PREDICCIONES_TTL', 3600.0)
+
+# ===== CUANTIZACIÓN =====
+# 'int8' cuantiza dinámicamente las capas lineales del motor PyTorch
+# (ver benchmarks/evaluar_cuantizacion.py antes de activarlo).
+# Con CHATBOT_MOTOR=auto, activarla hace que se use el motor PyTorch.
+CUANTIZACION = os.environ.get('CHATBOT_CUANTIZACION', 'ninguna').strip().lower()
+
+# ===== PRECARGA EN GUNICORN =====
+# Carga modelo y menú una sola vez en el proceso maestro antes del fork
+# para que los workers compartan esas páginas de memoria (ver gunicorn.conf.py).
+PRECARGA_GUNICORN = _leer_bool('CHATBOT_PRECARGA', True)
+
+# ===== VERSIONES DEL MODELO =====
+# Directorio base del modelo. Cada reentrenamiento escribe una versión nueva
+# en RUTA_MODELO/versiones/ y cambia el puntero RUTA_MODELO/ACTUAL.json.
+RUTA_MODELO = os.environ.get('CHATBOT_RUTA_MODELO', 'modelo_chatbot')
+VERSIONES_CONSERVAR = _leer_int('CHATBOT_VERSIONES_CONSERVAR', 5)
+
+# ===== ORIGEN DEL MENÚ =====
+# 'json': todo menu.json en memoria (menús chicos).
+# 'sqlite': MENU_SQLITE, creado con `python importar_menu.py`; en memoria solo
+# quedan los índices y un cache LRU de MENU_SQLITE_CACHE platillos completos.
+MENU_BACKEND = os.environ.get('CHATBOT_MENU_BACKEND', 'json').strip().lower()
+MENU_SQLITE = os.environ.get('CHATBOT_MENU_SQLITE', 'menu.db')
+MENU_SQLITE_CACHE = _leer_int('CHATBOT_MENU_SQLITE_CACHE', 1024)
+
+# ===== RECARGA DEL MENÚ =====
+# Cada cuántos segundos cada worker revisa si menu.json (o MENU_SQLITE)
+# cambió (inodo, mtime y tamaño) para recargarlo sin reiniciar. 0 la desactiva.
+MENU_RECARGA_SEGUNDOS = _leer_float('CHATBOT_MENU_RECARGA_SEGUNDOS', 5.0)
+
+# ===== ALMACÉN DE PEDIDOS =====
+# 'memoria': carritos en un diccionario de cada worker (se pierden al reiniciar
+# y cada worker ve los suyos: solo para un worker).
+# 'sqlite': PEDIDOS_SQLITE en modo WAL, compartido por los workers del
+# servidor, con hasta PEDIDOS_SQLITE_CONEXIONES conexiones por worker.
+PEDIDOS_BACKEND = os.environ.get('CHATBOT_PEDIDOS_BACKEND', 'memoria').strip().lower()
+PEDIDOS_SQLITE = os.environ.get('CHATBOT_PEDIDOS_SQLITE', 'pedidos.db')
+PEDIDOS_SQLITE_CONEXIONES = _leer_int('CHATBOT_PEDIDOS_SQLITE_CONEXIONES', 4)
+# Un carrito sin usarse PEDIDOS_TTL_SEGUNDOS expira (0: nunca). Con más de
+# PEDIDOS_MAXIMO carritos abiertos se desaloja el usado hace más tiempo
+# (0: sin límite). De los finalizados se guardan los PEDIDOS_FINALIZADOS_MAXIMO
+# más recientes. Un hilo por worker los barre cada PEDIDOS_BARRIDO_SEGUNDOS.
+PEDIDOS_TTL_SEGUNDOS = _leer_float('CHATBOT_PEDIDOS_TTL_SEGUNDOS', 7200.0)
+PEDIDOS_MAXIMO = _leer_int('CHATBOT_PEDIDOS_MAXIMO', 10000)
+PEDIDOS_FINALIZADOS_MAXIMO = _leer_int('CHATBOT_PEDIDOS_FINALIZADOS_MAXIMO', 1000)
+PEDIDOS_BARRIDO_SEGUNDOS = _leer_float('CHATBOT_PEDIDOS_BARRIDO_SEGUNDOS', 30.0)
+# Candados por franja de usuarios para modificar carritos en memoria desde
+# varios hilos (gunicorn --threads); 1 equivale a un candado global.
+PEDIDOS_FRANJAS = _leer_int('CHATBOT_PEDIDOS_FRANJAS', 64)
+
+# ===== MENSAJES DE PEDIDO =====
+# Nombre del restaurante y encabezado del mensaje de WhatsApp de cada pedido
+# (el encabezado puede usar {restaurante}).
+RESTAURANTE_NOMBRE = os.environ.get('CHATBOT_RESTAURANTE_NOMBRE', 'FONDA DOÑA MAGUI')
+PEDIDO_ENCABEZADO = os.environ.get('CHATBOT_PEDIDO_ENCABEZADO', '🍽️ *NUEVO PEDIDO - {restaurante}*')
+
+# ===== ENTRENAMIENTO =====
+# Directorio donde se guardan las matrices de características por hash
+# del archivo de datos, para no recalcularlas en cada entrenamiento.
+CACHE_ENTRENAMIENTO = os.environ.get('CHATBOT_CACHE_ENTRENAMIENTO', '.cache_entrenamiento')
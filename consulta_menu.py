@@ -0,0 +1,246 @@
+"""
+Consulta Facetada del Menú - La Taza Loca
+Filtros por categoría, precio, disponibilidad y banderas, con orden,
+paginación por cursor y conteos por faceta, resueltos con índices
+precalculados en lugar de recorrer el menú
+"""
+
+import base64
+import binascii
+import copy
+import json
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+
+FACETAS_BOOLEANAS = ('disponible', 'oferta', 'mas_vendido', 'popular')
+ORDENES = ('menu', 'precio', '-precio', 'nombre')
+LIMITE_MAXIMO = 100
+
+
+class CursorInvalido(ValueError):
+    """El cursor no se puede leer o es de otra versión del menú u otro orden"""
+
+
+class IndiceFacetas:
+    """
+    Índices de un catálogo para consultas facetadas. Los platillos se
+    identifican por su posición en el menú:
+
+    - `conjuntos[faceta][valor]`: posiciones con ese valor de la faceta
+      (`categoria` y las banderas booleanas);
+    - `por_precio` / `precios`: posiciones ordenadas por precio y sus precios,
+      para resolver rangos con bisect;
+    - `ordenes[orden]`: las posiciones en cada orden y `rango[orden][posicion]`
+      el lugar de cada platillo en ese orden, que es lo que guarda el cursor.
+    """
+
+    def __init__(self, platillos, nombres_normalizados, version):
+        self.platillos = platillos
+        self.version = version
+        posiciones = range(len(platillos))
+
+        self.conjuntos = {'categoria': {}}
+        for posicion, platillo in enumerate(platillos):
+            self.conjuntos['categoria'].setdefault(platillo.get('categoria'), set()).add(posicion)
+        for faceta in FACETAS_BOOLEANAS:
+            verdaderos = {p for p in posiciones if platillos[p].get(faceta)}
+            self.conjuntos[faceta] = {True: verdaderos, False: set(posiciones) - verdaderos}
+
+        self.por_precio = sorted(posiciones, key=lambda p: (platillos[p]['precio'], p))
+        self.precios = [platillos[p]['precio'] for p in self.por_precio]
+
+        self.ordenes = {
+            'menu': list(posiciones),
+            'precio': self.por_precio,
+            '-precio': sorted(posiciones, key=lambda p: (-platillos[p]['precio'], p)),
+            'nombre': sorted(posiciones, key=lambda p: (nombres_normalizados[p], p)),
+        }
+        self.rango = {orden: self._rangos(lista) for orden, lista in self.ordenes.items()}
+        self.todas = frozenset(posiciones)
+
+    def con_cambios(self, platillos, posiciones, version):
+        """
+        Índice para `platillos`, que difiere de los de este índice solo en las
+        `posiciones` dadas y nunca en nombre ni categoría. Las banderas se
+        mueven de conjunto y los órdenes por precio se corrigen con bisect;
+        el resto se comparte.
+        """
+        nuevo = copy.copy(self)
+        nuevo.platillos = platillos
+        nuevo.version = version
+
+        nuevo.conjuntos = dict(self.conjuntos)
+        for faceta in FACETAS_BOOLEANAS:
+            cambiadas = [p for p in posiciones
+                         if bool(platillos[p].get(faceta)) != bool(self.platillos[p].get(faceta))]
+            if not cambiadas:
+                continue
+            verdaderos, falsos = set(self.conjuntos[faceta][True]), set(self.conjuntos[faceta][False])
+            for posicion in cambiadas:
+                if platillos[posicion].get(faceta):
+                    falsos.discard(posicion)
+                    verdaderos.add(posicion)
+                else:
+                    verdaderos.discard(posicion)
+                    falsos.add(posicion)
+            nuevo.conjuntos[faceta] = {True: verdaderos, False: falsos}
+
+        cambiadas = [p for p in posiciones if platillos[p]['precio'] != self.platillos[p]['precio']]
+        if cambiadas:
+            nuevo.ordenes = dict(self.ordenes)
+            nuevo.rango = dict(self.rango)
+            for orden, signo in (('precio', 1), ('-precio', -1)):
+                anterior = lambda p: (signo * self.platillos[p]['precio'], p)
+                actual = lambda p: (signo * platillos[p]['precio'], p)
+                lista = list(self.ordenes[orden])
+                for posicion in cambiadas:
+                    del lista[bisect_left(lista, anterior(posicion), key=anterior)]
+                for posicion in cambiadas:
+                    insort(lista, posicion, key=actual)
+                nuevo.ordenes[orden] = lista
+                nuevo.rango[orden] = self._rangos(lista)
+            nuevo.por_precio = nuevo.ordenes['precio']
+            nuevo.precios = [platillos[p]['precio'] for p in nuevo.por_precio]
+        return nuevo
+
+    @staticmethod
+    def _rangos(orden):
+        rango = [0] * len(orden)
+        for lugar, posicion in enumerate(orden):
+            rango[posicion] = lugar
+        return rango
+
+    def _en_rango_de_precio(self, precio_min, precio_max):
+        inicio = 0 if precio_min is None else bisect_left(self.precios, precio_min)
+        fin = len(self.precios) if precio_max is None else bisect_right(self.precios, precio_max)
+        return set(self.por_precio[inicio:fin])
+
+    def _filtrar(self, filtros, excepto=None):
+        """Intersección de los conjuntos de cada filtro, del más chico al más grande"""
+        conjuntos = []
+        for faceta, valor in filtros.items():
+            if faceta == excepto:
+                continue
+            if faceta == 'precio':
+                conjuntos.append(self._en_rango_de_precio(*valor))
+            else:
+                conjuntos.append(self.conjuntos[faceta].get(valor, set()))
+        if not conjuntos:
+            return self.todas
+        if len(conjuntos) == 1:
+            # Nadie modifica el resultado: no hace falta copiar el conjunto
+            return conjuntos[0]
+        conjuntos.sort(key=len)
+        return conjuntos[0].intersection(*conjuntos[1:])
+
+    def _conteos(self, filtros, resultado):
+        """
+        Conteo por valor de cada faceta con los demás filtros aplicados (el de
+        la propia faceta no), para que el cliente sepa qué obtendría al cambiarlo.
+        `resultado` es la consulta con todos los filtros: es la base de las
+        facetas que no están filtradas.
+        """
+        conteos = {}
+        for faceta, valores in self.conjuntos.items():
+            base = self._filtrar(filtros, excepto=faceta) if faceta in filtros else resultado
+            conteos[faceta] = {
+                str(valor).lower() if isinstance(valor, bool) else valor: cuantos
+                for valor, cuantos in self._contar(base, valores).items()
+            }
+
+        base = self._filtrar(filtros, excepto='precio') if 'precio' in filtros else resultado
+        minimo, maximo = self._extremos_de_precio(base)
+        conteos['precio'] = {'minimo': minimo, 'maximo': maximo}
+        return conteos
+
+    def _contar(self, base, valores):
+        """
+        {valor: posiciones de `base` con ese valor}. Los conjuntos de una
+        faceta reparten todo el menú, así que el del valor más común no se
+        intersecta: es lo que falta para llegar a len(base).
+        """
+        if base is self.todas:
+            return {valor: len(conjunto) for valor, conjunto in valores.items()}
+        mayor = max(valores, key=lambda valor: len(valores[valor]))
+        conteos = {valor: len(base & conjunto) for valor, conjunto in valores.items() if valor != mayor}
+        resto = len(base) - sum(conteos.values())
+        return {valor: conteos.get(valor, resto) for valor in valores}
+
+    def _extremos_de_precio(self, base):
+        """
+        (mínimo, máximo) precio de `base` sin leer sus platillos: el primero y
+        el último de `base` en `por_precio`. Con una base chica se buscan por
+        su lugar; con una grande, recorriendo desde cada punta (aparecen pronto)
+        """
+        if not base:
+            return None, None
+        if base is self.todas:
+            return self.precios[0], self.precios[-1]
+        lugar = self.rango['precio']
+        if len(base) * 8 < len(self.platillos):
+            primero = min(lugar[p] for p in base)
+            ultimo = max(lugar[p] for p in base)
+        else:
+            primero = next(i for i, p in enumerate(self.por_precio) if p in base)
+            ultimo = next(i for i in range(len(self.por_precio) - 1, -1, -1) if self.por_precio[i] in base)
+        return self.precios[primero], self.precios[ultimo]
+
+    def _leer_cursor(self, cursor, orden):
+        try:
+            datos = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            version, orden_cursor, ultimo = datos['v'], datos['o'], int(datos['r'])
+        except (ValueError, KeyError, TypeError, OverflowError, binascii.Error):
+            raise CursorInvalido("Cursor inválido")
+        if version != self.version:
+            raise CursorInvalido("El menú cambió; vuelve a consultar desde la primera página")
+        if orden_cursor != orden:
+            raise CursorInvalido("El cursor es de otro orden")
+        if not -1 <= ultimo < len(self.platillos):
+            raise CursorInvalido("Cursor inválido")
+        return ultimo
+
+    def _crear_cursor(self, orden, ultimo):
+        datos = json.dumps({'v': self.version, 'o': orden, 'r': ultimo}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(datos.encode('ascii')).decode('ascii')
+
+    def consultar(self, filtros=None, orden='menu', limite=20, cursor=None):
+        """
+        `filtros` admite 'categoria', las banderas de FACETAS_BOOLEANAS y
+        'precio' como (mínimo, máximo) con None para un extremo abierto.
+        Regresa un diccionario con la página de platillos, el total, el
+        cursor de la página siguiente (None en la última) y los conteos por faceta.
+        """
+        filtros = dict(filtros or {})
+        if orden not in ORDENES:
+            raise ValueError(f"orden debe ser uno de: {', '.join(ORDENES)}")
+        if not 1 <= limite <= LIMITE_MAXIMO:
+            raise ValueError(f"limite debe estar entre 1 y {LIMITE_MAXIMO}")
+
+        rango = self.rango[orden]
+        resultado = self._filtrar(filtros)
+        # Lugar, en el orden pedido, del último platillo que ya recibió el cliente
+        ultimo = self._leer_cursor(cursor, orden) if cursor else -1
+
+        if len(resultado) * 8 < len(self.platillos):
+            # Pocos resultados: ordenarlos es más barato que recorrer el orden completo
+            ordenados = sorted(resultado, key=rango.__getitem__)
+            inicio = bisect_right(ordenados, ultimo, key=rango.__getitem__)
+            pagina = ordenados[inicio:inicio + limite + 1]
+        else:
+            # Muchos resultados: recorrer el orden precalculado hasta llenar la página
+            pagina = []
+            for posicion in islice(self.ordenes[orden], ultimo + 1, None):
+                if posicion in resultado:
+                    pagina.append(posicion)
+                    if len(pagina) > limite:
+                        break
+
+        hay_mas = len(pagina) > limite
+        pagina = pagina[:limite]
+
+        return {
+            'platillos': [self.platillos[p] for p in pagina],
+            'total': len(resultado),
+            'siguiente_cursor': self._crear_cursor(orden, rango[pagina[-1]]) if hay_mas else None,
+            'facetas': self._conteos(filtros, resultado),
+        }
@@ -23,9 +23,9 @@ def main():
     # Crear clasificador
     clasificador = ClasificadorIntenciones(archivo_datos=archivo_datos)
     
-    # Entrenar
+    # Entrenar (vectorizado, con parada temprana)
     print("Iniciando entrenamiento...\n")
-    clasificador.entrenar(epochs=200, batch_size=8, verbose=1)
+    clasificador.entrenar_rapido(max_epochs=1000, verbose=1)
     
     # Guardar modelo
     clasificador.guardar_modelo('modelo_chatbot')
@@ -37,6 +37,7 @@ def main():
     print("Archivos generados:")
     print("  - modelo_chatbot/modelo.keras (red neuronal)")
     print("  - modelo_chatbot/datos_auxiliares.pkl (vocabulario y clases)")
+    print("  - modelo_chatbot/modelo.npz (artefacto de inferencia sin PyTorch)")
     print()
     
     # Pruebas rápidas
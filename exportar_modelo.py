@@ -0,0 +1,69 @@
+"""
+Script para exportar el modelo entrenado al artefacto de inferencia NumPy
+Ejecutar: python exportar_modelo.py [ruta_modelo] [datos_entrenamiento.json]
+
+Si el modelo se guardó antes de la tabla de patrones exactos, la completa
+(ver completar_patrones_exactos) y vuelve a guardar el modelo completo con
+`guardar_modelo`, para que datos_auxiliares.pkl, modelo.pth y modelo.npz
+traigan la misma tabla
+"""
+
+from modelo_intenciones import ClasificadorIntenciones
+import json
+import os
+import sys
+
+# Confianza mínima con la que la red debe dar la clase de un patrón para
+# resolverlo con la tabla (el umbral por defecto de predecir_intencion)
+UMBRAL_PATRONES = 0.10
+
+def completar_patrones_exactos(clasificador, archivo_datos):
+    """
+    Tabla de patrones exactos para un modelo que no la trae: los patrones de
+    `archivo_datos` de las intenciones que conoce el modelo, solo los que la
+    red ya clasifica igual. Así la tabla no cambia ninguna respuesta aunque
+    el JSON actual no sea el mismo con el que se entrenó la red.
+    """
+    with open(archivo_datos, 'r', encoding='utf-8') as f:
+        intenciones = json.load(f)['intenciones']
+
+    conocidas = [intent for intent in intenciones if intent['tag'] in clasificador.clases]
+    tabla = clasificador.construir_patrones_exactos(conocidas)
+    patrones = list(tabla)
+    if not patrones:
+        return tabla
+
+    confianzas, indices = clasificador._inferir_indices(
+        [clasificador.procesador.tokens_a_indices(patron.split()) for patron in patrones]
+    )
+    clasificador.patrones_exactos = {
+        patron: tabla[patron]
+        for patron, confianza, idx_clase in zip(patrones, confianzas, indices)
+        if int(idx_clase) == tabla[patron] and confianza >= UMBRAL_PATRONES
+    }
+    print(f"Patrones exactos: {len(clasificador.patrones_exactos)} de {len(patrones)} "
+          f"(el resto la red los clasifica distinto y se quedan con la red)")
+    return clasificador.patrones_exactos
+
+def main():
+    ruta = sys.argv[1] if len(sys.argv) > 1 else 'modelo_chatbot'
+    archivo_datos = sys.argv[2] if len(sys.argv) > 2 else 'datos_entrenamiento.json'
+
+    if not os.path.exists(os.path.join(ruta, 'modelo.pth')):
+        print(f"ERROR: No se encontró un modelo entrenado en '{ruta}/'")
+        print("Ejecuta 'python entrenar_modelo.py' primero.")
+        return
+
+    clasificador = ClasificadorIntenciones(cuantizacion='ninguna')
+    clasificador.cargar_modelo(ruta)
+
+    if clasificador.patrones_exactos:
+        clasificador.exportar_modelo(ruta)
+    else:
+        completar_patrones_exactos(clasificador, archivo_datos)
+        clasificador.guardar_modelo(ruta)
+
+    print("\n✅ Artefacto listo: app.py lo usará sin necesidad de PyTorch")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Configuración de Gunicorn - La Taza Loca
+
+Con precarga (CHATBOT_PRECARGA=1, por defecto) la app se importa en el
+proceso maestro: el modelo y el menú se cargan una sola vez y los workers
+los heredan al hacer fork, compartiendo esas páginas (copy-on-write).
+
+Para que las páginas sigan compartidas:
+- el recolector de basura se desactiva en el maestro mientras carga, y
+  antes de cada fork se congelan los objetos existentes (gc.freeze) para
+  que los ciclos de GC de los workers no escriban en ellos;
+- los pesos del modelo NumPy quedan como arreglos de solo lectura.
+
+Gunicorn toma el puerto de $PORT y el número de workers de
+$WEB_CONCURRENCY, así que aquí no se fijan.
+"""
+
+import gc
+
+import configuracion
+
+preload_app = configuracion.PRECARGA_GUNICORN
+
+if preload_app:
+    # Evitar que el GC del maestro toque (y copie) objetos durante la carga
+    gc.disable()
+
+
+def when_ready(server):
+    if preload_app:
+        gc.freeze()
+        server.log.info("Precarga lista: %d objetos congelados para compartir entre workers",
+                        gc.get_freeze_count())
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        # Objetos creados en el maestro después de when_ready
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        gc.enable()
@@ -0,0 +1,38 @@
+"""
+Hilos de Fondo - La Taza Loca
+Un hilo daemon que se arranca la primera vez que se necesita y se vuelve a
+arrancar en cada worker: tras un fork, el proceso hijo hereda el objeto
+pero no el hilo
+"""
+
+import os
+import threading
+
+
+class HiloDemonio:
+    """
+    Corre `objetivo()` en un hilo daemon llamado `nombre`. `asegurar` lo
+    arranca si en este proceso no hay uno vivo; se puede llamar en cada
+    petición: si el hilo ya corre solo compara el pid.
+    """
+
+    def __init__(self, nombre, objetivo):
+        self.nombre = nombre
+        self.objetivo = objetivo
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._pid = None
+
+    def _vivo(self):
+        return self._hilo is not None and self._pid == os.getpid() and self._hilo.is_alive()
+
+    def asegurar(self):
+        """Arranca el hilo si no está corriendo en este proceso"""
+        if self._vivo():
+            return
+        with self._lock:
+            if self._vivo():
+                return
+            self._pid = os.getpid()
+            self._hilo = threading.Thread(target=self.objetivo, name=self.nombre, daemon=True)
+            self._hilo.start()
@@ -0,0 +1,27 @@
+"""
+Script para convertir menu.json a la base SQLite del catálogo
+Ejecutar: python importar_menu.py [menu.json] [menu.db]
+Luego arrancar con CHATBOT_MENU_BACKEND=sqlite
+"""
+
+from menu_sqlite import importar_json
+import os
+import sys
+import time
+
+def main():
+    ruta_json = sys.argv[1] if len(sys.argv) > 1 else 'menu.json'
+    ruta_db = sys.argv[2] if len(sys.argv) > 2 else 'menu.db'
+    
+    if not os.path.exists(ruta_json):
+        print(f"ERROR: No se encontró '{ruta_json}'")
+        return
+    
+    inicio = time.perf_counter()
+    total = importar_json(ruta_json, ruta_db)
+    
+    print(f"✅ {total} platillos importados a '{ruta_db}' en {time.perf_counter() - inicio:.2f} s")
+    print("   Usa CHATBOT_MENU_BACKEND=sqlite para que app.py lo lea")
+
+if __name__ == "__main__":
+    main()
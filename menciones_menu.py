@@ -0,0 +1,176 @@
+"""
+Menciones de Platillos - La Taza Loca
+Autómata Aho-Corasick sobre palabras para encontrar, en una sola pasada,
+todos los platillos (con su cantidad) que menciona un mensaje
+"""
+
+import copy
+import re
+from collections import deque
+
+import normalizacion
+
+NUMEROS = {
+    'un': 1, 'uno': 1, 'una': 1, 'dos': 2, 'tres': 3, 'cuatro': 4, 'cinco': 5,
+    'seis': 6, 'siete': 7, 'ocho': 8, 'nueve': 9, 'diez': 10, 'once': 11, 'doce': 12
+}
+_CANTIDAD_ANTES = re.compile(r'^(\d{1,3})x?$')   # "2 huevos", "2x huevos"
+_CANTIDAD_DESPUES = re.compile(r'^x(\d{1,3})$')  # "huevos x2"
+
+
+def raiz(token):
+    """Singular aproximado: 'huevos rancheros' y 'huevo ranchero' coinciden"""
+    return token[:-1] if len(token) > 3 and token.endswith('s') else token
+
+
+def cantidad_antes(token):
+    """Cantidad expresada por la palabra previa a una mención, o None"""
+    if token in NUMEROS:
+        return NUMEROS[token]
+    coincidencia = _CANTIDAD_ANTES.match(token)
+    return int(coincidencia.group(1)) if coincidencia else None
+
+
+def cantidad_despues(token):
+    coincidencia = _CANTIDAD_DESPUES.match(token)
+    return int(coincidencia.group(1)) if coincidencia else None
+
+
+def alias_automaticos(nombre_normalizado):
+    """Formas cortas de un nombre: 'chilaquiles rojos con huevo' -> 'chilaquiles rojos'"""
+    corto = nombre_normalizado.split(' con ')[0]
+    return [corto] if corto != nombre_normalizado and ' ' in corto else []
+
+
+class AutomataPlatillos:
+    """
+    Autómata de Aho-Corasick cuyas transiciones son palabras (ya en forma
+    raíz) en lugar de caracteres, así que nunca encuentra un platillo dentro
+    de otra palabra. Se construye una vez por catálogo; buscar en un
+    mensaje cuesta lo mismo sin importar cuántos platillos tenga el menú.
+
+    Los patrones son el nombre normalizado de cada platillo, los alias que
+    traiga en el campo opcional `alias` y una forma corta sin el "con ...".
+    Un alias que apunta a más de un platillo se descarta; un nombre siempre
+    gana sobre un alias. Los estados guardan la posición del platillo en el
+    menú, no el platillo.
+    """
+
+    def __init__(self, platillos, nombres_normalizados=None):
+        self.platillos = list(platillos)
+        if nombres_normalizados is None:
+            nombres_normalizados = [normalizacion.normalizar(p['nombre']) for p in self.platillos]
+
+        patrones = {}
+        for posicion, nombre in enumerate(nombres_normalizados):
+            patrones[self._clave(nombre)] = posicion
+
+        alias = {}
+        for posicion, (platillo, nombre) in enumerate(zip(self.platillos, nombres_normalizados)):
+            extras = [normalizacion.normalizar(a) for a in platillo.get('alias', [])]
+            for texto in extras + alias_automaticos(nombre):
+                clave = self._clave(texto)
+                if clave and clave not in patrones:
+                    alias.setdefault(clave, set()).add(posicion)
+        for clave, posiciones in alias.items():
+            if len(posiciones) == 1:
+                patrones[clave] = next(iter(posiciones))
+
+        self.num_patrones = len(patrones)
+        self._construir(patrones)
+
+    @staticmethod
+    def _clave(texto):
+        return tuple(raiz(token) for token in texto.split())
+
+    def _construir(self, patrones):
+        # Trie: transiciones por estado, y el patrón más largo que termina en él
+        self.transiciones = [{}]
+        self.salida = [None]
+        for clave, posicion in patrones.items():
+            estado = 0
+            for palabra in clave:
+                siguiente = self.transiciones[estado].get(palabra)
+                if siguiente is None:
+                    siguiente = len(self.transiciones)
+                    self.transiciones[estado][palabra] = siguiente
+                    self.transiciones.append({})
+                    self.salida.append(None)
+                estado = siguiente
+            self.salida[estado] = (len(clave), posicion)
+
+        # Enlaces de falla (BFS) y enlace al siguiente estado con salida
+        self.falla = [0] * len(self.transiciones)
+        self.enlace_salida = [None] * len(self.transiciones)
+        cola = deque(self.transiciones[0].values())
+        while cola:
+            estado = cola.popleft()
+            for palabra, siguiente in self.transiciones[estado].items():
+                cola.append(siguiente)
+                respaldo = self.falla[estado]
+                while respaldo and palabra not in self.transiciones[respaldo]:
+                    respaldo = self.falla[respaldo]
+                destino = self.transiciones[respaldo].get(palabra, 0)
+                self.falla[siguiente] = destino if destino != siguiente else 0
+                destino = self.falla[siguiente]
+                self.enlace_salida[siguiente] = destino if self.salida[destino] else self.enlace_salida[destino]
+
+    def con_platillos(self, platillos):
+        """
+        El mismo autómata sobre otra lista de platillos con los mismos nombres
+        y alias en las mismas posiciones (p. ej. tras cambiar precios)
+        """
+        nuevo = copy.copy(self)
+        nuevo.platillos = platillos
+        return nuevo
+
+    def _coincidencias(self, claves):
+        """Todas las apariciones de patrones como (inicio, fin, posición)"""
+        estado = 0
+        for posicion, palabra in enumerate(claves):
+            while estado and palabra not in self.transiciones[estado]:
+                estado = self.falla[estado]
+            estado = self.transiciones[estado].get(palabra, 0)
+
+            salida = estado if self.salida[estado] else self.enlace_salida[estado]
+            while salida:
+                largo, platillo = self.salida[salida]
+                yield posicion + 1 - largo, posicion + 1, platillo
+                salida = self.enlace_salida[salida]
+
+    def buscar(self, texto):
+        """
+        Menciones de platillos en `texto`, de izquierda a derecha y sin
+        traslaparse (gana la más larga), como
+        [{'platillo': ..., 'cantidad': n, 'texto': ...}, ...].
+        La cantidad se toma de la palabra anterior ("2", "dos", "2x") o de la
+        siguiente ("x2"); si no hay, es 1.
+        """
+        tokens = normalizacion.tokenizar(texto)
+        claves = [raiz(token) for token in tokens]
+
+        # La mención más larga que empieza en cada posición
+        por_inicio = {}
+        for inicio, fin, platillo in self._coincidencias(claves):
+            if fin > por_inicio.get(inicio, (0, None))[0]:
+                por_inicio[inicio] = (fin, platillo)
+
+        menciones = []
+        posicion = 0
+        while posicion < len(tokens):
+            if posicion not in por_inicio:
+                posicion += 1
+                continue
+            fin, platillo = por_inicio[posicion]
+
+            cantidad = cantidad_antes(tokens[posicion - 1]) if posicion > 0 else None
+            if cantidad is None and fin < len(tokens):
+                cantidad = cantidad_despues(tokens[fin])
+
+            menciones.append({
+                'platillo': self.platillos[platillo],
+                'cantidad': cantidad if cantidad is not None else 1,
+                'texto': ' '.join(tokens[posicion:fin])
+            })
+            posicion = fin
+        return menciones
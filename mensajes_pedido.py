@@ -0,0 +1,165 @@
+"""
+Mensajes de Pedido - Fonda Doña Magui
+Texto del pedido para WhatsApp y resumen del carrito con plantillas
+compiladas una sola vez: cada mensaje se arma en una pasada juntando sus
+partes, y el link de WhatsApp sale de esas mismas partes ya codificadas
+"""
+
+from datetime import datetime
+from string import Formatter
+from urllib.parse import quote
+
+import configuracion
+
+SEPARADOR = "=" * 40 + "\n"
+DIVISOR = "-" * 40 + "\n"
+
+ENCABEZADO_PEDIDO = "🍽️ *NUEVO PEDIDO - {restaurante}*"
+PIE_PEDIDO = "\n¡Gracias por tu preferencia! 😊🌮"
+CARRITO_VACIO = "🛒 Tu carrito está vacío"
+
+# Partes del mensaje de WhatsApp; los campos se llenan en el orden en que aparecen
+PLANTILLA_CLIENTE = "👤 *Cliente:* {nombre}\n📱 *Teléfono:* {telefono}\n"
+PLANTILLA_DOMICILIO = "🏠 *Dirección:* {direccion}\n🚚 *Tipo:* Entrega a domicilio\n"
+PLANTILLA_RECOGER = "🏪 *Tipo:* Recoger en local\n"
+PLANTILLA_NOTAS = "📝 *Notas:* {notas}\n"
+PLANTILLA_FIN_CLIENTE = "\n"
+PLANTILLA_ITEMS = "📋 *PEDIDO:*\n" + DIVISOR
+PLANTILLA_RENGLON = ("{i}. *{nombre}*\n"
+                     "   Cantidad: {cantidad}\n"
+                     "   Precio unitario: ${precio}\n"
+                     "   Subtotal: ${subtotal}\n\n")
+PLANTILLA_TOTAL = SEPARADOR + "💰 *TOTAL: ${total} MXN*\n" + SEPARADOR + "\n⏰ Hora del pedido: {hora}\n"
+
+# Textos ya codificados para URL que se guardan: los nombres de platillos se repiten en cada pedido
+MAXIMO_CODIFICADOS = 4096
+
+
+class Plantilla:
+    """
+    Un texto con campos {…} partido una sola vez en sus partes fijas, que
+    se guardan también codificadas para URL. Al llenarla solo se
+    convierten y codifican los valores; sin codificar, se llena con un
+    formato posicional ya armado (una sola llamada en C).
+    """
+
+    def __init__(self, formato):
+        fijas = ['']
+        self.campos = []
+        for fija, campo, _, _ in Formatter().parse(formato):
+            # "{{" y "}}" parten el texto fijo en varios pedazos sin campo
+            fijas[-1] += fija
+            if campo is not None:
+                self.campos.append(campo)
+                fijas.append('')
+        self.fijas = [(fija, quote(fija)) for fija in fijas]
+        self.formatear = '{}'.join(fija.replace('{', '{{').replace('}', '}}') for fija, _ in self.fijas).format
+
+    def llenar(self, partes, valores, codificar=None):
+        """
+        Agrega a `partes` el texto con `valores` (en el orden de los campos).
+        Con `codificar`, agrega (texto, texto codificado) por cada parte.
+        """
+        if codificar is None:
+            partes.append(self.formatear(*valores))
+        else:
+            fijas = self.fijas
+            partes.append(fijas[0])
+            for valor, fija in zip(valores, fijas[1:]):
+                partes.append(codificar(valor))
+                partes.append(fija)
+
+
+class MensajesPedido:
+    """
+    Plantillas del mensaje de un pedido para un restaurante, compiladas al
+    construirse. Cada mensaje se arma en una lista de partes que se junta
+    una sola vez, en lugar de ir concatenando el texto con `+=`.
+
+    `texto_y_link` llena la misma lista con cada parte y su versión
+    codificada, así que el link sale del mismo recorrido que el texto. Las
+    partes fijas ya vienen codificadas, los enteros no cambian al
+    codificarse y los demás valores (sobre todo nombres de platillos, que se
+    repiten) se codifican una vez y se guardan. `encabezado` puede usar
+    {restaurante} (por defecto configuracion.RESTAURANTE_NOMBRE).
+    """
+
+    def __init__(self, restaurante=None, encabezado=ENCABEZADO_PEDIDO, pie=PIE_PEDIDO):
+        if restaurante is None:
+            restaurante = configuracion.RESTAURANTE_NOMBRE
+        self.restaurante = restaurante
+        encabezado = encabezado.format(restaurante=restaurante).replace('{', '{{').replace('}', '}}')
+        self.encabezado = Plantilla(encabezado + "\n" + SEPARADOR + "\n")
+        self.cliente = Plantilla(PLANTILLA_CLIENTE)
+        self.domicilio = Plantilla(PLANTILLA_DOMICILIO)
+        self.recoger = Plantilla(PLANTILLA_RECOGER)
+        self.notas = Plantilla(PLANTILLA_NOTAS)
+        self.fin_cliente = Plantilla(PLANTILLA_FIN_CLIENTE)
+        self.items = Plantilla(PLANTILLA_ITEMS)
+        self.renglon = Plantilla(PLANTILLA_RENGLON)
+        self.total = Plantilla(PLANTILLA_TOTAL)
+        self.pie = Plantilla(pie)
+        self._codificados = {}
+
+    def _codificar(self, valor):
+        """(texto, texto codificado) de un valor de una plantilla"""
+        if type(valor) is int:
+            # Los dígitos (y el signo) no cambian al codificar
+            texto = str(valor)
+            return texto, texto
+        texto = str(valor)
+        codificado = self._codificados.get(texto)
+        if codificado is None:
+            if len(self._codificados) >= MAXIMO_CODIFICADOS:
+                self._codificados.clear()
+            codificado = self._codificados[texto] = (texto, quote(texto))
+        return codificado
+
+    def _partes(self, pedido, ahora, codificar):
+        """Partes del mensaje de WhatsApp (con su versión codificada si `codificar`)"""
+        partes = []
+        self.encabezado.llenar(partes, (), codificar)
+
+        cliente = pedido.datos_cliente
+        if cliente:
+            self.cliente.llenar(partes, (cliente.get('nombre', 'Sin nombre'),
+                                         cliente.get('telefono', 'Sin teléfono')), codificar)
+            if cliente.get('tipo_entrega') == 'domicilio':
+                self.domicilio.llenar(partes, (cliente.get('direccion', 'Sin dirección'),), codificar)
+            else:
+                self.recoger.llenar(partes, (), codificar)
+            if cliente.get('notas'):
+                self.notas.llenar(partes, (cliente.get('notas'),), codificar)
+            self.fin_cliente.llenar(partes, (), codificar)
+
+        self.items.llenar(partes, (), codificar)
+        renglon = self.renglon.llenar
+        for i, item in enumerate(pedido.items.values(), 1):
+            renglon(partes, (i, item.nombre, item.cantidad, item.precio, item.subtotal), codificar)
+
+        self.total.llenar(partes, (pedido.total, ahora.strftime('%d/%m/%Y %H:%M')), codificar)
+        self.pie.llenar(partes, (), codificar)
+        return partes
+
+    def texto(self, pedido, ahora=None):
+        """Mensaje del pedido para WhatsApp, o None si el carrito está vacío"""
+        if not pedido or not pedido.items:
+            return None
+        return ''.join(self._partes(pedido, ahora or datetime.now(), None))
+
+    def texto_y_link(self, pedido, numero, ahora=None):
+        """(mensaje, link de WhatsApp con ese mensaje), o (None, None) si el carrito está vacío"""
+        if not pedido or not pedido.items:
+            return None, None
+        partes = self._partes(pedido, ahora or datetime.now(), self._codificar)
+        texto = ''.join([parte[0] for parte in partes])
+        codificado = ''.join([parte[1] for parte in partes])
+        return texto, f"https://wa.me/{numero}?text={codificado}"
+
+    def resumen(self, pedido):
+        """Resumen corto del carrito para el chat"""
+        if not pedido or not pedido.items:
+            return CARRITO_VACIO
+
+        renglones = [f"• {item.cantidad}x {item.nombre} - ${item.subtotal}\n" for item in pedido.items.values()]
+        return ''.join(["🛒 *TU PEDIDO ACTUAL:*\n\n", *renglones, f"\n💰 *Total: ${pedido.total} MXN*"])
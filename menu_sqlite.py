@@ -0,0 +1,324 @@
+"""
+Menú en SQLite - La Taza Loca
+Respaldo del catálogo en un archivo SQLite indexado para menús grandes:
+en memoria solo viven las columnas que usan los índices (nombre, categoría,
+precio, banderas); el platillo completo se lee bajo demanda y los más
+consultados se guardan en un cache LRU
+
+Importar el menú actual:
+    python importar_menu.py [menu.json] [menu.db]
+"""
+
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+import normalizacion
+from busqueda_menu import IndiceTrigramas
+from cache_predicciones import CacheLRU
+from catalogo_menu import BANDERAS, huella_platillo, leer_cambios, validar_menu, version_menu
+from consulta_menu import IndiceFacetas
+from menciones_menu import AutomataPlatillos
+from plantillas_respuestas import PlantillasMenu, formatear_platillo
+
+FORMATO_VERSION = 1
+
+ESQUEMA = """
+CREATE TABLE metadatos (
+    clave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+CREATE TABLE platillos (
+    id INTEGER PRIMARY KEY,
+    posicion INTEGER NOT NULL UNIQUE,
+    nombre TEXT NOT NULL,
+    nombre_normalizado TEXT NOT NULL,
+    categoria TEXT,
+    precio NUMERIC NOT NULL,
+    disponible INTEGER NOT NULL,
+    oferta INTEGER NOT NULL,
+    descuento NUMERIC,
+    mas_vendido INTEGER NOT NULL,
+    popular INTEGER NOT NULL,
+    alias TEXT NOT NULL,
+    datos TEXT NOT NULL
+);
+CREATE INDEX idx_platillos_categoria ON platillos (categoria, posicion);
+CREATE INDEX idx_platillos_disponible ON platillos (disponible, posicion);
+CREATE INDEX idx_platillos_precio ON platillos (precio, posicion);
+CREATE INDEX idx_platillos_oferta ON platillos (posicion) WHERE oferta = 1;
+CREATE INDEX idx_platillos_mas_vendido ON platillos (posicion) WHERE mas_vendido = 1;
+CREATE INDEX idx_platillos_popular ON platillos (posicion) WHERE popular = 1;
+"""
+
+# Columnas que se cargan en memoria para los índices (el resto queda en `datos`)
+COLUMNAS_RESUMEN = ('id', 'nombre', 'categoria', 'precio', 'disponible',
+                    'oferta', 'descuento', 'mas_vendido', 'popular')
+# Espera máxima por el candado de escritura de SQLite al guardar cambios
+ESPERA_ESCRITURA_SEGUNDOS = 5.0
+
+
+def _resumen(platillo):
+    """Columnas de COLUMNAS_RESUMEN de un platillo, como quedan guardadas en la base"""
+    return {
+        'id': platillo['id'],
+        'nombre': platillo['nombre'],
+        'categoria': platillo.get('categoria'),
+        'precio': platillo['precio'],
+        'disponible': int(bool(platillo.get('disponible'))),
+        'oferta': int(bool(platillo.get('oferta'))),
+        'descuento': platillo.get('descuento'),
+        'mas_vendido': int(bool(platillo.get('mas_vendido'))),
+        'popular': int(bool(platillo.get('popular'))),
+    }
+
+
+def importar_json(ruta_json, ruta_db):
+    """
+    Convierte menu.json en una base SQLite. Se escribe en un temporal y se
+    renombra al final: los workers que vigilan `ruta_db` ven el menú nuevo
+    completo o siguen con el anterior.
+    """
+    with open(ruta_json, 'r', encoding='utf-8') as f:
+        platillos = json.load(f)
+    validar_menu(platillos)
+
+    temporal = f"{ruta_db}.{os.getpid()}.tmp"
+    if os.path.exists(temporal):
+        os.remove(temporal)
+
+    conexion = sqlite3.connect(temporal)
+    try:
+        with conexion:
+            conexion.executescript(ESQUEMA)
+            conexion.executemany("INSERT INTO metadatos (clave, valor) VALUES (?, ?)", [
+                ('formato_version', str(FORMATO_VERSION)),
+                ('version', version_menu(platillos)),
+                ('total', str(len(platillos))),
+            ])
+            conexion.executemany(
+                "INSERT INTO platillos VALUES (:id, :posicion, :nombre, :nombre_normalizado, :categoria, "
+                ":precio, :disponible, :oferta, :descuento, :mas_vendido, :popular, :alias, :datos)",
+                (
+                    {**_resumen(p), 'posicion': posicion,
+                     'nombre_normalizado': normalizacion.normalizar(p['nombre']),
+                     'alias': json.dumps(p.get('alias', []), ensure_ascii=False),
+                     'datos': json.dumps(p, ensure_ascii=False)}
+                    for posicion, p in enumerate(platillos)
+                )
+            )
+        conexion.execute("ANALYZE")
+        conexion.commit()
+    finally:
+        conexion.close()
+
+    os.replace(temporal, ruta_db)
+    return len(platillos)
+
+
+class CatalogoMenuSQLite:
+    """
+    Catálogo con la misma interfaz que `CatalogoMenu`, respaldado por un
+    archivo creado con `importar_json`.
+
+    Búsqueda, menciones y consulta facetada usan los mismos índices que el
+    catálogo en memoria, construidos sobre un resumen de cada platillo; los
+    platillos que se regresan siempre son los completos, leídos por id con
+    un cache LRU de `tamano_cache` entradas. Cada hilo usa su propia
+    conexión de solo lectura (y la vuelve a abrir después de un fork).
+
+    `con_cambios` guarda los cambios en la misma base, en su lugar: los
+    demás workers siguen con sus resúmenes anteriores hasta que su vigilante
+    recarga la base, pero los platillos completos que lean ya son los nuevos.
+    """
+
+    def __init__(self, ruta_db, tamano_cache=1024):
+        self.ruta_db = ruta_db
+        self.tamano_cache = tamano_cache
+        self._local = threading.local()
+        self.cache = CacheLRU(tamano_cache, 0)
+        self.cache_fichas = CacheLRU(tamano_cache, 0)
+
+        conexion = self._conexion()
+        metadatos = dict(conexion.execute("SELECT clave, valor FROM metadatos"))
+        formato = int(metadatos.get('formato_version', 0))
+        if formato != FORMATO_VERSION:
+            raise ValueError(f"Formato de menú SQLite no soportado: {formato} (se esperaba {FORMATO_VERSION})")
+        self.version = metadatos['version']
+
+        self.resumenes = []
+        self.nombres_normalizados = []
+        columnas = ', '.join(COLUMNAS_RESUMEN)
+        for fila in conexion.execute(f"SELECT {columnas}, nombre_normalizado, alias "
+                                     f"FROM platillos ORDER BY posicion"):
+            resumen = dict(zip(COLUMNAS_RESUMEN, fila))
+            alias = json.loads(fila[-1])
+            if alias:
+                resumen['alias'] = alias
+            self.resumenes.append(resumen)
+            self.nombres_normalizados.append(fila[-2])
+        self.posiciones = {r['id']: posicion for posicion, r in enumerate(self.resumenes)}
+
+        self.num_disponibles = sum(1 for r in self.resumenes if r['disponible'])
+        self.indice_busqueda = IndiceTrigramas(self.resumenes, nombres=self.nombres_normalizados)
+        self.automata_menciones = AutomataPlatillos(self.resumenes, self.nombres_normalizados)
+        self.indice_facetas = IndiceFacetas(self.resumenes, self.nombres_normalizados, self.version)
+        # Con los resúmenes: las fichas se arman bajo demanda y las listas no leen
+        # los platillos completos (eso cargaría todo el menú)
+        self.plantillas = PlantillasMenu(self.resumenes, precalcular_fichas=False)
+
+    @classmethod
+    def desde_archivo(cls, ruta_db, tamano_cache=1024):
+        if not os.path.exists(ruta_db):
+            raise FileNotFoundError(f"No existe {ruta_db}; créalo con 'python importar_menu.py'")
+        return cls(ruta_db, tamano_cache)
+
+    def con_cambios(self, cambios):
+        """
+        Catálogo nuevo con los cambios de disponibilidad, precio y banderas
+        (ver CatalogoMenu.con_cambios), ya guardados en la base en una sola
+        transacción: todos o ninguno.
+
+        Solo se leen los platillos que cambian y, como en el catálogo en
+        memoria, los índices solo se corrigen en sus posiciones. La versión
+        nueva resume la anterior y los platillos cambiados; se guarda en la
+        base, así que todos los workers la leen igual.
+        """
+        nuevos = leer_cambios(cambios, self.obtener)
+        if not nuevos:
+            return self
+
+        ordenados = sorted(nuevos.items())
+        version = hashlib.sha256(
+            self.version.encode('utf-8') + b''.join(huella_platillo(p) for _, p in ordenados)
+        ).hexdigest()[:16]
+        conexion = sqlite3.connect(self.ruta_db, timeout=ESPERA_ESCRITURA_SEGUNDOS)
+        try:
+            with conexion:
+                conexion.executemany(
+                    "UPDATE platillos SET precio = :precio, disponible = :disponible, oferta = :oferta, "
+                    "descuento = :descuento, mas_vendido = :mas_vendido, popular = :popular, datos = :datos "
+                    "WHERE id = :id",
+                    ({**_resumen(p), 'datos': json.dumps(p, ensure_ascii=False)} for _, p in ordenados)
+                )
+                conexion.execute("UPDATE metadatos SET valor = ? WHERE clave = 'version'", (version,))
+        finally:
+            conexion.close()
+
+        catalogo = copy.copy(self)
+        catalogo.version = version
+        # Los caches son de este catálogo: el anterior sigue regresando sus platillos
+        catalogo.cache = CacheLRU(self.tamano_cache, 0)
+        catalogo.cache_fichas = CacheLRU(self.tamano_cache, 0)
+        catalogo.resumenes = list(self.resumenes)
+        cambiados = []
+        for platillo_id, platillo in ordenados:
+            posicion = self.posiciones[platillo_id]
+            anterior = self.resumenes[posicion]
+            resumen = {**_resumen(platillo), **({'alias': anterior['alias']} if 'alias' in anterior else {})}
+            catalogo.resumenes[posicion] = resumen
+            catalogo.num_disponibles += resumen['disponible'] - anterior['disponible']
+            catalogo.cache.guardar(platillo_id, platillo)
+            cambiados.append(resumen)
+
+        posiciones = [self.posiciones[platillo_id] for platillo_id, _ in ordenados]
+        catalogo.indice_busqueda = self.indice_busqueda.con_platillos(catalogo.resumenes)
+        catalogo.automata_menciones = self.automata_menciones.con_platillos(catalogo.resumenes)
+        catalogo.indice_facetas = self.indice_facetas.con_cambios(catalogo.resumenes, posiciones, version)
+        catalogo.plantillas = self.plantillas.con_cambios(catalogo.resumenes, cambiados)
+        return catalogo
+
+    def _conexion(self):
+        """Conexión de solo lectura del hilo actual"""
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None or self._local.pid != os.getpid():
+            conexion = sqlite3.connect(f"file:{self.ruta_db}?mode=ro", uri=True)
+            self._local.conexion = conexion
+            self._local.pid = os.getpid()
+        return conexion
+
+    def _consultar(self, sql, parametros=()):
+        """Platillos completos de una consulta que regresa la columna `datos`"""
+        return [json.loads(datos) for (datos,) in self._conexion().execute(sql, parametros)]
+
+    def __len__(self):
+        return len(self.resumenes)
+
+    def __iter__(self):
+        return iter(self.platillos)
+
+    @property
+    def platillos(self):
+        """Todo el menú en orden (lo lee completo: solo para /menu, que se cachea)"""
+        return self._consultar("SELECT datos FROM platillos ORDER BY posicion")
+
+    @property
+    def disponibles(self):
+        return self._consultar("SELECT datos FROM platillos WHERE disponible = 1 ORDER BY posicion")
+
+    def obtener(self, platillo_id):
+        """Platillo con ese id, o None"""
+        if not isinstance(platillo_id, int) or isinstance(platillo_id, bool):
+            return None
+        platillo = self.cache.obtener(platillo_id)
+        if platillo is None:
+            fila = self._conexion().execute(
+                "SELECT datos FROM platillos WHERE id = ?", (platillo_id,)
+            ).fetchone()
+            if fila is None:
+                return None
+            platillo = json.loads(fila[0])
+            self.cache.guardar(platillo_id, platillo)
+        return platillo
+
+    def categorias(self):
+        vistas = dict.fromkeys(r['categoria'] for r in self.resumenes)
+        return list(vistas)
+
+    def de_categoria(self, categoria):
+        return self._consultar(
+            "SELECT datos FROM platillos WHERE categoria IS ? ORDER BY posicion", (categoria,)
+        )
+
+    def con_bandera(self, bandera):
+        if bandera not in BANDERAS:
+            raise KeyError(bandera)
+        return self._consultar(f"SELECT datos FROM platillos WHERE {bandera} = 1 ORDER BY posicion")
+
+    def buscar(self, texto, umbral=0.6, limite=None):
+        """Búsqueda difusa por nombre: [(platillo, similitud), ...]"""
+        return [(self.obtener(r['id']), similitud)
+                for r, similitud in self.indice_busqueda.buscar(texto, umbral=umbral, limite=limite)]
+
+    def extraer_menciones(self, texto):
+        menciones = self.automata_menciones.buscar(texto)
+        for mencion in menciones:
+            mencion['platillo'] = self.obtener(mencion['platillo']['id'])
+        return menciones
+
+    def consultar(self, filtros=None, orden='menu', limite=20, cursor=None):
+        resultado = self.indice_facetas.consultar(filtros, orden=orden, limite=limite, cursor=cursor)
+        resultado['platillos'] = [self.obtener(r['id']) for r in resultado['platillos']]
+        return resultado
+
+    def ficha(self, platillo):
+        ficha = self.cache_fichas.obtener(platillo['id'])
+        if ficha is None:
+            ficha = formatear_platillo(platillo)
+            self.cache_fichas.guardar(platillo['id'], ficha)
+        return ficha
+
+    def respuesta_intencion(self, intencion):
+        return self.plantillas.respuestas.get(intencion)
+
+    def estadisticas(self):
+        return {
+            'total_platillos': len(self.resumenes),
+            'disponibles': self.num_disponibles,
+            'no_disponibles': len(self.resumenes) - self.num_disponibles,
+            'mas_vendidos': self.con_bandera('mas_vendido'),
+            'populares': self.con_bandera('popular'),
+        }
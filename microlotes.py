@@ -0,0 +1,123 @@
+"""
+Micro-lotes de inferencia - La Taza Loca
+Agrupa peticiones concurrentes para resolverlas con una sola llamada en lote
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+from hilos import HiloDemonio
+
+
+class AgrupadorMicrolotes:
+    """
+    Junta los elementos que llegan de varios hilos durante unos milisegundos
+    y los procesa con una sola llamada a `funcion_lote`.
+
+    `funcion_lote` recibe una lista de elementos y debe regresar una lista de
+    resultados del mismo tamaño y en el mismo orden.
+    """
+
+    def __init__(self, funcion_lote, espera_maxima_ms=5.0, tamano_maximo=32, muestras_espera=1000):
+        self.funcion_lote = funcion_lote
+        self.espera_maxima = espera_maxima_ms / 1000.0
+        self.tamano_maximo = max(1, tamano_maximo)
+
+        self._cola = deque()
+        self._condicion = threading.Condition()
+        self._hilo = HiloDemonio('microlotes', self._despachar)
+
+        # Estadísticas
+        self._tamanos_lote = Counter()
+        self._esperas = deque(maxlen=muestras_espera)
+        self._total_lotes = 0
+        self._total_elementos = 0
+
+    def enviar(self, elemento):
+        """Encola un elemento y espera su resultado"""
+        return self.enviar_varios([elemento])[0]
+
+    def enviar_varios(self, elementos):
+        """Encola varios elementos y espera sus resultados, en el mismo orden"""
+        futuros = []
+        with self._condicion:
+            self._hilo.asegurar()
+            ahora = time.perf_counter()
+            for elemento in elementos:
+                futuro = Future()
+                self._cola.append((elemento, futuro, ahora))
+                futuros.append(futuro)
+            self._condicion.notify()
+
+        return [futuro.result() for futuro in futuros]
+
+    def _tomar_lote(self):
+        """Espera el primer elemento y junta más hasta llenar el lote o agotar la espera"""
+        with self._condicion:
+            while not self._cola:
+                self._condicion.wait()
+
+            limite = time.perf_counter() + self.espera_maxima
+            while len(self._cola) < self.tamano_maximo:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                self._condicion.wait(restante)
+
+            cantidad = min(len(self._cola), self.tamano_maximo)
+            return [self._cola.popleft() for _ in range(cantidad)]
+
+    def _despachar(self):
+        """Ciclo del hilo de despacho"""
+        while True:
+            lote = self._tomar_lote()
+            inicio = time.perf_counter()
+
+            with self._condicion:
+                self._tamanos_lote[len(lote)] += 1
+                self._total_lotes += 1
+                self._total_elementos += len(lote)
+                for _, _, encolado in lote:
+                    self._esperas.append(inicio - encolado)
+
+            try:
+                resultados = self.funcion_lote([elemento for elemento, _, _ in lote])
+            except Exception as e:
+                for _, futuro, _ in lote:
+                    futuro.set_exception(e)
+                continue
+
+            for (_, futuro, _), resultado in zip(lote, resultados):
+                futuro.set_result(resultado)
+
+    def estadisticas(self):
+        """Distribución de tamaños de lote y de tiempos de espera en cola"""
+        with self._condicion:
+            esperas = sorted(self._esperas)
+            tamanos = dict(sorted(self._tamanos_lote.items()))
+            total_lotes = self._total_lotes
+            total_elementos = self._total_elementos
+
+        def percentil(p):
+            if not esperas:
+                return 0.0
+            idx = min(len(esperas) - 1, int(round(p / 100.0 * (len(esperas) - 1))))
+            return round(esperas[idx] * 1000, 3)
+
+        return {
+            'espera_maxima_ms': self.espera_maxima * 1000,
+            'tamano_maximo': self.tamano_maximo,
+            'total_lotes': total_lotes,
+            'total_elementos': total_elementos,
+            'tamano_promedio': round(total_elementos / total_lotes, 2) if total_lotes else 0,
+            'tamanos_lote': tamanos,
+            'espera_cola_ms': {
+                'p50': percentil(50),
+                'p90': percentil(90),
+                'p99': percentil(99),
+                'max': round(esperas[-1] * 1000, 3) if esperas else 0.0,
+                'muestras': len(esperas)
+            }
+        }
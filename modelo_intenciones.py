@@ -5,16 +5,41 @@ Versión PyTorch
 """
 
 import numpy as np
+import hashlib
 import json
 import pickle
 import os
-import re
-import random
+import time
 
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 from torch.utils.data import Dataset, DataLoader
 
+import configuracion
+import normalizacion
+import procesador_texto
+from clasificador_base import ClasificadorBase
+from motor_numpy import guardar_artefacto
+
+# Formato de la cache de características: subirlo si cambia la matriz que
+# arma preparar_datos_entrenamiento
+FORMATO_CACHE_CARACTERISTICAS = b'caracteristicas-v1'
+
+
+def huella_caracteristicas():
+    """
+    SHA-256 de lo que decide las características además de los datos: el
+    formato de la cache y el código de la normalización y del vocabulario
+    (normalizacion.py y procesador_texto.py). Si cambia cualquiera, las
+    matrices cacheadas con la huella anterior ya no se usan.
+    """
+    huella = hashlib.sha256(FORMATO_CACHE_CARACTERISTICAS + b'\0')
+    for modulo in (normalizacion, procesador_texto):
+        with open(modulo.__file__, 'rb') as f:
+            huella.update(hashlib.sha256(f.read()).digest())
+    return huella
+
 
 class RedNeuronalIntenciones(nn.Module):
     """Red neuronal para clasificar intenciones"""
@@ -40,6 +65,20 @@ class RedNeuronalIntenciones(nn.Module):
     
     def forward(self, x):
         return self.red(x)
+    
+    def forward_indices(self, indices, offsets):
+        """
+        Forward a partir de índices de tokens (bolsa de palabras dispersa).
+        
+        Equivale a multiplicar el vector BoW binario por la primera capa:
+        se suman las columnas de su matriz de pesos para los tokens presentes.
+        `indices` contiene los tokens de todos los textos concatenados y
+        `offsets` la posición donde empieza cada texto.
+        """
+        primera_capa = self.red[0]
+        x = F.embedding_bag(indices, primera_capa.weight.t(), offsets, mode='sum')
+        x = x + primera_capa.bias
+        return self.red[1:](x)
 
 
 class DatasetIntenciones(Dataset):
@@ -56,68 +95,20 @@ class DatasetIntenciones(Dataset):
         return self.X[idx], self.y[idx]
 
 
-class ProcesadorTexto:
-    """Procesa y tokeniza texto en español"""
-    
-    def __init__(self):
-        self.vocabulario = {}
-        self.idx_a_palabra = {}
-        self.vocab_size = 0
-    
-    def limpiar_texto(self, texto):
-        """Limpia y normaliza el texto"""
-        texto = texto.lower()
-        reemplazos = {
-            'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u',
-            'ü': 'u', 'ñ': 'n'
-        }
-        for acento, sin_acento in reemplazos.items():
-            texto = texto.replace(acento, sin_acento)
-        texto = re.sub(r'[^a-z0-9\s]', '', texto)
-        return texto.strip()
-    
-    def tokenizar(self, texto):
-        """Divide el texto en tokens (palabras)"""
-        texto_limpio = self.limpiar_texto(texto)
-        tokens = texto_limpio.split()
-        return tokens
-    
-    def construir_vocabulario(self, textos):
-        """Construye el vocabulario a partir de una lista de textos"""
-        todas_palabras = set()
-        for texto in textos:
-            tokens = self.tokenizar(texto)
-            todas_palabras.update(tokens)
-        
-        self.vocabulario = {palabra: idx for idx, palabra in enumerate(sorted(todas_palabras))}
-        self.idx_a_palabra = {idx: palabra for palabra, idx in self.vocabulario.items()}
-        self.vocab_size = len(self.vocabulario)
-        
-        print(f"Vocabulario construido: {self.vocab_size} palabras")
-        return self.vocabulario
-    
-    def texto_a_bow(self, texto):
-        """Convierte texto a Bag of Words (vector de características)"""
-        tokens = self.tokenizar(texto)
-        bow = np.zeros(self.vocab_size)
-        
-        for token in tokens:
-            if token in self.vocabulario:
-                bow[self.vocabulario[token]] = 1
-        
-        return bow
-
-
-class ClasificadorIntenciones:
+class ClasificadorIntenciones(ClasificadorBase):
     """Red neuronal para clasificar intenciones del usuario"""
     
-    def __init__(self, archivo_datos='datos_entrenamiento.json'):
+    def __init__(self, archivo_datos='datos_entrenamiento.json', vectorizacion_dispersa=True,
+                 tamano_cache=None, ttl_cache=None, cuantizacion=None):
+        super().__init__(tamano_cache, ttl_cache)
         self.archivo_datos = archivo_datos
-        self.procesador = ProcesadorTexto()
+        # Con vectorización dispersa la inferencia solo toca las palabras del
+        # mensaje, en lugar de un vector denso del tamaño del vocabulario
+        self.vectorizacion_dispersa = vectorizacion_dispersa
+        # 'int8': capas lineales cuantizadas dinámicamente al cargar el modelo
+        self.cuantizacion = configuracion.CUANTIZACION if cuantizacion is None else cuantizacion
         self.modelo = None
         self.intenciones = []
-        self.respuestas = {}
-        self.clases = []
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         
     def cargar_datos(self):
@@ -139,38 +130,229 @@ class ClasificadorIntenciones:
         """Prepara los datos para entrenar el modelo"""
         documentos = []
         etiquetas = []
-        todos_patrones = []
+        idx_clase = {tag: i for i, tag in enumerate(self.clases)}
         
         for intent in self.intenciones:
-            tag = intent['tag']
             for patron in intent['patrones']:
-                todos_patrones.append(patron)
                 documentos.append(patron)
-                etiquetas.append(tag)
+                etiquetas.append(idx_clase[intent['tag']])
         
-        self.procesador.construir_vocabulario(todos_patrones)
+        self.procesador.construir_vocabulario(documentos)
         
-        X = []
-        y = []
+        # Matriz BoW completa de una vez: filas y columnas de los unos
+        filas = []
+        columnas = []
+        for fila, doc in enumerate(documentos):
+            indices = self.procesador.texto_a_indices(doc)
+            filas.extend([fila] * len(indices))
+            columnas.extend(indices)
         
-        for i, doc in enumerate(documentos):
-            bow = self.procesador.texto_a_bow(doc)
-            X.append(bow)
-            y.append(self.clases.index(etiquetas[i]))
-        
-        X = np.array(X)
-        y = np.array(y)
+        X = np.zeros((len(documentos), self.procesador.vocab_size), dtype=np.float32)
+        X[filas, columnas] = 1
+        y = np.array(etiquetas, dtype=np.int64)
         
         print(f"Datos preparados: {len(X)} ejemplos, {self.procesador.vocab_size} características")
         return X, y
     
-    def entrenar(self, epochs=200, batch_size=8, learning_rate=0.001, verbose=1):
-        """Entrena el modelo"""
+    def cargar_caracteristicas(self, directorio_cache=None):
+        """
+        Carga los datos y la matriz de características, reutilizando la que
+        se guardó para el mismo contenido de `archivo_datos` y la misma
+        huella_caracteristicas (hash SHA-256).
+        """
+        directorio_cache = directorio_cache or configuracion.CACHE_ENTRENAMIENTO
+        
+        with open(self.archivo_datos, 'rb') as f:
+            contenido = f.read()
+        self.cargar_datos()
+        
+        # La normalización y el formato entran en la clave para invalidarla si cambian
+        huella = huella_caracteristicas()
+        huella.update(contenido)
+        archivo_cache = os.path.join(directorio_cache, f"{huella.hexdigest()}.npz")
+        
+        if os.path.exists(archivo_cache):
+            with np.load(archivo_cache, allow_pickle=False) as datos:
+                palabras = datos['vocabulario'].tolist()
+                X, y = datos['X'].astype(np.float32), datos['y']
+            self.procesador.vocabulario = {palabra: idx for idx, palabra in enumerate(palabras)}
+            self.procesador.idx_a_palabra = dict(enumerate(palabras))
+            self.procesador.vocab_size = len(palabras)
+            print(f"Características desde cache: {len(X)} ejemplos, {self.procesador.vocab_size} características")
+            return X, y
+        
+        X, y = self.preparar_datos_entrenamiento()
+        
+        os.makedirs(directorio_cache, exist_ok=True)
+        palabras = sorted(self.procesador.vocabulario, key=self.procesador.vocabulario.get)
+        temporal = archivo_cache + f".{os.getpid()}.tmp"
+        with open(temporal, 'wb') as f:
+            np.savez(f, X=X.astype(np.uint8), y=y, vocabulario=np.array(palabras, dtype=np.str_))
+        os.replace(temporal, archivo_cache)
+        
+        return X, y
+    
+    @staticmethod
+    def dividir_validacion(y, fraccion, generador):
+        """
+        Separa índices de entrenamiento y validación estratificados por clase.
+        Las clases con menos de 3 ejemplos se quedan completas en entrenamiento.
+        """
+        entrenamiento = []
+        validacion = []
+        for clase in np.unique(y):
+            indices = np.flatnonzero(y == clase)
+            generador.shuffle(indices)
+            n_validacion = int(round(len(indices) * fraccion)) if len(indices) >= 3 else 0
+            validacion.extend(indices[:n_validacion])
+            entrenamiento.extend(indices[n_validacion:])
+        return np.array(sorted(entrenamiento)), np.array(sorted(validacion))
+    
+    def entrenar_rapido(self, max_epochs=1000, batch_size=None, learning_rate=0.005,
+                        fraccion_validacion=0.15, paciencia=100, reentrenar_completo=True,
+                        semilla=0, verbose=1, progreso=None):
+        """
+        Entrenamiento vectorizado con parada temprana
+        
+        Usa las características cacheadas, mantiene todo como tensores en el
+        dispositivo y, por defecto, da un paso por época con el lote completo
+        (`batch_size` permite lotes grandes). Se detiene cuando la precisión
+        de validación (y, a igual precisión, la pérdida) deja de mejorar
+        durante `paciencia` épocas y, si
+        `reentrenar_completo`, vuelve a entrenar con todos los datos durante
+        el número de épocas que resultó mejor.
+        
+        Retorna un diccionario con precisión, épocas y tiempo de reloj.
+        """
+        inicio = time.perf_counter()
+        torch.manual_seed(semilla)
+        generador = np.random.default_rng(semilla)
+        
+        X, y = self.cargar_caracteristicas()
+        self.construir_patrones_exactos(self.intenciones)
+        X_todo = torch.from_numpy(X).to(self.device)
+        y_todo = torch.from_numpy(y).to(self.device)
+        
+        idx_entrenamiento, idx_validacion = self.dividir_validacion(y, fraccion_validacion, generador)
+        hay_validacion = len(idx_validacion) > 0
+        
+        def ajustar(X_ent, y_ent, epochs, X_val=None, y_val=None):
+            modelo = RedNeuronalIntenciones(
+                input_size=self.procesador.vocab_size,
+                hidden_size=128,
+                output_size=len(self.clases)
+            ).to(self.device)
+            criterion = nn.CrossEntropyLoss()
+            optimizer = torch.optim.Adam(modelo.parameters(), lr=learning_rate)
+            n = len(X_ent)
+            tamano = n if not batch_size else min(batch_size, n)
+            
+            mejor = (-1.0, float('-inf'))
+            mejor_epoca = epochs
+            mejor_estado = None
+            sin_mejora = 0
+            epoca = 0
+            
+            for epoca in range(1, epochs + 1):
+                modelo.train()
+                orden = torch.randperm(n, device=self.device) if tamano < n else None
+                for i in range(0, n, tamano):
+                    if orden is None:
+                        batch_X, batch_y = X_ent, y_ent
+                    else:
+                        sel = orden[i:i + tamano]
+                        batch_X, batch_y = X_ent[sel], y_ent[sel]
+                    loss = criterion(modelo(batch_X), batch_y)
+                    optimizer.zero_grad()
+                    loss.backward()
+                    optimizer.step()
+                
+                if X_val is None:
+                    if progreso:
+                        progreso(epoca, epochs, loss.item(), None)
+                    continue
+                
+                # Una sola sincronización por época
+                modelo.eval()
+                with torch.no_grad():
+                    salida_val = modelo(X_val)
+                    loss_val = criterion(salida_val, y_val).item()
+                
+                # Criterio: precisión de validación y, a igual precisión, menor pérdida
+                precision_val = (salida_val.argmax(1) == y_val).float().mean().item()
+                puntaje = (precision_val, -loss_val)
+                if puntaje[0] > mejor[0] or (puntaje[0] == mejor[0] and puntaje[1] > mejor[1] + 1e-4):
+                    mejor = puntaje
+                    mejor_epoca = epoca
+                    mejor_estado = {k: v.detach().clone() for k, v in modelo.state_dict().items()}
+                    sin_mejora = 0
+                else:
+                    sin_mejora += 1
+                
+                if progreso:
+                    progreso(epoca, epochs, loss_val, precision_val)
+                
+                if sin_mejora >= paciencia:
+                    break
+            
+            if mejor_estado is not None:
+                modelo.load_state_dict(mejor_estado)
+            return modelo, mejor_epoca, epoca
+        
+        def precision(modelo, X_eval, y_eval):
+            modelo.eval()
+            with torch.no_grad():
+                return (modelo(X_eval).argmax(1) == y_eval).float().mean().item()
+        
+        if hay_validacion:
+            sel_ent = torch.from_numpy(idx_entrenamiento).to(self.device)
+            sel_val = torch.from_numpy(idx_validacion).to(self.device)
+            modelo, mejor_epoca, epocas_corridas = ajustar(
+                X_todo[sel_ent], y_todo[sel_ent], max_epochs, X_todo[sel_val], y_todo[sel_val]
+            )
+            precision_validacion = precision(modelo, X_todo[sel_val], y_todo[sel_val])
+        else:
+            modelo, mejor_epoca, epocas_corridas = ajustar(X_todo, y_todo, max_epochs)
+            precision_validacion = None
+        
+        if hay_validacion and reentrenar_completo:
+            modelo, _, _ = ajustar(X_todo, y_todo, mejor_epoca)
+        
+        self.modelo = modelo
+        self.modelo.eval()
+        self.cache_predicciones.limpiar()
+        
+        resultado = {
+            'precision_entrenamiento': precision(self.modelo, X_todo, y_todo),
+            'precision_validacion': precision_validacion,
+            'mejor_epoca': mejor_epoca,
+            'epocas_corridas': epocas_corridas,
+            'ejemplos_validacion': len(idx_validacion),
+            'segundos': time.perf_counter() - inicio
+        }
+        
+        if verbose:
+            print(f"Entrenamiento rápido: {resultado['epocas_corridas']} épocas "
+                  f"(mejor: {resultado['mejor_epoca']}) en {resultado['segundos']:.2f} s")
+            print(f"Precisión entrenamiento: {resultado['precision_entrenamiento']:.2%}")
+            if precision_validacion is not None:
+                print(f"Precisión validación: {precision_validacion:.2%}")
+        
+        return resultado
+    
+    def entrenar(self, epochs=200, batch_size=8, learning_rate=0.001, verbose=1, progreso=None):
+        """
+        Entrena el modelo
+        
+        `progreso`, si se indica, se llama al final de cada época como
+        progreso(epoca, epochs, loss, precision).
+        """
         print("Cargando datos...")
         self.cargar_datos()
         
         print("Preparando datos de entrenamiento...")
         X, y = self.preparar_datos_entrenamiento()
+        self.construir_patrones_exactos(self.intenciones)
         
         # Crear dataset y dataloader
         dataset = DatasetIntenciones(X, y)
@@ -183,6 +365,7 @@ class ClasificadorIntenciones:
             hidden_size=128,
             output_size=len(self.clases)
         ).to(self.device)
+        self.cache_predicciones.limpiar()
         
         # Configurar entrenamiento
         criterion = nn.CrossEntropyLoss()
@@ -218,6 +401,9 @@ class ClasificadorIntenciones:
             
             accuracy = correct / total
             
+            if progreso:
+                progreso(epoch + 1, epochs, total_loss / len(dataloader), accuracy)
+            
             if verbose and (epoch + 1) % 20 == 0:
                 print(f"Época {epoch+1}/{epochs} - Loss: {total_loss/len(dataloader):.4f} - Precisión: {accuracy:.2%}")
         
@@ -239,14 +425,44 @@ class ClasificadorIntenciones:
             'idx_a_palabra': self.procesador.idx_a_palabra,
             'vocab_size': self.procesador.vocab_size,
             'clases': self.clases,
-            'respuestas': self.respuestas
+            'respuestas': self.respuestas,
+            'patrones_exactos': self.patrones_exactos
         }
         
         with open(os.path.join(ruta, 'datos_auxiliares.pkl'), 'wb') as f:
             pickle.dump(datos_auxiliares, f)
         
+        # Artefacto para servir sin PyTorch
+        self.exportar_modelo(ruta)
+        
         print(f"Modelo guardado en: {ruta}/")
     
+    def exportar_modelo(self, ruta='modelo_chatbot'):
+        """
+        Exporta pesos, vocabulario, clases y respuestas a `ruta/modelo.npz`,
+        el artefacto versionado que carga `ClasificadorIntencionesNumpy`.
+        """
+        if self.modelo is None:
+            raise ValueError("El modelo no está cargado. Entrena o carga un modelo primero.")
+        
+        if self.esta_cuantizado():
+            raise ValueError("No se puede exportar un modelo cuantizado. Carga el modelo fp32 para exportarlo.")
+        
+        capas = [
+            (
+                capa.weight.detach().cpu().numpy().T,
+                capa.bias.detach().cpu().numpy()
+            )
+            for capa in self.modelo.red if isinstance(capa, nn.Linear)
+        ]
+        
+        destino = guardar_artefacto(
+            ruta, capas, self.procesador.vocabulario, self.clases, self.respuestas,
+            self.patrones_exactos
+        )
+        print(f"Artefacto de inferencia exportado: {destino}")
+        return destino
+    
     def cargar_modelo(self, ruta='modelo_chatbot'):
         """Carga un modelo previamente entrenado"""
         # Cargar datos auxiliares primero
@@ -259,6 +475,13 @@ class ClasificadorIntenciones:
         self.clases = datos['clases']
         self.respuestas = datos['respuestas']
         
+        # Los modelos guardados antes de la tabla de patrones exactos no la
+        # traen; no se reconstruye desde el JSON actual porque podría no ser
+        # el mismo con el que se entrenó la red
+        self.patrones_exactos = datos.get('patrones_exactos', {})
+        if not self.patrones_exactos:
+            print("Modelo sin tabla de patrones exactos: reentrena para activar el camino rápido")
+        
         # Crear y cargar modelo
         self.modelo = RedNeuronalIntenciones(
             input_size=self.procesador.vocab_size,
@@ -269,53 +492,70 @@ class ClasificadorIntenciones:
         self.modelo.load_state_dict(torch.load(os.path.join(ruta, 'modelo.pth'), map_location=self.device))
         self.modelo.eval()
         
+        if self.cuantizacion == 'int8':
+            self.cuantizar_modelo()
+        
+        self.cache_predicciones.limpiar()
+        
         print(f"Modelo cargado desde: {ruta}/")
     
-    def predecir_intencion(self, texto, umbral_confianza=0.10):
-        """Predice la intención de un texto"""
-        if self.modelo is None:
-            raise ValueError("El modelo no está cargado. Entrena o carga un modelo primero.")
+    def cuantizar_modelo(self):
+        """
+        Cuantiza dinámicamente a int8 las capas lineales (solo CPU).
+        
+        Con vectorización dispersa la primera capa se deja en fp32: se usa como
+        suma de columnas (embedding bag), no como multiplicación de matrices.
+        """
+        if self.device.type != 'cpu':
+            raise ValueError("La cuantización dinámica int8 solo está disponible en CPU")
+        
+        capas = {
+            nombre for nombre, capa in self.modelo.named_modules()
+            if isinstance(capa, nn.Linear)
+        }
+        if self.vectorizacion_dispersa:
+            capas.discard('red.0')
         
+        self.modelo = torch.ao.quantization.quantize_dynamic(self.modelo, capas, dtype=torch.qint8)
+        self.modelo.eval()
+        self.cache_predicciones.limpiar()
+        return self.modelo
+    
+    def esta_cuantizado(self):
+        """Indica si alguna capa del modelo está cuantizada"""
+        return self.modelo is not None and any(
+            isinstance(capa, torch.ao.nn.quantized.dynamic.Linear)
+            for capa in self.modelo.modules()
+        )
+    
+    def esta_cargado(self):
+        return self.modelo is not None
+    
+    def _inferir_indices(self, lista_indices):
         self.modelo.eval()
-        
-        # Convertir texto a vector
-        bow = self.procesador.texto_a_bow(texto)
-        bow_tensor = torch.FloatTensor([bow]).to(self.device)
         
         # Hacer predicción
         with torch.no_grad():
-            outputs = self.modelo(bow_tensor)
-            probabilidades = torch.softmax(outputs, dim=1)[0]
-        
-        # Obtener la intención con mayor probabilidad
-        confianza, idx_max = torch.max(probabilidades, 0)
-        confianza = confianza.item()
-        intencion = self.clases[idx_max.item()]
-        
-        if confianza < umbral_confianza:
-            return None, confianza
-        
-        return intencion, confianza
-    
-    def obtener_respuesta(self, texto):
-        """Obtiene una respuesta para el texto del usuario"""
-        intencion, confianza = self.predecir_intencion(texto)
-        
-        if intencion is None:
-            return {
-                'respuesta': "Lo siento, no entendí bien. ¿Quieres ver el **menú**, **precios** o **hacer un pedido**? 😄",
-                'intencion': 'desconocida',
-                'confianza': float(confianza)
-            }
-        
-        respuesta = random.choice(self.respuestas[intencion])
-        
-        return {
-            'respuesta': respuesta,
-            'intencion': intencion,
-            'confianza': float(confianza)
-        }
-
+            if self.vectorizacion_dispersa:
+                indices = []
+                offsets = []
+                for indices_texto in lista_indices:
+                    offsets.append(len(indices))
+                    indices.extend(indices_texto)
+                indices_tensor = torch.tensor(indices, dtype=torch.long, device=self.device)
+                offsets_tensor = torch.tensor(offsets, dtype=torch.long, device=self.device)
+                outputs = self.modelo.forward_indices(indices_tensor, offsets_tensor)
+            else:
+                bows = np.zeros((len(lista_indices), self.procesador.vocab_size))
+                for fila, indices_texto in enumerate(lista_indices):
+                    bows[fila, indices_texto] = 1
+                bow_tensor = torch.from_numpy(bows).float().to(self.device)
+                outputs = self.modelo(bow_tensor)
+            probabilidades = torch.softmax(outputs, dim=1)
+        
+        # Obtener la intención con mayor probabilidad de cada texto
+        confianzas, indices_max = torch.max(probabilidades, 1)
+        return confianzas.tolist(), indices_max.tolist()
 
 if __name__ == "__main__":
     print("=== Probando el Clasificador de Intenciones (PyTorch) ===\n")
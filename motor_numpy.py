@@ -0,0 +1,152 @@
+"""
+Motor de Inferencia NumPy para el Clasificador de Intenciones
+La Taza Loca - Chatbot Inteligente
+Ejecuta la red exportada sin importar PyTorch (menos memoria y arranque más rápido)
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from clasificador_base import ClasificadorBase
+
+
+ARCHIVO_ARTEFACTO = 'modelo.npz'
+FORMATO_VERSION = 1
+
+
+def _calcular_checksum(arreglos):
+    """SHA-256 sobre el nombre, tipo, forma y contenido de cada arreglo"""
+    h = hashlib.sha256()
+    for nombre in sorted(arreglos):
+        arreglo = np.ascontiguousarray(arreglos[nombre])
+        h.update(nombre.encode('utf-8'))
+        h.update(arreglo.dtype.str.encode('utf-8'))
+        h.update(str(arreglo.shape).encode('utf-8'))
+        h.update(arreglo.tobytes())
+    return h.hexdigest()
+
+
+def guardar_artefacto(ruta, capas, vocabulario, clases, respuestas, patrones_exactos=None):
+    """
+    Escribe el artefacto de inferencia en `ruta/modelo.npz`.
+
+    `capas` es una lista de tuplas (pesos, sesgo) con los pesos en forma
+    (entradas, salidas) y `patrones_exactos` la tabla de patrones de
+    entrenamiento normalizados a índice de clase. Todo se guarda como arreglos NumPy (sin pickle)
+    junto con la versión del formato y un checksum del contenido.
+    """
+    os.makedirs(ruta, exist_ok=True)
+
+    palabras = sorted(vocabulario, key=vocabulario.get)
+    arreglos = {
+        'formato_version': np.array(FORMATO_VERSION, dtype=np.int64),
+        'num_capas': np.array(len(capas), dtype=np.int64),
+        'vocabulario': np.array(palabras, dtype=np.str_),
+        'clases': np.array(clases, dtype=np.str_),
+        'respuestas': np.array(json.dumps(respuestas, ensure_ascii=False), dtype=np.str_),
+    }
+    patrones = sorted((patrones_exactos or {}).items())
+    arreglos['patrones_exactos'] = np.array([p for p, _ in patrones], dtype=np.str_)
+    arreglos['patrones_exactos_clase'] = np.array([c for _, c in patrones], dtype=np.int64)
+    for i, (pesos, sesgo) in enumerate(capas):
+        arreglos[f'pesos_{i}'] = np.ascontiguousarray(pesos, dtype=np.float32)
+        arreglos[f'sesgo_{i}'] = np.ascontiguousarray(sesgo, dtype=np.float32)
+
+    arreglos['checksum'] = np.array(_calcular_checksum(arreglos), dtype=np.str_)
+
+    # Escritura atómica: nunca dejar un artefacto a medias
+    destino = os.path.join(ruta, ARCHIVO_ARTEFACTO)
+    temporal = destino + '.tmp'
+    with open(temporal, 'wb') as f:
+        np.savez(f, **arreglos)
+    os.replace(temporal, destino)
+
+    return destino
+
+
+def cargar_artefacto(ruta):
+    """Lee y valida el artefacto de inferencia; regresa un diccionario de arreglos"""
+    archivo = os.path.join(ruta, ARCHIVO_ARTEFACTO)
+    with np.load(archivo, allow_pickle=False) as datos:
+        arreglos = {nombre: datos[nombre] for nombre in datos.files}
+
+    version = int(arreglos['formato_version'])
+    if version != FORMATO_VERSION:
+        raise ValueError(f"Versión de artefacto no soportada: {version} (se esperaba {FORMATO_VERSION})")
+
+    checksum = str(arreglos.pop('checksum'))
+    if _calcular_checksum(arreglos) != checksum:
+        raise ValueError(f"Checksum inválido en {archivo}: el artefacto está corrupto")
+
+    arreglos['checksum'] = checksum
+    return arreglos
+
+
+def artefacto_disponible(ruta):
+    """Indica si `ruta` contiene un artefacto exportado"""
+    return os.path.exists(os.path.join(ruta, ARCHIVO_ARTEFACTO))
+
+
+class ClasificadorIntencionesNumpy(ClasificadorBase):
+    """Clasificador de intenciones que solo necesita NumPy para predecir"""
+
+    def __init__(self, tamano_cache=None, ttl_cache=None):
+        super().__init__(tamano_cache, ttl_cache)
+        self.capas = None
+        self.checksum = None
+
+    def esta_cargado(self):
+        return self.capas is not None
+
+    def cargar_modelo(self, ruta='modelo_chatbot'):
+        """Carga el artefacto exportado con `ClasificadorIntenciones.exportar_modelo`"""
+        datos = cargar_artefacto(ruta)
+
+        palabras = datos['vocabulario'].tolist()
+        self.procesador.vocabulario = {palabra: idx for idx, palabra in enumerate(palabras)}
+        self.procesador.idx_a_palabra = dict(enumerate(palabras))
+        self.procesador.vocab_size = len(palabras)
+        self.clases = datos['clases'].tolist()
+        self.respuestas = json.loads(str(datos['respuestas']))
+        self.patrones_exactos = dict(zip(
+            datos.get('patrones_exactos', np.array([], dtype=np.str_)).tolist(),
+            datos.get('patrones_exactos_clase', np.array([], dtype=np.int64)).tolist()
+        ))
+
+        self.capas = []
+        for i in range(int(datos['num_capas'])):
+            pesos, sesgo = datos[f'pesos_{i}'], datos[f'sesgo_{i}']
+            # Solo lectura: con precarga en gunicorn las páginas se comparten entre workers
+            pesos.flags.writeable = False
+            sesgo.flags.writeable = False
+            self.capas.append((pesos, sesgo))
+        self.checksum = datos['checksum']
+        self.cache_predicciones.limpiar()
+
+        print(f"Modelo NumPy cargado desde: {ruta}/")
+
+    def _inferir_indices(self, lista_indices):
+        pesos_entrada, sesgo_entrada = self.capas[0]
+
+        # Primera capa dispersa: sumar las filas de las palabras presentes
+        x = np.empty((len(lista_indices), pesos_entrada.shape[1]), dtype=np.float32)
+        for fila, indices in enumerate(lista_indices):
+            x[fila] = pesos_entrada[indices].sum(axis=0)
+        x += sesgo_entrada
+
+        # Capas ocultas (ReLU; el Dropout no aplica en inferencia)
+        for pesos, sesgo in self.capas[1:]:
+            np.maximum(x, 0, out=x)
+            x = x @ pesos + sesgo
+
+        # Softmax estable
+        x -= x.max(axis=1, keepdims=True)
+        np.exp(x, out=x)
+        probabilidades = x / x.sum(axis=1, keepdims=True)
+
+        indices_max = probabilidades.argmax(axis=1)
+        confianzas = probabilidades[np.arange(len(lista_indices)), indices_max]
+        return confianzas.tolist(), indices_max.tolist()
@@ -0,0 +1,48 @@
+"""
+Normalización de Texto - La Taza Loca
+Única implementación de limpieza y tokenización que comparten la búsqueda
+en el menú, el clasificador de intenciones y el entrenamiento
+"""
+
+from functools import lru_cache
+
+_ACENTOS = {
+    'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u',
+    'ü': 'u', 'ñ': 'n'
+}
+_PERMITIDOS = 'abcdefghijklmnopqrstuvwxyz0123456789'
+
+
+class _TablaTraduccion(dict):
+    """
+    Tabla para `str.translate` que se completa sola: el primer carácter no
+    visto se clasifica (se conserva si es [a-z0-9] o espacio, se elimina en
+    otro caso) y queda memorizado, así que la tabla nunca hay que
+    enumerarla completa de antemano.
+    """
+
+    def __missing__(self, codigo):
+        caracter = chr(codigo)
+        valor = codigo if caracter in _PERMITIDOS or caracter.isspace() else None
+        self[codigo] = valor
+        return valor
+
+
+_TABLA = _TablaTraduccion({ord(acento): sin_acento for acento, sin_acento in _ACENTOS.items()})
+_TABLA.update({ord(c): ord(c) for c in _PERMITIDOS})
+
+
+def limpiar_texto(texto):
+    """Minúsculas, sin acentos y solo [a-z0-9] y espacios"""
+    return texto.lower().translate(_TABLA).strip()
+
+
+@lru_cache(maxsize=8192)
+def tokenizar(texto):
+    """Divide el texto limpio en tokens (memorizado; regresa una tupla)"""
+    return tuple(limpiar_texto(texto).split())
+
+
+def normalizar(texto):
+    """Forma canónica de un texto: tokens limpios separados por un espacio"""
+    return ' '.join(tokenizar(texto))
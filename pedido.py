@@ -0,0 +1,107 @@
+"""
+Pedido y sus Platillos - Fonda Doña Magui
+Carrito con los platillos indexados por id y el total llevado al día en
+cada cambio; se convierte al mismo JSON que regresan los endpoints /pedido/*
+"""
+
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class ItemPedido:
+    id: int
+    nombre: str
+    precio: float
+    cantidad: int
+    subtotal: float
+
+    def a_dict(self):
+        return {
+            'id': self.id,
+            'nombre': self.nombre,
+            'precio': self.precio,
+            'cantidad': self.cantidad,
+            'subtotal': self.subtotal
+        }
+
+
+@dataclass(slots=True)
+class Pedido:
+    """
+    `items` guarda {platillo_id: ItemPedido} en el orden en que se agregaron,
+    así que encontrar, cambiar o quitar un platillo no recorre el carrito, y
+    `total` se corrige con la diferencia de cada cambio en lugar de volver a
+    sumar todos los subtotales.
+    """
+    id: str
+    fecha_creacion: str
+    items: dict = field(default_factory=dict)
+    total: float = 0
+    estado: str = 'en_proceso'
+    datos_cliente: dict = field(default_factory=dict)
+    fecha_finalizacion: str = None
+
+    def agregar(self, platillo, cantidad=1):
+        """Agrega `cantidad` del platillo (suma a la que ya haya en el carrito)"""
+        item = self.items.get(platillo['id'])
+        if item is None:
+            item = ItemPedido(platillo['id'], platillo['nombre'], platillo['precio'], cantidad,
+                              platillo['precio'] * cantidad)
+            self.items[item.id] = item
+            self.total += item.subtotal
+        else:
+            anterior = item.subtotal
+            item.cantidad += cantidad
+            item.subtotal = item.cantidad * platillo['precio']
+            self.total += item.subtotal - anterior
+        return item
+
+    def quitar(self, platillo_id):
+        item = self.items.pop(platillo_id, None)
+        if item is not None:
+            # Con el carrito vacío el total es exactamente 0, aun con precios decimales
+            self.total = self.total - item.subtotal if self.items else 0
+        return item
+
+    def actualizar_cantidad(self, platillo_id, cantidad):
+        """Cambia la cantidad de un platillo del carrito; 0 o menos lo quita"""
+        item = self.items.get(platillo_id)
+        if item is None:
+            return None
+        if cantidad <= 0:
+            return self.quitar(platillo_id)
+        anterior = item.subtotal
+        item.cantidad = cantidad
+        item.subtotal = item.precio * cantidad
+        self.total += item.subtotal - anterior
+        return item
+
+    def vaciar(self):
+        self.items = {}
+        self.total = 0
+
+    def a_dict(self):
+        """El pedido con la forma de siempre: 'items' como lista, en orden"""
+        datos = {
+            'id': self.id,
+            'items': [item.a_dict() for item in self.items.values()],
+            'total': self.total,
+            'fecha_creacion': self.fecha_creacion,
+            'estado': self.estado,
+            'datos_cliente': dict(self.datos_cliente)
+        }
+        if self.fecha_finalizacion is not None:
+            datos['fecha_finalizacion'] = self.fecha_finalizacion
+        return datos
+
+    @classmethod
+    def desde_dict(cls, datos):
+        return cls(
+            id=datos['id'],
+            fecha_creacion=datos['fecha_creacion'],
+            items={item['id']: ItemPedido(**item) for item in datos['items']},
+            total=datos['total'],
+            estado=datos['estado'],
+            datos_cliente=datos['datos_cliente'],
+            fecha_finalizacion=datos.get('fecha_finalizacion')
+        )
@@ -0,0 +1,242 @@
+"""
+Plantillas de Respuesta - La Taza Loca
+Respuestas de intenciones armadas con el menú vigente (platillos, precios,
+ofertas y recomendaciones) en lugar de textos escritos a mano
+"""
+
+import copy
+from bisect import bisect_left, insort
+from urllib.parse import quote
+
+import configuracion
+import normalizacion
+
+EMOJI_CATEGORIA = {'DESAYUNOS': '🍳', 'ANTOJITOS': '🌮', 'COMIDAS': '🍛'}
+EMOJI_DEFECTO = '🍽️'
+
+PIE_PEDIDO = ('💡 **Para PEDIR:** Escribe "quiero pedir [platillo]"\n'
+              '📱 **WhatsApp:** 664-563-16-75')
+
+PLANTILLAS = {
+    'menu_completo': "Aquí va el **menú de {restaurante}** 🌮🔥\n\n{menu_por_categoria}\n{pie}",
+    'precios': "{texto_precios} 💛\n\n¿Cuál te interesa?\n\n"
+               "📋 Escribe **'menú'** para ver todos\n🛒 Escribe **'pedir'** para ordenar",
+    'promociones': "{texto_ofertas}\n\n{pie}",
+    'recomendacion': "🔥 Te recomiendo:\n\n{texto_recomendaciones}\n\n{pie}",
+}
+# menu_<categoria> (p. ej. menu_desayunos) se arma con los platillos de esa categoría
+PLANTILLA_CATEGORIA = "**{categoria} {emoji}**\n{lista}\n\n{pie}"
+
+# Con menús grandes una respuesta de chat no puede listar todo: por categoría
+# (y en promociones) se listan los primeros y se manda al resto a /menu/consulta
+LISTADO_MAXIMO = 25
+# Banderas de los platillos que se destacan en promociones y recomendaciones
+BANDERAS_DESTACADAS = ('oferta', 'mas_vendido', 'popular')
+
+
+def formatear_platillo(platillo):
+    """Formatea la información de un platillo"""
+    disponible = "✓ Disponible" if platillo['disponible'] else "✗ No disponible"
+    precio_final = platillo['precio']
+
+    info = f"\n🍽️ **{platillo['nombre']}**\n"
+    info += f"{platillo['descripcion']}\n"
+    info += f"💰 Precio: ${precio_final} pesos\n"
+    info += f"📦 Estado: {disponible}"
+
+    if platillo.get('oferta'):
+        info += f"\n🎉 ¡EN OFERTA! Descuento: {platillo['descuento']}%"
+
+    if platillo.get('mas_vendido'):
+        info += "\n⭐ ¡Más vendido!"
+
+    if platillo.get('popular'):
+        info += "\n🔥 ¡Popular!"
+
+    return info
+
+
+def _precio(valor):
+    return f"${valor:g}" if isinstance(valor, float) else f"${valor}"
+
+
+def _renglon(platillo):
+    """• Nombre - $precio con las marcas de más vendido, popular y oferta"""
+    marcas = ''.join(marca for bandera, marca in
+                     (('mas_vendido', ' ⭐'), ('popular', ' 🔥'), ('oferta', ' 🎉'))
+                     if platillo.get(bandera))
+    return f"• {platillo['nombre']} - {_precio(platillo['precio'])}{marcas}"
+
+
+def _ver_mas(restantes, consulta):
+    return f"• … y {restantes} más: ver /menu/consulta?{consulta}"
+
+
+def _mover(lista, anterior, actual, estaba, esta):
+    """Quita `anterior` de una lista ordenada si estaba y agrega `actual` si está"""
+    if estaba:
+        del lista[bisect_left(lista, anterior)]
+    if esta:
+        insort(lista, actual)
+
+
+class PlantillasMenu:
+    """
+    Respuestas de intenciones y fichas de platillos para un menú. Todo se
+    arma una sola vez al construirse (una vez por versión del menú): en
+    cada mensaje solo se consulta un diccionario. Con
+    `precalcular_fichas=False` las fichas quedan a cargo del catálogo.
+
+    `platillos` es el menú en orden; basta un resumen de cada platillo (id,
+    nombre, categoría, precio, descuento y banderas), así que el catálogo
+    en SQLite no tiene que leer sus platillos completos. Cada lista muestra
+    a lo más LISTADO_MAXIMO platillos.
+
+    Lo que las respuestas necesitan del menú se guarda ya ordenado: el
+    renglón de cada platillo disponible (`renglones`), las posiciones de los
+    disponibles (en todo el menú y por categoría) y de los destacados de
+    cada bandera, los precios de los disponibles y la lista de cada
+    categoría (`listas`). `con_cambios` corrige solo lo que tocan los
+    platillos que cambiaron, sin recorrer el menú.
+    """
+
+    def __init__(self, platillos, precalcular_fichas=True):
+        self.platillos = platillos
+        self.fichas = {}
+        if precalcular_fichas:
+            self.fichas = {p['id']: formatear_platillo(p) for p in platillos}
+        self.posiciones = {p['id']: posicion for posicion, p in enumerate(platillos)}
+        self.renglones = {p['id']: _renglon(p) for p in platillos if p.get('disponible')}
+        self.disponibles = [posicion for posicion, p in enumerate(platillos) if p.get('disponible')]
+        self.por_categoria = {p.get('categoria'): [] for p in platillos}
+        for posicion in self.disponibles:
+            self.por_categoria[platillos[posicion].get('categoria')].append(posicion)
+        self.listas = {categoria: self._lista(categoria) for categoria in self.por_categoria}
+
+        self.precios = sorted(platillos[posicion]['precio'] for posicion in self.disponibles)
+        self.destacados = {
+            bandera: [posicion for posicion in self.disponibles if platillos[posicion].get(bandera)]
+            for bandera in BANDERAS_DESTACADAS
+        }
+        self.respuestas = self._armar_respuestas()
+
+    def con_cambios(self, platillos, cambiados):
+        """
+        Plantillas del menú `platillos`, que difiere del de estas plantillas
+        solo en los platillos `cambiados` (nunca en nombre ni categoría)
+        """
+        nuevo = copy.copy(self)
+        nuevo.platillos = platillos
+        if self.fichas:
+            nuevo.fichas = dict(self.fichas)
+        nuevo.renglones = dict(self.renglones)
+        nuevo.disponibles = list(self.disponibles)
+        categorias = {p.get('categoria') for p in cambiados}
+        nuevo.por_categoria = dict(self.por_categoria)
+        for categoria in categorias:
+            nuevo.por_categoria[categoria] = list(self.por_categoria[categoria])
+        nuevo.precios = list(self.precios)
+        nuevo.destacados = {bandera: list(lista) for bandera, lista in self.destacados.items()}
+
+        for platillo in cambiados:
+            posicion = self.posiciones[platillo['id']]
+            anterior = self.platillos[posicion]
+            estaba, esta = bool(anterior.get('disponible')), bool(platillo.get('disponible'))
+            if self.fichas:
+                nuevo.fichas[platillo['id']] = formatear_platillo(platillo)
+            if esta:
+                nuevo.renglones[platillo['id']] = _renglon(platillo)
+            else:
+                nuevo.renglones.pop(platillo['id'], None)
+
+            _mover(nuevo.disponibles, posicion, posicion, estaba, esta)
+            _mover(nuevo.por_categoria[platillo.get('categoria')], posicion, posicion, estaba, esta)
+            _mover(nuevo.precios, anterior['precio'], platillo['precio'], estaba, esta)
+            for bandera, lista in nuevo.destacados.items():
+                _mover(lista, posicion, posicion, estaba and bool(anterior.get(bandera)),
+                       esta and bool(platillo.get(bandera)))
+
+        nuevo.listas = dict(self.listas)
+        for categoria in categorias:
+            nuevo.listas[categoria] = nuevo._lista(categoria)
+        nuevo.respuestas = nuevo._armar_respuestas()
+        return nuevo
+
+    def _lista(self, categoria):
+        """Renglones de los platillos disponibles de una categoría ('' si no hay)"""
+        disponibles = self.por_categoria.get(categoria, [])
+        renglones = [self.renglones[self.platillos[posicion]['id']] for posicion in disponibles[:LISTADO_MAXIMO]]
+        if len(disponibles) > LISTADO_MAXIMO:
+            consulta = f"disponible=true&categoria={quote(categoria or '')}"
+            renglones.append(_ver_mas(len(disponibles) - LISTADO_MAXIMO, consulta))
+        return '\n'.join(renglones)
+
+    def _armar_respuestas(self):
+        if not self.disponibles:
+            # Sin platillos disponibles se usan las respuestas fijas del modelo
+            return {}
+
+        valores = {
+            'pie': PIE_PEDIDO,
+            'restaurante': configuracion.RESTAURANTE_NOMBRE,
+            'menu_por_categoria': self._menu_por_categoria(),
+            'texto_precios': self._texto_precios(),
+            'texto_ofertas': self._texto_ofertas(),
+            'texto_recomendaciones': self._texto_recomendaciones(),
+        }
+        respuestas = {intencion: plantilla.format_map(valores) for intencion, plantilla in PLANTILLAS.items()}
+
+        for categoria, lista in self.listas.items():
+            if not categoria or not lista:
+                continue
+            intencion = 'menu_' + normalizacion.normalizar(categoria).replace(' ', '_')
+            respuestas[intencion] = PLANTILLA_CATEGORIA.format(
+                categoria=categoria.upper(),
+                emoji=EMOJI_CATEGORIA.get(categoria.upper(), EMOJI_DEFECTO),
+                lista=lista,
+                pie=PIE_PEDIDO
+            )
+        return respuestas
+
+    def _menu_por_categoria(self):
+        secciones = []
+        for categoria, lista in self.listas.items():
+            if lista:
+                titulo = (categoria or 'OTROS').upper()
+                secciones.append(f"**{titulo}** {EMOJI_CATEGORIA.get(titulo, EMOJI_DEFECTO)}\n{lista}\n")
+        return '\n'.join(secciones)
+
+    def _texto_precios(self):
+        minimo, maximo = self.precios[0], self.precios[-1]
+        if minimo == maximo:
+            return f"Nuestros platillos están en **{_precio(minimo)} pesos**"
+        return f"Nuestros platillos van de **{_precio(minimo)}** a **{_precio(maximo)} pesos**"
+
+    def _texto_ofertas(self):
+        ofertas = self.destacados['oferta']
+        if not ofertas:
+            return (f"Por ahora no tenemos promociones activas 😅\n"
+                    f"Pero tenemos platillos desde **{_precio(self.precios[0])} pesos** 💛")
+        renglones = [f"{_renglon(p)} (-{p['descuento']}%)"
+                     for p in (self.platillos[posicion] for posicion in ofertas[:LISTADO_MAXIMO])]
+        if len(ofertas) > LISTADO_MAXIMO:
+            renglones.append(_ver_mas(len(ofertas) - LISTADO_MAXIMO, "disponible=true&oferta=true"))
+        return "🎉 **PROMOCIONES DE HOY**\n" + '\n'.join(renglones)
+
+    def _texto_recomendaciones(self):
+        bloques = []
+        vistos = set()
+        for bandera, marca, nota in (('mas_vendido', '⭐', '(¡Nuestro más vendido!)'),
+                                     ('popular', '🔥', '(¡Súper popular!)'),
+                                     ('oferta', '🎉', '(¡En oferta!)')):
+            # Solo se muestran 3: basta con los primeros de cada bandera
+            for posicion in self.destacados[bandera][:3]:
+                if posicion not in vistos:
+                    vistos.add(posicion)
+                    platillo = self.platillos[posicion]
+                    bloques.append(f"{marca} **{platillo['nombre']}** - {_precio(platillo['precio'])}\n{nota}")
+        if not bloques:
+            # Sin platillos destacados: los primeros del menú
+            bloques = [f"🍽️ **{p['nombre']}** - {_precio(p['precio'])}"
+                       for p in (self.platillos[posicion] for posicion in self.disponibles[:2])]
+        return '\n\n'.join(bloques[:3])
@@ -0,0 +1,63 @@
+"""
+Procesamiento de Texto para el Clasificador de Intenciones
+La Taza Loca - Chatbot Inteligente
+Sin dependencias de PyTorch, lo comparten el entrenamiento y los motores de inferencia
+"""
+
+import numpy as np
+
+import normalizacion
+
+
+class ProcesadorTexto:
+    """Procesa y tokeniza texto en español"""
+    
+    def __init__(self):
+        self.vocabulario = {}
+        self.idx_a_palabra = {}
+        self.vocab_size = 0
+    
+    def limpiar_texto(self, texto):
+        """Limpia y normaliza el texto"""
+        return normalizacion.limpiar_texto(texto)
+    
+    def tokenizar(self, texto):
+        """Divide el texto en tokens (palabras)"""
+        return normalizacion.tokenizar(texto)
+    
+    def normalizar(self, texto):
+        """Forma canónica de un texto: tokens limpios separados por un espacio"""
+        return normalizacion.normalizar(texto)
+    
+    def construir_vocabulario(self, textos):
+        """Construye el vocabulario a partir de una lista de textos"""
+        todas_palabras = set()
+        for texto in textos:
+            tokens = self.tokenizar(texto)
+            todas_palabras.update(tokens)
+        
+        self.vocabulario = {palabra: idx for idx, palabra in enumerate(sorted(todas_palabras))}
+        self.idx_a_palabra = {idx: palabra for palabra, idx in self.vocabulario.items()}
+        self.vocab_size = len(self.vocabulario)
+        
+        print(f"Vocabulario construido: {self.vocab_size} palabras")
+        return self.vocabulario
+    
+    def texto_a_bow(self, texto):
+        """Convierte texto a Bag of Words (vector de características)"""
+        tokens = self.tokenizar(texto)
+        bow = np.zeros(self.vocab_size)
+        
+        for token in tokens:
+            if token in self.vocabulario:
+                bow[self.vocabulario[token]] = 1
+        
+        return bow
+    
+    def texto_a_indices(self, texto):
+        """Convierte texto a los índices (únicos y ordenados) de sus palabras conocidas"""
+        return self.tokens_a_indices(self.tokenizar(texto))
+    
+    def tokens_a_indices(self, tokens):
+        """Índices (únicos y ordenados) de los tokens que están en el vocabulario"""
+        return sorted({self.vocabulario[token] for token in tokens if token in self.vocabulario})
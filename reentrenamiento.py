@@ -0,0 +1,206 @@
+"""
+Reentrenamiento en Segundo Plano - La Taza Loca
+Entrena el modelo en un proceso aparte, lo publica como una versión nueva y
+deja el progreso en disco para que cualquier worker pueda consultarlo
+
+Uso interno (lo lanza iniciar_reentrenamiento):
+    python -m reentrenamiento <ruta_base> <trabajo_id> <archivo_datos> <epochs>
+"""
+
+import fcntl
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import versiones_modelo
+
+DIRECTORIO_TRABAJOS = 'trabajos'
+ARCHIVO_CANDADO = 'reentrenamiento.lock'
+# Nunca se borra: su flock serializa revisar, tomar y soltar el candado entre workers
+ARCHIVO_GUARDIA = 'reentrenamiento.lock.guardia'
+ESTADOS_FINALES = ('completado', 'error')
+
+
+class ReentrenamientoEnCurso(Exception):
+    """Ya hay un reentrenamiento corriendo para este directorio de modelo"""
+
+
+def _ruta_estado(base, trabajo_id):
+    return os.path.join(base, DIRECTORIO_TRABAJOS, f"{trabajo_id}.json")
+
+
+def _proceso_vivo(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def leer_estado(base, trabajo_id):
+    """Estado de un trabajo, o None si no existe"""
+    try:
+        with open(_ruta_estado(base, trabajo_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def ultimo_trabajo(base):
+    """Estado del trabajo más reciente, o None si nunca se ha reentrenado"""
+    directorio = os.path.join(base, DIRECTORIO_TRABAJOS)
+    if not os.path.isdir(directorio):
+        return None
+    trabajos = sorted(n[:-5] for n in os.listdir(directorio) if n.endswith('.json'))
+    return leer_estado(base, trabajos[-1]) if trabajos else None
+
+
+def _actualizar_estado(base, trabajo_id, **cambios):
+    estado = leer_estado(base, trabajo_id) or {'id': trabajo_id}
+    estado.update(cambios)
+    versiones_modelo.escribir_json_atomico(_ruta_estado(base, trabajo_id), estado)
+    return estado
+
+
+@contextmanager
+def _guardia(base):
+    """Exclusión entre procesos mientras se revisa o cambia el candado"""
+    with open(os.path.join(base, ARCHIVO_GUARDIA), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _leer_candado(candado):
+    try:
+        with open(candado, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def _tomar_candado(base, trabajo_id, **estado_inicial):
+    """
+    Garantiza un solo reentrenamiento a la vez (entre todos los workers).
+
+    Con la guardia tomada: revisa el trabajo del candado, escribe el estado
+    del trabajo nuevo y solo después publica el candado (temporal + rename),
+    así que nadie ve un candado sin estado. Un candado cuyo trabajo terminó
+    o cuyo proceso murió se reemplaza con el rename, sin borrarlo antes; uno
+    sin estado no se toca (hay que borrarlo a mano).
+    """
+    candado = os.path.join(base, ARCHIVO_CANDADO)
+    os.makedirs(os.path.join(base, DIRECTORIO_TRABAJOS), exist_ok=True)
+    with _guardia(base):
+        otro = _leer_candado(candado)
+        if otro:
+            estado = leer_estado(base, otro)
+            if estado is None:
+                raise ReentrenamientoEnCurso(
+                    f"El candado {candado} apunta a {otro}, que no tiene estado; "
+                    f"bórralo a mano si no hay ningún reentrenamiento corriendo"
+                )
+            if estado.get('estado') not in ESTADOS_FINALES and _proceso_vivo(estado.get('pid')):
+                raise ReentrenamientoEnCurso(f"Ya hay un reentrenamiento en curso: {otro}")
+
+        # Por defecto el trabajo es de este proceso hasta que alguien lo cambie
+        estado = _actualizar_estado(base, trabajo_id, **{'estado': 'en_cola', 'pid': os.getpid(), **estado_inicial})
+        temporal = f"{candado}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            f.write(trabajo_id)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, candado)
+    return estado
+
+
+def _soltar_candado(base, trabajo_id):
+    candado = os.path.join(base, ARCHIVO_CANDADO)
+    with _guardia(base):
+        if _leer_candado(candado) == trabajo_id:
+            os.remove(candado)
+
+
+def iniciar_reentrenamiento(base, archivo_datos='datos_entrenamiento.json', epochs=1000):
+    """
+    Lanza el reentrenamiento en un proceso aparte y regresa el estado inicial
+    del trabajo sin esperar a que termine. `epochs` es el máximo: el
+    entrenamiento se detiene antes si la validación deja de mejorar.
+    """
+    os.makedirs(os.path.join(base, DIRECTORIO_TRABAJOS), exist_ok=True)
+    trabajo_id = datetime.now().strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6]
+
+    # Mientras el proceso arranca, el pid del trabajo es el de este worker
+    _tomar_candado(base, trabajo_id, epoca=0, epochs=epochs, inicio=datetime.now().isoformat())
+    try:
+        proceso = subprocess.Popen(
+            [sys.executable, '-m', 'reentrenamiento', base, trabajo_id, archivo_datos, str(epochs)],
+            start_new_session=True
+        )
+    except Exception as e:
+        _actualizar_estado(base, trabajo_id, estado='error', error=str(e), fin=datetime.now().isoformat())
+        _soltar_candado(base, trabajo_id)
+        raise
+
+    # Recoger al proceso hijo cuando termine (evita procesos zombie)
+    threading.Thread(target=proceso.wait, daemon=True).start()
+
+    return _actualizar_estado(base, trabajo_id, pid=proceso.pid)
+
+
+def ejecutar_trabajo(base, trabajo_id, archivo_datos, epochs, conservar=None):
+    """Cuerpo del proceso de reentrenamiento"""
+    from modelo_intenciones import ClasificadorIntenciones
+
+    _actualizar_estado(base, trabajo_id, estado='entrenando', pid=os.getpid())
+    ultima_escritura = [0.0]
+
+    def progreso(epoca, total, loss, precision):
+        # Limitar escrituras a disco: como mucho ~4 por segundo
+        ahora = time.monotonic()
+        if epoca == total or ahora - ultima_escritura[0] >= 0.25:
+            ultima_escritura[0] = ahora
+            _actualizar_estado(base, trabajo_id, epoca=epoca, loss=loss, precision=precision)
+
+    try:
+        clasificador = ClasificadorIntenciones(archivo_datos=archivo_datos)
+        resultado = clasificador.entrenar_rapido(max_epochs=epochs, verbose=0, progreso=progreso)
+
+        _actualizar_estado(base, trabajo_id, estado='guardando')
+        version = versiones_modelo.nueva_version()
+        destino = versiones_modelo.ruta_version(base, version)
+        temporal = destino + '.tmp'
+        clasificador.guardar_modelo(temporal)
+        # Renombrar el directorio completo: la versión aparece entera o no aparece
+        os.rename(temporal, destino)
+
+        versiones_modelo.activar_version(base, version, conservar=conservar)
+        _actualizar_estado(
+            base, trabajo_id,
+            estado='completado', version=version, resultado=resultado,
+            fin=datetime.now().isoformat()
+        )
+    except Exception as e:
+        _actualizar_estado(base, trabajo_id, estado='error', error=str(e), fin=datetime.now().isoformat())
+        raise
+    finally:
+        _soltar_candado(base, trabajo_id)
+
+
+if __name__ == '__main__':
+    import configuracion
+
+    ruta_base, id_trabajo, datos, num_epochs = sys.argv[1:5]
+    ejecutar_trabajo(ruta_base, id_trabajo, datos, int(num_epochs), conservar=configuracion.VERSIONES_CONSERVAR)
@@ -0,0 +1,129 @@
+"""
+Respuestas Precalculadas - La Taza Loca
+Cuerpos JSON serializados y comprimidos una sola vez por versión del menú,
+con ETag fuerte para responder 304 a los clientes que ya los tienen
+"""
+
+import gzip
+import hashlib
+import threading
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se ofrece gzip
+    brotli = None
+
+# Codificaciones en orden de preferencia cuando el cliente acepta varias
+CODIFICACIONES = ('br', 'gzip') if brotli is not None else ('gzip',)
+# Por debajo de este tamaño comprimir no ahorra nada que valga la pena
+TAMANO_MINIMO_COMPRIMIR = 512
+
+
+class RespuestaPrecalculada:
+    """Un cuerpo JSON con sus variantes comprimidas y su ETag"""
+
+    def __init__(self, cuerpo):
+        self.cuerpo = cuerpo
+        self.hash = hashlib.sha256(cuerpo).hexdigest()[:32]
+
+        self.variantes = {}
+        if len(cuerpo) >= TAMANO_MINIMO_COMPRIMIR:
+            # mtime=0: el mismo contenido produce los mismos bytes en todos los workers
+            self.variantes['gzip'] = gzip.compress(cuerpo, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.variantes['br'] = brotli.compress(cuerpo, quality=11)
+
+    def etag(self, codificacion=None):
+        # Cada representación lleva su propio ETag fuerte
+        return f'"{self.hash}-{codificacion}"' if codificacion else f'"{self.hash}"'
+
+    def coincide(self, if_none_match):
+        """Si el cliente ya tiene alguna de las representaciones de este cuerpo"""
+        if if_none_match is None:
+            return False
+        if '*' in if_none_match:
+            return True
+        return any(
+            etag.split('-', 1)[0] == self.hash
+            for etag in if_none_match.as_set(include_weak=True)
+        )
+
+    def elegir_codificacion(self, accept_encodings):
+        """La variante preferida que el cliente acepta, o None para identidad"""
+        for codificacion in CODIFICACIONES:
+            if codificacion in self.variantes and accept_encodings.quality(codificacion) > 0:
+                return codificacion
+        return None
+
+    def responder(self, peticion):
+        """Respuesta Flask para `peticion`: 304, variante comprimida o JSON plano"""
+        codificacion = self.elegir_codificacion(peticion.accept_encodings)
+
+        if self.coincide(peticion.if_none_match):
+            respuesta = Response(status=304)
+        else:
+            cuerpo = self.variantes[codificacion] if codificacion else self.cuerpo
+            respuesta = Response(cuerpo, mimetype='application/json')
+            if codificacion:
+                respuesta.headers['Content-Encoding'] = codificacion
+
+        respuesta.headers['ETag'] = self.etag(codificacion)
+        respuesta.headers['Vary'] = 'Accept-Encoding'
+        # Los clientes pueden guardar la respuesta pero deben revalidarla siempre
+        respuesta.headers['Cache-Control'] = 'no-cache'
+        return respuesta
+
+
+class CacheRespuestas:
+    """
+    Respuestas precalculadas por clave para la versión activa del menú.
+    `activar` con otra versión descarta todas las entradas; las peticiones
+    que todavía traen otra versión reciben su respuesta sin guardarla.
+    """
+
+    def __init__(self, version=None):
+        self._version = version
+        self._entradas = {}
+        self._lock = threading.Lock()
+
+        self.construcciones = 0
+        self.invalidaciones = 0
+
+    def activar(self, version):
+        """Cambia la versión activa del menú (invalida si es distinta)"""
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._entradas = {}
+                self.invalidaciones += 1
+
+    def obtener(self, version, clave, construir):
+        """
+        La respuesta para `clave` en `version`; `construir()` debe regresar
+        los bytes del cuerpo y, para la versión activa, solo se llama la
+        primera vez.
+        """
+        if version == self._version:
+            respuesta = self._entradas.get(clave)
+            if respuesta is not None:
+                return respuesta
+
+        # Serializar y comprimir fuera del lock: es la parte cara
+        respuesta = RespuestaPrecalculada(construir())
+
+        with self._lock:
+            if version == self._version:
+                self._entradas[clave] = respuesta
+                self.construcciones += 1
+        return respuesta
+
+    def estadisticas(self):
+        return {
+            'version': self._version,
+            'entradas': len(self._entradas),
+            'construcciones': self.construcciones,
+            'invalidaciones': self.invalidaciones,
+            'codificaciones': list(CODIFICACIONES),
+        }
@@ -3,251 +3,331 @@ Sistema de Pedidos - Fonda Doña Magui
 Gestiona carritos de compra y envío por WhatsApp
 """
 
-import json
 import uuid
 from datetime import datetime
-from urllib.parse import quote
+
+import configuracion
+from almacen_pedidos import Barrendero, crear_almacen
+from mensajes_pedido import MensajesPedido
+from pedido import Pedido
+
+OPERACIONES = ('agregar', 'quitar', 'actualizar_cantidad', 'datos_cliente')
+MAXIMO_OPERACIONES = 100
+
+
+class OperacionesInvalidas(ValueError):
+    """Un lote de operaciones con al menos una inválida; `errores` dice cuáles y por qué"""
+
+    def __init__(self, errores):
+        super().__init__("Operaciones inválidas; no se aplicó ninguna")
+        self.errores = errores
+
+
+def _datos_cliente(nombre, telefono, direccion, tipo_entrega="domicilio", notas=""):
+    return {
+        'nombre': nombre,
+        'telefono': telefono,
+        'direccion': direccion,
+        'tipo_entrega': tipo_entrega,  # "domicilio" o "recoger"
+        'notas': notas
+    }
+
+
+def _es_entero(valor):
+    return isinstance(valor, int) and not isinstance(valor, bool)
+
+
+def _leer_operacion(operacion, catalogo):
+    """(tipo, argumentos) de una operación del lote; ValueError si es inválida"""
+    if not isinstance(operacion, dict):
+        raise ValueError("La operación debe ser un objeto")
+    tipo = operacion.get('operacion')
+    if tipo not in OPERACIONES:
+        raise ValueError(f"'operacion' debe ser una de: {', '.join(OPERACIONES)}")
+    
+    if tipo == 'datos_cliente':
+        nombre = operacion.get('nombre')
+        telefono = operacion.get('telefono')
+        direccion = operacion.get('direccion', '')
+        tipo_entrega = operacion.get('tipo_entrega', 'domicilio')
+        if not nombre or not telefono:
+            raise ValueError("nombre y telefono son requeridos")
+        if tipo_entrega == 'domicilio' and not direccion:
+            raise ValueError("La dirección es requerida para entregas a domicilio")
+        return tipo, (_datos_cliente(nombre, telefono, direccion, tipo_entrega, operacion.get('notas', '')),)
+    
+    platillo_id = operacion.get('platillo_id')
+    if not _es_entero(platillo_id):
+        raise ValueError("platillo_id debe ser un número entero")
+    platillo = catalogo.obtener(platillo_id)
+    if not platillo:
+        raise ValueError(f"Platillo no encontrado: {platillo_id}")
+    
+    if tipo == 'quitar':
+        return tipo, (platillo['id'],)
+    
+    if tipo == 'actualizar_cantidad':
+        cantidad = operacion.get('cantidad')
+        if not _es_entero(cantidad):
+            raise ValueError("cantidad debe ser un número entero")
+        return tipo, (platillo['id'], cantidad)
+    
+    cantidad = operacion.get('cantidad', 1)
+    if not _es_entero(cantidad) or cantidad < 1:
+        raise ValueError("cantidad debe ser un número entero mayor que 0")
+    if not platillo['disponible']:
+        raise ValueError(f"{platillo['nombre']} no está disponible en este momento")
+    return tipo, (platillo, cantidad)
+
+
+def leer_operaciones(operaciones, catalogo):
+    """
+    Valida contra el catálogo un lote de operaciones sobre un carrito:
+    [{"operacion": "agregar", "platillo_id": 3, "cantidad": 2},
+     {"operacion": "quitar", "platillo_id": 5},
+     {"operacion": "actualizar_cantidad", "platillo_id": 3, "cantidad": 1},
+     {"operacion": "datos_cliente", "nombre": ..., "telefono": ..., "direccion": ...}]
+
+    Regresa las operaciones listas para `GestorPedidos.aplicar_operaciones`.
+    Si alguna es inválida lanza OperacionesInvalidas con el error de cada una.
+    """
+    if not isinstance(operaciones, list) or not operaciones:
+        raise ValueError("operaciones debe ser una lista no vacía")
+    if len(operaciones) > MAXIMO_OPERACIONES:
+        raise ValueError(f"Máximo {MAXIMO_OPERACIONES} operaciones por lote")
+    
+    leidas = []
+    errores = []
+    for indice, operacion in enumerate(operaciones):
+        try:
+            leidas.append(_leer_operacion(operacion, catalogo))
+        except ValueError as e:
+            errores.append({'indice': indice, 'error': str(e)})
+    
+    if errores:
+        raise OperacionesInvalidas(errores)
+    return leidas
+
 
 class GestorPedidos:
-    def __init__(self):
-        # Almacenamiento en memoria de pedidos activos
-        self.pedidos = {}
+    def __init__(self, almacen=None, intervalo_barrido=0, mensajes=None):
+        # Pedidos activos: en memoria o en SQLite (ver almacen_pedidos.py).
+        # Cada operación lee y escribe el pedido con almacen.modificar
+        self.almacen = almacen if almacen is not None else crear_almacen('memoria')
+        # Expira carritos abandonados en segundo plano (ver asegurar_hilo)
+        self.barrendero = Barrendero(self.almacen, intervalo_barrido)
         self.numero_whatsapp = "5216645631675"  # Formato internacional
+        self.mensajes = mensajes if mensajes is not None else MensajesPedido(
+            configuracion.RESTAURANTE_NOMBRE, configuracion.PEDIDO_ENCABEZADO
+        )
+    
+    def _pedido_nuevo(self, usuario_id):
+        return Pedido(usuario_id, datetime.now().isoformat())
+    
+    def _modificar(self, usuario_id, cambiar):
+        """
+        Aplica `cambiar(pedido)` con el almacén y regresa el pedido como
+        diccionario (o None), tomado antes de que otro hilo lo vuelva a cambiar
+        """
+        copia = None
+        
+        def aplicar(pedido):
+            nonlocal copia
+            pedido = cambiar(pedido)
+            if pedido is not None:
+                copia = pedido.a_dict()
+            return pedido
+        
+        self.almacen.modificar(usuario_id, aplicar)
+        
+        return copia
     
     def crear_pedido(self, usuario_id=None):
         """Crea un nuevo pedido vacío"""
         if usuario_id is None:
             usuario_id = str(uuid.uuid4())
         
-        self.pedidos[usuario_id] = {
-            'id': usuario_id,
-            'items': [],
-            'total': 0,
-            'fecha_creacion': datetime.now().isoformat(),
-            'estado': 'en_proceso',
-            'datos_cliente': {}
-        }
+        self.almacen.guardar(self._pedido_nuevo(usuario_id))
         
         return usuario_id
     
+    def asegurar_pedido(self, usuario_id):
+        """
+        Crea un pedido vacío solo si el usuario no tiene uno, revisando y
+        creando en la misma modificación del almacén: nunca reemplaza un
+        carrito que otro hilo o worker acaba de llenar. Regresa el pedido.
+        """
+        copia = None
+        
+        def asegurar(pedido):
+            nonlocal copia
+            if pedido is not None:
+                copia = pedido.a_dict()
+                return None  # Ya existe: no se guarda nada
+            pedido = self._pedido_nuevo(usuario_id)
+            copia = pedido.a_dict()
+            return pedido
+        
+        self.almacen.modificar(usuario_id, asegurar)
+        
+        return copia
+    
+    def existe_pedido(self, usuario_id):
+        """Indica si el usuario ya tiene un pedido"""
+        return usuario_id in self.almacen
+    
     def agregar_item(self, usuario_id, platillo, cantidad=1):
-        """Agrega un platillo al pedido"""
-        if usuario_id not in self.pedidos:
-            self.crear_pedido(usuario_id)
-        
-        pedido = self.pedidos[usuario_id]
-        
-        # Buscar si el platillo ya existe en el carrito
-        item_existente = None
-        for item in pedido['items']:
-            if item['id'] == platillo['id']:
-                item_existente = item
-                break
-        
-        if item_existente:
-            # Incrementar cantidad
-            item_existente['cantidad'] += cantidad
-            item_existente['subtotal'] = item_existente['cantidad'] * platillo['precio']
-        else:
-            # Agregar nuevo item
-            pedido['items'].append({
-                'id': platillo['id'],
-                'nombre': platillo['nombre'],
-                'precio': platillo['precio'],
-                'cantidad': cantidad,
-                'subtotal': platillo['precio'] * cantidad
-            })
-        
-        # Recalcular total
-        self._calcular_total(usuario_id)
-        
-        return pedido
+        """Agrega un platillo al pedido (si ya estaba, suma la cantidad)"""
+        def agregar(pedido):
+            if pedido is None:
+                pedido = self._pedido_nuevo(usuario_id)
+            pedido.agregar(platillo, cantidad)
+            return pedido
+        
+        return self._modificar(usuario_id, agregar)
     
     def quitar_item(self, usuario_id, platillo_id):
         """Quita un platillo del pedido"""
-        if usuario_id not in self.pedidos:
-            return None
-        
-        pedido = self.pedidos[usuario_id]
-        pedido['items'] = [item for item in pedido['items'] if item['id'] != platillo_id]
+        def quitar(pedido):
+            if pedido is not None:
+                pedido.quitar(platillo_id)
+            return pedido
         
-        self._calcular_total(usuario_id)
-        
-        return pedido
+        return self._modificar(usuario_id, quitar)
     
     def actualizar_cantidad(self, usuario_id, platillo_id, cantidad):
-        """Actualiza la cantidad de un platillo"""
-        if usuario_id not in self.pedidos:
-            return None
-        
-        pedido = self.pedidos[usuario_id]
+        """Actualiza la cantidad de un platillo (0 o negativa lo quita)"""
+        def actualizar(pedido):
+            if pedido is not None:
+                pedido.actualizar_cantidad(platillo_id, cantidad)
+            return pedido
         
-        for item in pedido['items']:
-            if item['id'] == platillo_id:
-                if cantidad <= 0:
-                    # Si la cantidad es 0 o negativa, quitar el item
-                    return self.quitar_item(usuario_id, platillo_id)
-                else:
-                    item['cantidad'] = cantidad
-                    item['subtotal'] = item['precio'] * cantidad
-                    break
-        
-        self._calcular_total(usuario_id)
-        
-        return pedido
+        return self._modificar(usuario_id, actualizar)
     
     def vaciar_pedido(self, usuario_id):
         """Vacía todo el carrito"""
-        if usuario_id in self.pedidos:
-            self.pedidos[usuario_id]['items'] = []
-            self.pedidos[usuario_id]['total'] = 0
+        def vaciar(pedido):
+            if pedido is not None:
+                pedido.vaciar()
+            return pedido
         
-        return self.pedidos.get(usuario_id)
+        return self._modificar(usuario_id, vaciar)
     
     def obtener_pedido(self, usuario_id):
         """Obtiene el pedido actual"""
-        return self.pedidos.get(usuario_id)
+        return self.almacen.obtener(usuario_id, Pedido.a_dict)
     
     def agregar_datos_cliente(self, usuario_id, nombre, telefono, direccion, tipo_entrega="domicilio", notas=""):
         """Agrega los datos del cliente al pedido"""
-        if usuario_id not in self.pedidos:
-            return None
-        
-        self.pedidos[usuario_id]['datos_cliente'] = {
-            'nombre': nombre,
-            'telefono': telefono,
-            'direccion': direccion,
-            'tipo_entrega': tipo_entrega,  # "domicilio" o "recoger"
-            'notas': notas
-        }
+        def agregar(pedido):
+            if pedido is None:
+                return None
+            
+            pedido.datos_cliente = _datos_cliente(nombre, telefono, direccion, tipo_entrega, notas)
+            
+            return pedido
         
-        return self.pedidos[usuario_id]
+        return self._modificar(usuario_id, agregar)
     
-    def _calcular_total(self, usuario_id):
-        """Calcula el total del pedido"""
-        if usuario_id not in self.pedidos:
-            return 0
+    def aplicar_operaciones(self, usuario_id, operaciones):
+        """
+        Aplica en orden las operaciones de `leer_operaciones` en una sola
+        modificación del almacén: ningún otro cambio al carrito se intercala.
+        Regresa (pedido, resumen) del carrito ya con todas aplicadas.
+        """
+        resultado = {}
+        
+        def aplicar(pedido):
+            if pedido is None:
+                pedido = self._pedido_nuevo(usuario_id)
+            
+            for tipo, argumentos in operaciones:
+                if tipo == 'agregar':
+                    pedido.agregar(*argumentos)
+                elif tipo == 'quitar':
+                    pedido.quitar(*argumentos)
+                elif tipo == 'actualizar_cantidad':
+                    pedido.actualizar_cantidad(*argumentos)
+                else:
+                    pedido.datos_cliente = argumentos[0]
+            
+            resultado['pedido'] = pedido.a_dict()
+            resultado['resumen'] = self.mensajes.resumen(pedido)
+            return pedido
         
-        pedido = self.pedidos[usuario_id]
-        total = sum(item['subtotal'] for item in pedido['items'])
-        pedido['total'] = total
+        self.almacen.modificar(usuario_id, aplicar)
         
-        return total
+        return resultado['pedido'], resultado['resumen']
     
     def formatear_pedido_texto(self, usuario_id):
         """Formatea el pedido para enviar por WhatsApp"""
-        pedido = self.pedidos.get(usuario_id)
-        
-        if not pedido or not pedido['items']:
-            return None
-        
-        # Encabezado
-        mensaje = "🍽️ *NUEVO PEDIDO - FONDA DOÑA MAGUI*\n"
-        mensaje += "=" * 40 + "\n\n"
-        
-        # Datos del cliente
-        cliente = pedido['datos_cliente']
-        if cliente:
-            mensaje += f"👤 *Cliente:* {cliente.get('nombre', 'Sin nombre')}\n"
-            mensaje += f"📱 *Teléfono:* {cliente.get('telefono', 'Sin teléfono')}\n"
-            
-            if cliente.get('tipo_entrega') == 'domicilio':
-                mensaje += f"🏠 *Dirección:* {cliente.get('direccion', 'Sin dirección')}\n"
-                mensaje += "🚚 *Tipo:* Entrega a domicilio\n"
-            else:
-                mensaje += "🏪 *Tipo:* Recoger en local\n"
-            
-            if cliente.get('notas'):
-                mensaje += f"📝 *Notas:* {cliente.get('notas')}\n"
-            
-            mensaje += "\n"
-        
-        # Items del pedido
-        mensaje += "📋 *PEDIDO:*\n"
-        mensaje += "-" * 40 + "\n"
-        
-        for i, item in enumerate(pedido['items'], 1):
-            mensaje += f"{i}. *{item['nombre']}*\n"
-            mensaje += f"   Cantidad: {item['cantidad']}\n"
-            mensaje += f"   Precio unitario: ${item['precio']}\n"
-            mensaje += f"   Subtotal: ${item['subtotal']}\n\n"
-        
-        # Total
-        mensaje += "=" * 40 + "\n"
-        mensaje += f"💰 *TOTAL: ${pedido['total']} MXN*\n"
-        mensaje += "=" * 40 + "\n\n"
-        
-        # Pie de página
-        mensaje += f"⏰ Hora del pedido: {datetime.now().strftime('%d/%m/%Y %H:%M')}\n"
-        mensaje += "\n¡Gracias por tu preferencia! 😊🌮"
-        
-        return mensaje
+        return self.almacen.obtener(usuario_id, self.mensajes.texto)
     
     def generar_link_whatsapp(self, usuario_id):
         """Genera el link de WhatsApp con el pedido formateado"""
-        mensaje = self.formatear_pedido_texto(usuario_id)
-        
-        if not mensaje:
-            return None
-        
-        # Codificar el mensaje para URL
-        mensaje_codificado = quote(mensaje)
-        
-        # Generar link de WhatsApp
-        link = f"https://wa.me/{self.numero_whatsapp}?text={mensaje_codificado}"
-        
-        return link
+        return self.almacen.obtener(usuario_id, self._link_whatsapp)
+    
+    def _link_whatsapp(self, pedido):
+        return self.mensajes.texto_y_link(pedido, self.numero_whatsapp)[1]
     
     def finalizar_pedido(self, usuario_id):
         """Marca el pedido como finalizado y retorna el link de WhatsApp"""
-        if usuario_id not in self.pedidos:
-            return None
-        
-        pedido = self.pedidos[usuario_id]
-        
-        # Validar que el pedido tenga items y datos del cliente
-        if not pedido['items']:
-            return {
-                'error': 'El pedido está vacío',
-                'codigo': 'PEDIDO_VACIO'
-            }
-        
-        if not pedido['datos_cliente'].get('nombre'):
-            return {
-                'error': 'Faltan datos del cliente',
-                'codigo': 'DATOS_INCOMPLETOS'
-            }
-        
-        # Generar link de WhatsApp
-        link_whatsapp = self.generar_link_whatsapp(usuario_id)
-        
-        # Marcar como finalizado
-        pedido['estado'] = 'finalizado'
-        pedido['fecha_finalizacion'] = datetime.now().isoformat()
-        
-        return {
-            'link_whatsapp': link_whatsapp,
-            'mensaje': self.formatear_pedido_texto(usuario_id),
-            'pedido': pedido,
-            'codigo': 'SUCCESS'
-        }
-    
-    def resumen_pedido(self, usuario_id):
-        """Genera un resumen legible del pedido actual"""
-        pedido = self.pedidos.get(usuario_id)
-        
-        if not pedido or not pedido['items']:
-            return "🛒 Tu carrito está vacío"
+        resultado = {}
         
-        resumen = "🛒 *TU PEDIDO ACTUAL:*\n\n"
-        
-        for item in pedido['items']:
-            resumen += f"• {item['cantidad']}x {item['nombre']} - ${item['subtotal']}\n"
+        def finalizar(pedido):
+            if pedido is None:
+                return None
+            
+            # Validar que el pedido tenga items y datos del cliente
+            if not pedido.items:
+                resultado.update({
+                    'error': 'El pedido está vacío',
+                    'codigo': 'PEDIDO_VACIO'
+                })
+                return None
+            
+            if not pedido.datos_cliente.get('nombre'):
+                resultado.update({
+                    'error': 'Faltan datos del cliente',
+                    'codigo': 'DATOS_INCOMPLETOS'
+                })
+                return None
+            
+            # Generar el mensaje y su link en una sola pasada
+            ahora = datetime.now()
+            mensaje, link = self.mensajes.texto_y_link(pedido, self.numero_whatsapp, ahora)
+            
+            # Marcar como finalizado
+            pedido.estado = 'finalizado'
+            pedido.fecha_finalizacion = ahora.isoformat()
+            
+            resultado.update({
+                'link_whatsapp': link,
+                'mensaje': mensaje,
+                'pedido': pedido.a_dict(),
+                'codigo': 'SUCCESS'
+            })
+            return pedido
         
-        resumen += f"\n💰 *Total: ${pedido['total']} MXN*"
+        self.almacen.modificar(usuario_id, finalizar)
         
-        return resumen
+        return resultado or None
+    
+    def resumen_pedido(self, usuario_id):
+        """Genera un resumen legible del pedido actual"""
+        return self.almacen.obtener(usuario_id, self.mensajes.resumen) or self.mensajes.resumen(None)
 
 
 # Instancia global
-gestor_pedidos = GestorPedidos()
+gestor_pedidos = GestorPedidos(
+    crear_almacen(
+        configuracion.PEDIDOS_BACKEND,
+        configuracion.PEDIDOS_SQLITE,
+        configuracion.PEDIDOS_SQLITE_CONEXIONES,
+        ttl_segundos=configuracion.PEDIDOS_TTL_SEGUNDOS,
+        maximo=configuracion.PEDIDOS_MAXIMO,
+        maximo_finalizados=configuracion.PEDIDOS_FINALIZADOS_MAXIMO,
+        franjas=configuracion.PEDIDOS_FRANJAS
+    ),
+    intervalo_barrido=configuracion.PEDIDOS_BARRIDO_SEGUNDOS
+)
@@ -0,0 +1,134 @@
+"""
+Versiones del Modelo - La Taza Loca
+Directorios de modelo versionados con un puntero "actual" que se cambia de
+forma atómica, para publicar y revertir modelos sin reiniciar los workers
+
+Estructura dentro del directorio base (p. ej. modelo_chatbot/):
+    modelo.pth, datos_auxiliares.pkl, modelo.npz   versión 'base' (la original)
+    versiones/<version>/                           versiones reentrenadas
+    ACTUAL.json                                    versión activa e historial
+"""
+
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+
+VERSION_BASE = 'base'
+ARCHIVO_PUNTERO = 'ACTUAL.json'
+DIRECTORIO_VERSIONES = 'versiones'
+
+
+def escribir_json_atomico(ruta, datos):
+    """Escribe JSON en un temporal y lo renombra: los lectores nunca ven un archivo a medias"""
+    temporal = f"{ruta}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+
+
+def nueva_version():
+    """Nombre para una versión nueva: ordenable por fecha y único"""
+    return datetime.now().strftime('v%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6]
+
+
+def ruta_version(base, version):
+    """Directorio que contiene los archivos de una versión"""
+    if version == VERSION_BASE:
+        return base
+    return os.path.join(base, DIRECTORIO_VERSIONES, version)
+
+
+def leer_puntero(base):
+    """Contenido de ACTUAL.json, o la versión base si nunca se ha reentrenado"""
+    try:
+        with open(os.path.join(base, ARCHIVO_PUNTERO), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'version': VERSION_BASE, 'historial': [VERSION_BASE]}
+
+
+def firma_puntero(base):
+    """
+    Identifica el estado del puntero con un solo stat (inodo y mtime): como
+    el puntero se reemplaza con os.replace, cada cambio produce otra firma.
+    """
+    try:
+        st = os.stat(os.path.join(base, ARCHIVO_PUNTERO))
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns)
+
+
+def version_actual(base):
+    """(version, ruta) de la versión activa"""
+    version = leer_puntero(base)['version']
+    return version, ruta_version(base, version)
+
+
+def listar_versiones(base):
+    """Versiones disponibles en disco, de la más vieja a la más nueva"""
+    directorio = os.path.join(base, DIRECTORIO_VERSIONES)
+    versiones = []
+    if os.path.isdir(directorio):
+        versiones = sorted(
+            nombre for nombre in os.listdir(directorio)
+            if os.path.isdir(os.path.join(directorio, nombre)) and not nombre.endswith('.tmp')
+        )
+    return [VERSION_BASE] + versiones
+
+
+def activar_version(base, version, conservar=None):
+    """Cambia atómicamente el puntero a `version` y la agrega al historial"""
+    if version not in listar_versiones(base):
+        raise ValueError(f"La versión {version} no existe")
+
+    puntero = leer_puntero(base)
+    historial = [v for v in puntero.get('historial', [VERSION_BASE]) if v != version]
+    historial.append(version)
+
+    escribir_json_atomico(os.path.join(base, ARCHIVO_PUNTERO), {
+        'version': version,
+        'historial': historial,
+        'actualizado': datetime.now().isoformat()
+    })
+
+    if conservar:
+        limpiar_versiones(base, conservar)
+
+    return version
+
+
+def revertir(base):
+    """Vuelve a la versión activa anterior; regresa su nombre"""
+    puntero = leer_puntero(base)
+    disponibles = set(listar_versiones(base))
+    historial = [v for v in puntero.get('historial', []) if v in disponibles]
+
+    if len(historial) < 2:
+        raise ValueError("No hay una versión anterior a la cual revertir")
+
+    historial.pop()
+    anterior = historial[-1]
+
+    escribir_json_atomico(os.path.join(base, ARCHIVO_PUNTERO), {
+        'version': anterior,
+        'historial': historial,
+        'actualizado': datetime.now().isoformat()
+    })
+    return anterior
+
+
+def limpiar_versiones(base, conservar):
+    """Borra las versiones más viejas, sin tocar las del historial reciente"""
+    puntero = leer_puntero(base)
+    protegidas = set(puntero.get('historial', [])[-conservar:]) | {puntero['version'], VERSION_BASE}
+    reentrenadas = listar_versiones(base)[1:]
+
+    sobrantes = [v for v in reentrenadas if v not in protegidas]
+    exceso = len(reentrenadas) - conservar
+    for version in sobrantes[:max(0, exceso)]:
+        shutil.rmtree(ruta_version(base, version), ignore_errors=True)
@@ -0,0 +1,183 @@
+"""
+Recarga en Caliente del Menú - La Taza Loca
+Vigila el archivo del menú (menu.json o la base SQLite) y, cuando cambia,
+construye un catálogo nuevo fuera del camino de las peticiones y lo publica
+de una sola vez
+"""
+
+import fcntl
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+from catalogo_menu import CatalogoMenu
+from hilos import HiloDemonio
+
+
+def firma_archivo(ruta):
+    """Inodo, mtime y tamaño: cambia tanto al reemplazar el archivo como al editarlo en sitio"""
+    try:
+        st = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+@contextmanager
+def guardia_archivo(ruta):
+    """
+    Exclusión entre procesos (workers) sobre `ruta`, con flock en
+    `<ruta>.guardia`: el menú no se reemplaza mientras la guardia está tomada.
+    Regresa el archivo de la guardia, donde cada guardado deja una marca.
+    """
+    with open(f"{ruta}.guardia", 'a+') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield f
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class VigilanteMenu:
+    """
+    Revisa la firma de `archivo_menu` cada `intervalo_segundos` desde un hilo
+    propio. Si cambió, carga y valida el archivo y construye un
+    catálogo completo con `cargar` (índices, búsqueda y versión); solo entonces
+    llama a los suscriptores con el catálogo nuevo. Un menú inválido no se
+    publica: se conserva el anterior y el error queda en las estadísticas.
+
+    `intervalo_segundos` <= 0 desactiva el hilo (`revisar` sigue disponible).
+    Los cambios hechos desde la API pasan por `actualizar`, con el mismo
+    candado, para que una recarga y un cambio nunca se pisen; además toma
+    la guardia del archivo para que dos workers no guarden a la vez.
+    """
+
+    def __init__(self, archivo_menu, intervalo_segundos=5.0, cargar=CatalogoMenu.desde_archivo):
+        self.archivo_menu = archivo_menu
+        self.intervalo = intervalo_segundos
+        self.cargar = cargar
+        # Firma tomada antes de la carga inicial: si el archivo cambia justo
+        # después, la primera revisión lo vuelve a cargar
+        self._firma = firma_archivo(archivo_menu)
+        # Marca del último guardado hecho desde este worker (ver actualizar)
+        self._marca = ''
+        self._suscriptores = []
+        self._lock = threading.Lock()
+        self._hilo = HiloDemonio('vigilante-menu', self._vigilar)
+
+        self.recargas = 0
+        self.actualizaciones = 0
+        self.errores = 0
+        self.ultima_recarga = None
+        self.ultima_duracion_ms = None
+        self.ultimo_error = None
+        self.version = None
+
+    def suscribir(self, funcion):
+        """`funcion(catalogo)` se llama, en orden, con cada catálogo nuevo"""
+        self._suscriptores.append(funcion)
+
+    @property
+    def activo(self):
+        return self.intervalo > 0
+
+    def asegurar_hilo(self):
+        """Arranca el hilo de vigilancia (también tras un fork del proceso)"""
+        if self.activo:
+            self._hilo.asegurar()
+
+    def _vigilar(self):
+        while True:
+            time.sleep(self.intervalo)
+            try:
+                self.revisar()
+            except Exception as e:
+                # Un suscriptor falló: el hilo sigue vigilando
+                print(f"⚠️ Error en la recarga del menú: {e}")
+
+    def revisar(self):
+        """Recarga el menú si el archivo cambió; regresa True si publicó uno nuevo"""
+        firma = firma_archivo(self.archivo_menu)
+        if firma == self._firma:
+            return False
+
+        with self._lock:
+            if firma == self._firma:
+                return False
+            return self._recargar(firma)
+
+    def _recargar(self, firma):
+        # Aunque falle, no reintentar hasta que el archivo vuelva a cambiar
+        self._firma = firma
+
+        inicio = time.perf_counter()
+        try:
+            if firma is None:
+                raise FileNotFoundError(f"No existe {self.archivo_menu}")
+            catalogo = self.cargar(self.archivo_menu)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            self.errores += 1
+            self.ultimo_error = {'mensaje': str(e), 'fecha': datetime.now().isoformat()}
+            print(f"⚠️ Menú inválido, se conserva el anterior: {e}")
+            return False
+
+        self._publicar(catalogo, inicio)
+        self.recargas += 1
+        print(f"✅ Menú recargado: {len(catalogo)} platillos (versión {catalogo.version})")
+        return True
+
+    def _publicar(self, catalogo, inicio):
+        for funcion in self._suscriptores:
+            funcion(catalogo)
+        self.ultima_duracion_ms = round((time.perf_counter() - inicio) * 1000, 3)
+        self.ultima_recarga = datetime.now().isoformat()
+        self.version = catalogo.version
+
+    def actualizar(self, construir):
+        """
+        Publica el catálogo que regresa `construir()`, que además debe
+        guardarlo en `archivo_menu`. Todo pasa con la guardia del archivo
+        tomada, así que ningún otro worker guarda en medio. Si el archivo
+        cambió desde la última revisión (p. ej. otro worker ya guardó cambios)
+        primero se recarga, para que `construir` parta del menú más reciente.
+        La firma del archivo guardado se registra: este worker no lo vuelve a
+        cargar completo.
+
+        Cada guardado deja una marca nueva en la guardia: dos guardados
+        seguidos pueden dejar la misma firma (el inodo se reusa, el tamaño no
+        cambia y el mtime tiene la resolución del reloj del kernel), la marca
+        no. Si no es la que dejó este worker, también se recarga.
+        """
+        with self._lock, guardia_archivo(self.archivo_menu) as guardia:
+            firma = firma_archivo(self.archivo_menu)
+            guardia.seek(0)
+            if firma != self._firma or guardia.read() != self._marca:
+                self._recargar(firma)
+
+            inicio = time.perf_counter()
+            catalogo = construir()
+            self._firma = firma_archivo(self.archivo_menu)
+            self._marca = uuid.uuid4().hex
+            guardia.truncate(0)
+            guardia.write(self._marca)
+            guardia.flush()
+            self._publicar(catalogo, inicio)
+            self.actualizaciones += 1
+            return catalogo
+
+    def estadisticas(self):
+        return {
+            'activo': self.activo,
+            'intervalo_segundos': self.intervalo,
+            'recargas': self.recargas,
+            'actualizaciones': self.actualizaciones,
+            'errores': self.errores,
+            'ultima_recarga': self.ultima_recarga,
+            'ultima_duracion_ms': self.ultima_duracion_ms,
+            'ultimo_error': self.ultimo_error,
+            'version': self.version,
+        }